@@ -0,0 +1 @@
+# Gerador de dados sintéticos e benchmark das etapas dos apps (execução sem Streamlit)
@@ -0,0 +1,41 @@
+import ast
+import os
+
+# ----------------------
+# Funções dos apps (main.py, main2.py, main3.py) carregadas sem executar a página:
+# só os imports e as definições pedidas, sem os decoradores (st.cache_data / cache_em_disco),
+# para o benchmark medir o trabalho de cada etapa e não o acerto de cache.
+# ----------------------
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ('main', 'main2', 'main3')
+CARREGADORES = ['carregar_singra', 'carregar_pwa', 'preparar_lotes_google']
+
+
+def funcoes_do_app(app: str, nomes: list = CARREGADORES, substituir: dict = None) -> dict:
+    """nome -> função definida em `{app}.py`; `substituir` troca nomes importados pelo app (ex.: o leitor do PWA)."""
+    caminho = os.path.join(RAIZ, f"{app}.py")
+    with open(caminho, encoding='utf-8') as f:
+        arvore = ast.parse(f.read(), caminho)
+    corpo = []
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            corpo.append(no)
+        elif isinstance(no, ast.FunctionDef) and no.name in nomes:
+            no.decorator_list = []
+            corpo.append(no)
+    faltando = set(nomes) - {no.name for no in corpo if isinstance(no, ast.FunctionDef)}
+    if faltando:
+        raise LookupError(f"{app}.py não define: {', '.join(sorted(faltando))}")
+    namespace = {'__name__': f"bench_{app}"}
+    exec(compile(ast.Module(body=corpo, type_ignores=[]), caminho, 'exec'), namespace)
+    namespace.update(substituir or {})
+    return {nome: namespace[nome] for nome in nomes}
+
+
+def importacoes_do_app(app: str) -> str:
+    """Código com só os imports de `{app}.py` (o que a página carrega antes da tela de upload)."""
+    caminho = os.path.join(RAIZ, f"{app}.py")
+    with open(caminho, encoding='utf-8') as f:
+        arvore = ast.parse(f.read(), caminho)
+    return '\n'.join(ast.unparse(no) for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom)))
@@ -0,0 +1,334 @@
+"""Benchmark das etapas dos apps sobre dados sintéticos, sem Streamlit.
+
+    python -m bench.executar --linhas 10000 100000
+    python -m bench.executar --linhas 10000 --salvar-baseline
+    python -m bench.executar --linhas 1000000 --pular main3
+
+Cada etapa roda `--repeticoes` vezes e vale a mediana. Os tempos são comparados com a baseline
+(bench/baseline.json) e o processo termina com código 1 se alguma etapa ficar mais lenta que
+`--tolerancia` vezes o tempo registrado. `--salvar-baseline` grava os tempos medidos no lugar.
+Antes das etapas, os imports de cada app são medidos num interpretador novo (importacao[app]) e
+também dão código 1 acima de `--orcamento-importacao` segundos ou com módulos importados antes do uso.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from bench.apps import APPS, funcoes_do_app
+from bench.gerador import gerar_arquivos
+from bench.importacao import ORCAMENTO_PADRAO_S, verificar_importacao
+from controle_rm.bloco1 import classificar_capas_estrito, verificar_capas_por_lote, verificar_capas_por_volume
+from controle_rm.blocos import agregar_blocos, lotes_confirmados
+from controle_rm.completude import analisar_lotes_e_capas
+from controle_rm.conciliacao import BaseConciliacao
+from controle_rm.estrategias import ESTRATEGIAS, executar_estrategia, lado_a_lado
+from controle_rm.exportacao import ExcelGrandeDemais, gerar_excel
+from controle_rm.indices import construir_indice_pwa, construir_presenca_volumes, construir_singra_map, construir_tabela_rms
+from controle_rm.ingestao import carregar_concorrente, ler_pwa
+from controle_rm.leitura import ler_singra_csv
+from controle_rm.motor_sql import agregar_blocos_sql, classificar_capas_estrito_sql, construir_singra_map_sql, duckdb_disponivel
+from controle_rm.normalizacao import normalizar_lote_serie
+from controle_rm.paralelo import (
+    classificar_capas_estrito_paralelo, processos_bloco1, verificar_capas_por_lote_paralelo, verificar_capas_por_volume_paralelo,
+)
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DADOS_PADRAO = os.path.join(tempfile.gettempdir(), 'controle_rm_bench')
+# abaixo disso a diferença é ruído de medição, não regressão
+FOLGA_SEGUNDOS = 0.02
+
+
+class Contexto:
+    """Arquivos de um tamanho e resultados das etapas já executadas (entradas das seguintes)."""
+
+    def __init__(self, arquivos: dict):
+        self.arquivos = arquivos
+        self.conferencia = pd.read_csv(arquivos['conferencia'])
+        substituir = {}
+        if arquivos['pwa'] is None:
+            # acima do limite do Excel: o PWA gerado entra já como texto, só a normalização é medida
+            substituir = {'ler_pwa': pd.read_parquet}
+        self.apps = {app: funcoes_do_app(app, substituir=substituir) for app in APPS}
+        self._resultados = {}
+
+    def upload(self, nome: str) -> io.BytesIO:
+        # como o UploadedFile do Streamlit: bytes em memória com o nome do arquivo
+        caminho = self.arquivos[nome]
+        with open(caminho, 'rb') as f:
+            upload = io.BytesIO(f.read())
+        upload.name = os.path.basename(caminho)
+        return upload
+
+    def resultado(self, nome: str):
+        # etapas puladas também rodam (fora da medição) quando outra depende delas
+        if nome not in self._resultados:
+            funcao, argumentos = ETAPAS[nome](self)
+            self._resultados[nome] = funcao(*argumentos)
+        return self._resultados[nome]
+
+    def guardar(self, nome: str, resultado) -> None:
+        self._resultados[nome] = resultado
+
+
+# ----------------------
+# Entradas derivadas, montadas como nos apps
+# ----------------------
+def _lotes_main(ctx) -> set:
+    df = ctx.resultado('preparar_conferencia[main]')
+    return set(df['LOTE'].astype(str).tolist())
+
+
+def _volumes_main2(ctx) -> set:
+    df = ctx.resultado('preparar_conferencia[main2]')
+    return set(df['LOTE'].astype(str).str.strip().tolist())
+
+
+def _lotes_main3(ctx) -> set:
+    df = ctx.resultado('preparar_conferencia[main3]')
+    lotes = set(normalizar_lote_serie(df['LOTE'], remover_bom=True))
+    lotes.discard('')
+    return lotes
+
+
+def _pedidos_singra_main3(ctx) -> set:
+    pedidos = set(ctx.resultado('carregar_singra[main3]')['ID'].dropna().tolist())
+    pedidos.discard('')
+    return pedidos
+
+
+def _tabelas_exportacao(ctx) -> dict:
+    # mesmas abas do "Exportar resultados" de main.py
+    completas, incompletas, erros_migracao = ctx.resultado('bloco1[main]')
+    blocos = ctx.resultado('blocos_2a5')
+    return {
+        "CAPA_Atendidas": completas,
+        "CAPA_Pendentes": incompletas,
+        "MAPA_sem_STC": blocos.get('mapa_sem_stc', pd.DataFrame()),
+        "STC_nao_expedida": blocos.get('stc_nao_expedida', pd.DataFrame()),
+        "SINGRA_RAW": ctx.resultado('carregar_singra[main]'),
+        "PWA_RAW": ctx.resultado('carregar_pwa[main]'),
+        "LOTES_CONFERENCIA": ctx.resultado('preparar_conferencia[main]'),
+        "MIGRATION_ERRORS": erros_migracao,
+    }
+
+
+def _fontes_concorrentes(carregadores: dict, singra: io.BytesIO, pwa: io.BytesIO, conferencia: pd.DataFrame) -> dict:
+    # as três fontes ao mesmo tempo, como no app (a conferência já em memória, sem a espera da rede)
+    fontes = {
+        'singra': (carregadores['carregar_singra'], (singra,)),
+        'pwa': (carregadores['carregar_pwa'], (pwa,)),
+        'conferencia': (carregadores['preparar_lotes_google'], (conferencia,)),
+    }
+    return {nome: resultado for nome, resultado, _ in carregar_concorrente(fontes)}
+
+
+def _conciliacao(singra: io.BytesIO, pwa: io.BytesIO, conferencia: pd.DataFrame, ler_pwa_bruto) -> pd.DataFrame:
+    # conciliacao.py: fontes lidas uma vez, as três estratégias sobre a mesma base e os veredictos lado a lado
+    base = BaseConciliacao(ler_singra_csv(singra), ler_pwa_bruto(pwa), conferencia)
+    return lado_a_lado({nome: executar_estrategia(base, nome) for nome in ESTRATEGIAS})
+
+
+# ----------------------
+# Etapas: nome -> preparar(ctx) -> (função medida, argumentos)
+# ----------------------
+ETAPAS = {}
+for _app in APPS:
+    ETAPAS[f'carregar_singra[{_app}]'] = lambda ctx, app=_app: (ctx.apps[app]['carregar_singra'], (ctx.upload('singra'),))
+    ETAPAS[f'carregar_pwa[{_app}]'] = lambda ctx, app=_app: (ctx.apps[app]['carregar_pwa'], (ctx.upload('pwa' if ctx.arquivos['pwa'] else 'pwa_parquet'),))
+    ETAPAS[f'preparar_conferencia[{_app}]'] = lambda ctx, app=_app: (ctx.apps[app]['preparar_lotes_google'], (ctx.conferencia,))
+    ETAPAS[f'carregar_fontes[{_app}]'] = lambda ctx, app=_app: (_fontes_concorrentes, (
+        ctx.apps[app], ctx.upload('singra'), ctx.upload('pwa' if ctx.arquivos['pwa'] else 'pwa_parquet'), ctx.conferencia,
+    ))
+ETAPAS.update({
+    'singra_map': lambda ctx: (construir_singra_map, (ctx.resultado('carregar_singra[main]'),)),
+    'indice_pwa': lambda ctx: (construir_indice_pwa, (ctx.resultado('carregar_pwa[main]'),)),
+    'tabela_rms': lambda ctx: (construir_tabela_rms, (ctx.resultado('carregar_pwa[main]'),)),
+    'bloco1[main]': lambda ctx: (
+        verificar_capas_por_lote, (ctx.resultado('indice_pwa'), ctx.resultado('singra_map'), _lotes_main(ctx)),
+    ),
+    'presenca_volumes[main2]': lambda ctx: (
+        construir_presenca_volumes, (ctx.resultado('carregar_pwa[main2]'), _volumes_main2(ctx)),
+    ),
+    'bloco1[main2]': lambda ctx: (verificar_capas_por_volume, (
+        construir_indice_pwa(ctx.resultado('carregar_pwa[main2]')),
+        construir_singra_map(ctx.resultado('carregar_singra[main2]')),
+        ctx.resultado('presenca_volumes[main2]'),
+    )),
+    'bloco1[main3]': lambda ctx: (
+        classificar_capas_estrito, (ctx.resultado('carregar_pwa[main3]'), _lotes_main3(ctx), _pedidos_singra_main3(ctx)),
+    ),
+    'blocos_2a5': lambda ctx: (
+        agregar_blocos, (ctx.resultado('carregar_pwa[main]'), lotes_confirmados(ctx.resultado('preparar_conferencia[main]'))),
+    ),
+    'analise_lotes_capas[main2]': lambda ctx: (
+        analisar_lotes_e_capas, (ctx.resultado('carregar_pwa[main2]'), _volumes_main2(ctx)),
+    ),
+    'exportar_excel': lambda ctx: (gerar_excel, (_tabelas_exportacao(ctx),)),
+    'conciliacao[lado_a_lado]': lambda ctx: (_conciliacao, (
+        ctx.upload('singra'), ctx.upload('pwa' if ctx.arquivos['pwa'] else 'pwa_parquet'), ctx.conferencia,
+        ler_pwa if ctx.arquivos['pwa'] else pd.read_parquet,
+    )),
+})
+if duckdb_disponivel():
+    # mesmas etapas no motor SQL (CONTROLE_RM_MOTOR=duckdb)
+    ETAPAS.update({
+        'singra_map[duckdb]': lambda ctx: (construir_singra_map_sql, (ctx.resultado('carregar_singra[main]'),)),
+        'bloco1[main3,duckdb]': lambda ctx: (
+            classificar_capas_estrito_sql, (ctx.resultado('carregar_pwa[main3]'), _lotes_main3(ctx), _pedidos_singra_main3(ctx)),
+        ),
+        'blocos_2a5[duckdb]': lambda ctx: (
+            agregar_blocos_sql, (ctx.resultado('carregar_pwa[main]'), lotes_confirmados(ctx.resultado('preparar_conferencia[main]'))),
+        ),
+    })
+if processos_bloco1() > 1:
+    # BLOCO 1 por CAM no pool de processos (CONTROLE_RM_PROCESSOS); o pool é criado na primeira repetição
+    ETAPAS.update({
+        'bloco1[main,paralelo]': lambda ctx: (verificar_capas_por_lote_paralelo, (
+            ctx.resultado('indice_pwa'), ctx.resultado('singra_map'), _lotes_main(ctx), processos_bloco1(),
+        )),
+        'bloco1[main2,paralelo]': lambda ctx: (verificar_capas_por_volume_paralelo, (
+            construir_indice_pwa(ctx.resultado('carregar_pwa[main2]')),
+            construir_singra_map(ctx.resultado('carregar_singra[main2]')),
+            ctx.resultado('presenca_volumes[main2]'),
+            processos_bloco1(),
+        )),
+        'bloco1[main3,paralelo]': lambda ctx: (classificar_capas_estrito_paralelo, (
+            ctx.resultado('carregar_pwa[main3]'), _lotes_main3(ctx), _pedidos_singra_main3(ctx), processos_bloco1(),
+        )),
+    })
+
+
+def _rebobinar(argumentos: tuple) -> None:
+    # cada repetição lê o upload desde o início, como um upload novo
+    for arg in argumentos:
+        if isinstance(arg, io.BytesIO):
+            arg.seek(0)
+
+
+def medir(funcao, argumentos: tuple, repeticoes: int, memoria: bool) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        _rebobinar(argumentos)
+        inicio = time.perf_counter()
+        resultado = funcao(*argumentos)
+        tempos.append(time.perf_counter() - inicio)
+    medida = {'segundos': statistics.median(tempos), 'minimo': min(tempos)}
+    if memoria:
+        # execução extra: o tracemalloc deixa tudo bem mais lento
+        _rebobinar(argumentos)
+        tracemalloc.start()
+        funcao(*argumentos)
+        medida['pico_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return medida, resultado
+
+
+def selecionadas(etapas: list, pular: list, nomes=None) -> list:
+    # filtros por trecho do nome: --etapas bloco1 / --pular main3
+    nomes = [n for n in (ETAPAS if nomes is None else nomes) if not etapas or any(e in n for e in etapas)]
+    return [n for n in nomes if not any(p in n for p in pular)]
+
+
+def executar(linhas: int, args) -> dict:
+    ctx = Contexto(gerar_arquivos(args.dados, linhas, args.seed))
+    medidas = {}
+    for nome in selecionadas(args.etapas, args.pular):
+        funcao, argumentos = ETAPAS[nome](ctx)
+        try:
+            medida, resultado = medir(funcao, argumentos, args.repeticoes, args.memoria)
+        except ExcelGrandeDemais as e:
+            # acima do limite de uma aba do Excel o app oferece só o ZIP
+            print(f"{linhas:>9} {nome:<30} pulada: {e}", flush=True)
+            continue
+        ctx.guardar(nome, resultado)
+        medidas[nome] = medida
+        memoria = f"  pico {medida['pico_mb']:8.1f} MB" if 'pico_mb' in medida else ''
+        print(f"{linhas:>9} {nome:<30} {medida['segundos']:9.3f} s{memoria}", flush=True)
+    return medidas
+
+
+def comparar(medidas: dict, baseline: dict, tolerancia: float) -> list:
+    regressoes = []
+    for linhas, etapas in medidas.items():
+        for nome, medida in etapas.items():
+            anterior = baseline.get(str(linhas), {}).get(nome)
+            if anterior is None:
+                continue
+            atual = medida['segundos']
+            if atual > anterior * tolerancia and atual - anterior > FOLGA_SEGUNDOS:
+                regressoes.append((linhas, nome, anterior, atual))
+    return regressoes
+
+
+def ler_baseline(caminho: str) -> dict:
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f).get('resultados', {})
+
+
+def salvar_baseline(caminho: str, medidas: dict) -> None:
+    # tamanhos não medidos nesta execução continuam na baseline
+    resultados = ler_baseline(caminho)
+    for linhas, etapas in medidas.items():
+        resultados.setdefault(str(linhas), {}).update({nome: round(m['segundos'], 4) for nome, m in etapas.items()})
+    conteudo = {
+        'maquina': {'python': platform.python_version(), 'pandas': pd.__version__, 'processador': platform.processor() or platform.machine()},
+        'resultados': resultados,
+    }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000], help="linhas do PWA (uma rodada por tamanho)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--etapas', nargs='*', default=[], help="só as etapas cujo nome contém um destes trechos")
+    parser.add_argument('--pular', nargs='*', default=[], help="pula as etapas cujo nome contém um destes trechos")
+    parser.add_argument('--memoria', action='store_true', help="mede também o pico de memória (tracemalloc)")
+    parser.add_argument('--dados', default=DADOS_PADRAO, help="diretório dos arquivos gerados (reaproveitados entre execuções)")
+    parser.add_argument('--baseline', default=BASELINE_PADRAO)
+    parser.add_argument('--salvar-baseline', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=1.5)
+    parser.add_argument('--saida', help="grava as medidas desta execução em JSON")
+    parser.add_argument('--orcamento-importacao', type=float, default=ORCAMENTO_PADRAO_S,
+                        help="segundos máximos para importar cada app num interpretador novo")
+    args = parser.parse_args(argv)
+    # FutureWarnings do pandas repetidos a cada grupo tomariam a saída inteira
+    warnings.simplefilter('ignore', FutureWarning)
+
+    apps_importacao = [app for app in APPS if selecionadas(args.etapas, args.pular, [f'importacao[{app}]'])]
+    violacoes = verificar_importacao(apps_importacao, args.orcamento_importacao)
+    for violacao in violacoes:
+        print(f"IMPORTAÇÃO {violacao}", file=sys.stderr)
+
+    medidas = {linhas: executar(linhas, args) for linhas in args.linhas}
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({str(k): v for k, v in medidas.items()}, f, indent=2)
+    if args.salvar_baseline:
+        salvar_baseline(args.baseline, medidas)
+        print(f"Baseline gravada em {args.baseline}")
+        return 1 if violacoes else 0
+
+    regressoes = comparar(medidas, ler_baseline(args.baseline), args.tolerancia)
+    for linhas, nome, anterior, atual in regressoes:
+        print(f"REGRESSÃO {linhas:>9} {nome:<30} {anterior:.3f} s -> {atual:.3f} s", file=sys.stderr)
+    return 1 if regressoes or violacoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
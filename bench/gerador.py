@@ -0,0 +1,224 @@
+import os
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from controle_rm.leitura import COLUNAS_PWA
+
+# ----------------------
+# Dados sintéticos com os nomes de coluna reais: PWA (.xlsx), SINGRA (.csv, ';', latin1)
+# e planilha de conferência (coluna LOTE com lotes e volumes conferidos).
+# Cobre CAPAs com RMs sem MAPA / com MAPA / com STC / expedidas / canceladas misturadas,
+# itens CANCELADO dentro de RMs ativas, volumes em branco, linhas sem CAPA,
+# RMs que não migraram para o SINGRA e RMs do SINGRA fora do PWA.
+# ----------------------
+
+# uma aba do Excel tem 1.048.576 linhas, uma delas é o cabeçalho
+LIMITE_LINHAS_XLSX = 1_048_575
+
+COLUNAS_PWA_EXTRAS = ['UNIDADE', 'DEPOSITO']
+COLUNAS_SINGRA_GERADO = ['ID', 'SITUACAO', 'OMS', 'LISTA_WMS_ID', 'DATA_CRIACAO', 'DESCRICAO']
+COLUNAS_CONFERENCIA = ['LOTE', 'DATA', 'CONFERENTE']
+
+CAMS = [f"CAM {i:02d}" for i in range(1, 13)]
+
+# perfil da RM -> (probabilidade, STATUS possíveis no PWA, SITUACAO possíveis no SINGRA)
+PERFIS = {
+    'sem_mapa': (0.45, ['AGUARDANDO SEPARAÇÃO', 'EM SEPARAÇÃO', 'SEPARADO', 'EM CONFERÊNCIA'],
+                 ['EM EXPEDIÇÃO', 'EM EXPEDIÇÃO', 'EM SEPARAÇÃO', 'AGUARDANDO SEPARAÇÃO']),
+    'mapa': (0.20, ['SEPARADO', 'EM CONFERÊNCIA', 'CONFERIDO'], ['EM EXPEDIÇÃO', 'EM SEPARAÇÃO']),
+    'stc': (0.12, ['CONFERIDO', 'AGUARDANDO EXPEDIÇÃO'], ['EM EXPEDIÇÃO']),
+    'expedida': (0.15, ['EXPEDIDO'], ['EXPEDIDA', 'EM EXPEDIÇÃO']),
+    'cancelada': (0.08, ['CANCELADO'], ['CANCELADA']),
+}
+
+_ITENS = ['PARAFUSO', 'ARRUELA', 'FILTRO DE ÓLEO', 'CABO ELÉTRICO', 'VÁLVULA', 'JUNTA', 'ROLAMENTO', 'MANGUEIRA']
+
+
+def _escolher(opcoes: list, indices: np.ndarray) -> np.ndarray:
+    return np.asarray(opcoes, dtype=object)[indices]
+
+
+def _pedido_formatado(codigos: np.ndarray) -> np.ndarray:
+    texto = pd.Series(codigos.astype(str))
+    return (texto.str[:2] + '.' + texto.str[2:5] + '.' + texto.str[5:]).to_numpy(dtype=object)
+
+
+def gerar_dados(n_linhas: int, seed: int = 0) -> dict:
+    """PWA com `n_linhas` linhas e o SINGRA / conferência correspondentes.
+
+    Retorna {'pwa', 'singra', 'conferencia'} com os valores como viriam das planilhas
+    (números como int, células vazias como None).
+    """
+    rng = np.random.default_rng(seed)
+    n_rms = max(n_linhas // 5, 1)
+    n_extras_singra = max(n_rms // 4, 1)
+
+    # RMs (8 dígitos, distintas): as primeiras n_rms estão no PWA, as demais só no SINGRA
+    codigos = 10_000_000 + rng.choice(90_000_000, size=n_rms + n_extras_singra, replace=False)
+    rm_codigo = codigos[:n_rms]
+
+    # RM -> CAPA (1 a 6 RMs por CAPA), CAPA -> CAM
+    capa_rm = np.repeat(np.arange(n_rms), rng.integers(1, 7, size=n_rms))[:n_rms]
+    n_capas = int(capa_rm[-1]) + 1
+    cam_capa = rng.integers(0, len(CAMS), size=n_capas)
+
+    nomes_perfis = list(PERFIS)
+    perfil_rm = rng.choice(len(nomes_perfis), size=n_rms, p=[PERFIS[p][0] for p in nomes_perfis])
+    tem_mapa = np.isin(perfil_rm, [nomes_perfis.index(p) for p in ('mapa', 'stc', 'expedida')])
+    tem_stc = np.isin(perfil_rm, [nomes_perfis.index(p) for p in ('stc', 'expedida')])
+    # parte das canceladas já tinha MAPA
+    tem_mapa |= (perfil_rm == nomes_perfis.index('cancelada')) & (rng.random(n_rms) < 0.3)
+
+    status_rm = np.empty(n_rms, dtype=object)
+    for i, nome in enumerate(nomes_perfis):
+        sel = perfil_rm == i
+        opcoes = PERFIS[nome][1]
+        status_rm[sel] = _escolher(opcoes, rng.integers(0, len(opcoes), size=int(sel.sum())))
+
+    # linhas: cada linha é um item de uma RM (~5 itens por RM), agrupadas por RM
+    rm_linha = np.sort(rng.integers(0, n_rms, size=n_linhas))
+    capa_linha = capa_rm[rm_linha]
+
+    # LOTES por RM (1 a 3) e VOLUMES por LOTE (1 a 4)
+    n_lotes_rm = rng.integers(1, 4, size=n_rms)
+    base_lote = np.concatenate(([0], np.cumsum(n_lotes_rm)[:-1]))
+    lote_linha = base_lote[rm_linha] + (rng.random(n_linhas) * n_lotes_rm[rm_linha]).astype(np.int64)
+    volume_linha = lote_linha * 4 + rng.integers(0, 4, size=n_linhas)
+
+    status = status_rm[rm_linha].copy()
+    # itens cancelados dentro de RMs ativas e um pouco de sujeira de digitação
+    ativo = status != 'CANCELADO'
+    status[ativo & (rng.random(n_linhas) < 0.04)] = 'CANCELADO'
+    status[(status == 'EXPEDIDO') & (rng.random(n_linhas) < 0.01)] = ' expedido'
+
+    mapa = np.where(tem_mapa[rm_linha], 100_000 + capa_linha, None)
+    stc = np.where(tem_stc[rm_linha], 700_000 + capa_linha // 3, None)
+    capa = np.char.add('CP', (200_000 + capa_linha).astype(str)).astype(object)
+    capa[rng.random(n_linhas) < 0.01] = None
+    volume = (500_000_000 + volume_linha).astype(object)
+    volume[rng.random(n_linhas) < 0.03] = None
+
+    item = rng.integers(0, 2000, size=n_linhas)
+    pwa = pd.DataFrame({
+        'PEDIDO': _pedido_formatado(rm_codigo)[rm_linha],
+        'CAPA': capa,
+        'MAPA': mapa,
+        'STC': stc,
+        'CAM': _escolher(CAMS, cam_capa[capa_linha]),
+        'LOTE': (3_000_000 + lote_linha).astype(object),
+        'STATUS': status,
+        'VOLUME': volume,
+        'PI': np.char.add('PI', (100_000_000 + item * 7919).astype(str)).astype(object),
+        'NOMENCLATURA': _escolher(_ITENS, item % len(_ITENS)) + ' ' + (item // len(_ITENS)).astype(str).astype(object),
+        'QTD': rng.integers(1, 51, size=n_linhas).astype(object),
+        'UNIDADE': _escolher(['UN', 'CX', 'PC', 'KG'], rng.integers(0, 4, size=n_linhas)),
+        'DEPOSITO': _escolher(['DEP 1', 'DEP 2', 'DEP 3'], rng.integers(0, 3, size=n_linhas)),
+    }, columns=COLUNAS_PWA + COLUNAS_PWA_EXTRAS)
+
+    return {
+        'pwa': pwa,
+        'singra': _gerar_singra(rng, codigos, n_rms, perfil_rm, nomes_perfis),
+        'conferencia': _gerar_conferencia(rng, lote_linha, volume_linha),
+    }
+
+
+def _gerar_singra(rng, codigos: np.ndarray, n_rms: int, perfil_rm: np.ndarray, nomes_perfis: list) -> pd.DataFrame:
+    # ~5% das RMs do PWA não migraram; as RMs extras não estão no PWA
+    migrada = np.concatenate((rng.random(n_rms) >= 0.05, np.ones(len(codigos) - n_rms, dtype=bool)))
+    perfil = np.concatenate((perfil_rm, rng.integers(0, len(nomes_perfis), size=len(codigos) - n_rms)))
+    ids, perfil = codigos[migrada], perfil[migrada]
+    # ~3% das RMs aparecem em mais de uma lista do WMS
+    repetidas = np.flatnonzero(rng.random(len(ids)) < 0.03)
+    ids, perfil = np.concatenate((ids, ids[repetidas])), np.concatenate((perfil, perfil[repetidas]))
+    ordem = rng.permutation(len(ids))
+    ids, perfil = ids[ordem], perfil[ordem]
+
+    situacao = np.empty(len(ids), dtype=object)
+    for i, nome in enumerate(nomes_perfis):
+        sel = perfil == i
+        opcoes = PERFIS[nome][2]
+        situacao[sel] = _escolher(opcoes, rng.integers(0, len(opcoes), size=int(sel.sum())))
+
+    id_texto = ids.astype(str).astype(object)
+    com_pontos = rng.random(len(ids)) < 0.1
+    id_texto[com_pontos] = _pedido_formatado(ids[com_pontos])
+    dias = rng.integers(0, 365, size=len(ids))
+    return pd.DataFrame({
+        'ID': id_texto,
+        'SITUACAO': situacao,
+        'OMS': np.char.add('OM ', rng.integers(1, 200, size=len(ids)).astype(str)).astype(object),
+        'LISTA_WMS_ID': (900_000 + rng.integers(0, max(len(ids) // 20, 1), size=len(ids))).astype(str),
+        'DATA_CRIACAO': (pd.Timestamp('2024-01-01') + pd.to_timedelta(dias, unit='D')).strftime('%d/%m/%Y'),
+        'DESCRICAO': 'REQUISIÇÃO DE MATERIAL',
+    }, columns=COLUNAS_SINGRA_GERADO)
+
+
+def _gerar_conferencia(rng, lote_linha: np.ndarray, volume_linha: np.ndarray) -> pd.DataFrame:
+    # ~60% dos LOTES conferidos; dos volumes desses lotes, ~90% lançados (alguns lotes ficam incompletos)
+    lotes = np.unique(lote_linha)
+    lotes_ok = lotes[rng.random(len(lotes)) < 0.6]
+    volumes = np.unique(volume_linha)
+    volumes_ok = volumes[np.isin(volumes // 4, lotes_ok) & (rng.random(len(volumes)) < 0.9)]
+    valores = np.concatenate((3_000_000 + lotes_ok, 500_000_000 + volumes_ok))
+    valores = valores[rng.permutation(len(valores))]
+    dias = rng.integers(0, 30, size=len(valores))
+    return pd.DataFrame({
+        'LOTE': valores,
+        'DATA': (pd.Timestamp('2024-06-01') + pd.to_timedelta(dias, unit='D')).strftime('%d/%m/%Y'),
+        'CONFERENTE': _escolher(['ANA', 'BRUNO', 'CARLA', 'DIEGO'], rng.integers(0, 4, size=len(valores))),
+    }, columns=COLUNAS_CONFERENCIA)
+
+
+def como_lido(pwa: pd.DataFrame) -> pd.DataFrame:
+    """O PWA gerado como `leitura.ler_pwa_xlsx` o devolveria (texto, vazio como NaN)."""
+    lido = {}
+    for col in COLUNAS_PWA:
+        serie = pd.Series(pwa[col].to_numpy(), dtype=object)
+        lido[col] = serie.astype(str).where(serie.notna(), np.nan)
+    return pd.DataFrame(lido)
+
+
+def gravar_pwa_xlsx(pwa: pd.DataFrame, caminho: str) -> None:
+    if len(pwa) > LIMITE_LINHAS_XLSX:
+        raise ValueError(f"O PWA tem {len(pwa)} linhas; uma aba do Excel comporta {LIMITE_LINHAS_XLSX}.")
+    workbook = xlsxwriter.Workbook(caminho, {'constant_memory': True})
+    ws = workbook.add_worksheet('PWA')
+    ws.write_row(0, 0, list(pwa.columns))
+    for i, linha in enumerate(pwa.itertuples(index=False, name=None), start=1):
+        ws.write_row(i, 0, linha)
+    workbook.close()
+
+
+def gravar_singra_csv(singra: pd.DataFrame, caminho: str) -> None:
+    singra.to_csv(caminho, sep=';', index=False, encoding='latin1')
+
+
+def gerar_arquivos(diretorio: str, n_linhas: int, seed: int = 0) -> dict:
+    """Grava (ou reaproveita) os arquivos de um tamanho em `diretorio`.
+
+    Retorna {'pwa', 'singra', 'conferencia'} -> caminho; 'pwa' é None acima do limite do Excel,
+    e nesse caso 'pwa_parquet' traz o PWA gerado para as etapas seguintes à leitura.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    prefixo = os.path.join(diretorio, f"{n_linhas}_{seed}")
+    caminhos = {
+        'pwa': f"{prefixo}_pwa.xlsx" if n_linhas <= LIMITE_LINHAS_XLSX else None,
+        'pwa_parquet': f"{prefixo}_pwa.parquet",
+        'singra': f"{prefixo}_singra.csv",
+        'conferencia': f"{prefixo}_conferencia.csv",
+    }
+    if all(c is None or os.path.exists(c) for c in caminhos.values()):
+        return caminhos
+
+    dados = gerar_dados(n_linhas, seed)
+    # Parquet guarda o PWA gerado como texto (None preservado) para os tamanhos acima do Excel
+    como_lido(dados['pwa']).to_parquet(caminhos['pwa_parquet'], index=False)
+    gravar_singra_csv(dados['singra'], caminhos['singra'])
+    dados['conferencia'].to_csv(caminhos['conferencia'], index=False)
+    if caminhos['pwa']:
+        # grava por último: arquivo presente = geração completa
+        gravar_pwa_xlsx(dados['pwa'], caminhos['pwa'] + '.tmp')
+        os.replace(caminhos['pwa'] + '.tmp', caminhos['pwa'])
+    return caminhos
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+from bench.apps import RAIZ, importacoes_do_app
+
+# ----------------------
+# Tempo de importação dos apps num interpretador novo (como um container recém-iniciado):
+# os imports de cada página medidos com `python -X importtime`, antes de qualquer upload.
+# Falha quando passa do orçamento ou quando um módulo que deve ser importado só no uso
+# (Google, escrita/leitura de Excel, motor SQL) já aparece na importação da página.
+# ----------------------
+
+# ~0,9 s medidos (quase tudo pandas e streamlit, necessários já na tela de upload), com folga
+ORCAMENTO_PADRAO_S = 2.0
+MODULOS_SOB_DEMANDA = ('gspread', 'oauth2client', 'openpyxl', 'xlsxwriter', 'python_calamine', 'duckdb')
+
+
+def _ler_importtime(saida: str) -> tuple:
+    # linhas "import time: self [us] | cumulative | imported package"; nível 0 = sem recuo no nome
+    total_us, modulos = 0, set()
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'imported package' in linha:
+            continue
+        _, acumulado, nome = linha.split('|', 2)
+        modulo = nome.strip()
+        modulos.add(modulo.split('.')[0])
+        if not nome[1:].startswith(' '):
+            total_us += int(acumulado)
+    return total_us / 1e6, modulos
+
+
+def medir_importacao(app: str) -> dict:
+    """Segundos de importação de `{app}.py` num processo novo e os módulos sob demanda já importados."""
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', importacoes_do_app(app)],
+        cwd=RAIZ, capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': RAIZ},
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"importação de {app}.py falhou:\n{processo.stderr[-2000:]}")
+    segundos, modulos = _ler_importtime(processo.stderr)
+    return {'segundos': segundos, 'antecipados': sorted(m for m in MODULOS_SOB_DEMANDA if m in modulos)}
+
+
+def verificar_importacao(apps: list, orcamento: float = ORCAMENTO_PADRAO_S) -> list:
+    """Mede cada app e devolve as violações (texto) do orçamento e dos módulos sob demanda."""
+    violacoes = []
+    for app in apps:
+        medida = medir_importacao(app)
+        antecipados = f"  antecipados: {', '.join(medida['antecipados'])}" if medida['antecipados'] else ''
+        print(f"{'importação':>9} {app:<30} {medida['segundos']:9.3f} s{antecipados}", flush=True)
+        if medida['segundos'] > orcamento:
+            violacoes.append(f"{app}.py importa em {medida['segundos']:.2f} s (orçamento {orcamento:.2f} s)")
+        if medida['antecipados']:
+            violacoes.append(f"{app}.py importa {', '.join(medida['antecipados'])} antes do uso")
+    return violacoes
@@ -0,0 +1,185 @@
+import streamlit as st
+import pandas as pd
+from controle_rm.cache_disco import cache_em_disco
+from controle_rm.conciliacao import BaseConciliacao
+from controle_rm.conferencia import PlanilhaGoogle, diretorio_conferencia, ler_conferencia, sincronizar_conferencia
+from controle_rm.desempenho import Medidor, desempenho_ativo
+from controle_rm.estrategias import ESTRATEGIAS, executar_estrategia, lado_a_lado
+from controle_rm.etapas import impressao_digital, impressao_digital_df
+from controle_rm.ingestao import ErroFonte, ler_pwa
+from controle_rm.interface import carregar_fontes, exibir_blocos_2a5, exportar_resultados, painel_desempenho, tabela_paginada
+from controle_rm.leitura import ler_singra_csv
+from controle_rm.motor_sql import motor_execucao
+from controle_rm.paralelo import processos_bloco1
+
+st.set_page_config(page_title="Controle de RM - conciliação", layout="wide")
+st.title("📦 Controle de RMs - Conciliação")
+st.markdown("Uma leitura do SINGRA, do PWA e da conferência para as verificações do BLOCO 1 — por LOTE (main.py), "
+            "por VOLUME (main2.py) e estrita (main3.py) — sozinhas ou lado a lado.")
+
+# ----------------------
+# Cache: fontes lidas uma vez, sem normalizar; cada estratégia normaliza a partir delas (BaseConciliacao)
+# ----------------------
+@st.cache_data
+@cache_em_disco('conciliacao.singra')
+def carregar_singra(file):
+    # Encoding detectado no início do arquivo (utf-8-sig ou latin1), somente ID/SITUACAO/OMS/LISTA_WMS_ID
+    return ler_singra_csv(file)
+
+@st.cache_data
+@cache_em_disco('conciliacao.pwa')
+def carregar_pwa(file):
+    # somente as colunas usadas pelos blocos, num processo do pool quando CONTROLE_RM_PROCESSOS > 1
+    return ler_pwa(file)
+
+@st.cache_data(ttl=3600)
+def carregar_conferencia_google(credentials_dict: dict, sheet_url: str):
+    # releitura completa da planilha
+    return ler_conferencia(PlanilhaGoogle.de_credenciais(credentials_dict, sheet_url))
+
+@st.cache_resource
+def conectar_planilha_google(credentials_dict: dict, sheet_url: str):
+    return PlanilhaGoogle.de_credenciais(credentials_dict, sheet_url)
+
+@st.cache_data(ttl=15)
+def carregar_conferencia_incremental(credentials_dict: dict, sheet_url: str):
+    # busca só as linhas novas desde a última leitura (snapshot local da planilha)
+    backend = conectar_planilha_google(credentials_dict, sheet_url)
+    return sincronizar_conferencia(backend, diretorio_conferencia(sheet_url))
+
+# ----------------------
+# Base em cache (sem cópia) pelas impressões digitais das entradas: trocar de estratégia ou de
+# modo reaproveita fontes normalizadas, índices e resultados já calculados
+# ----------------------
+@st.cache_resource(max_entries=2)
+def carregar_base(chave_singra: str, chave_pwa: str, chave_lotes: str, motor: str,
+                  _df_singra: pd.DataFrame, _df_pwa: pd.DataFrame, _df_conferencia: pd.DataFrame):
+    return BaseConciliacao(_df_singra, _df_pwa, _df_conferencia, motor)
+
+@st.fragment
+def comparacao_capas(comparacao: pd.DataFrame):
+    so_divergentes = st.toggle("Somente CAPAs com veredictos divergentes", value=False)
+    tabela = comparacao[comparacao['DIVERGENTE']] if so_divergentes else comparacao
+    tabela_paginada(tabela, "lado_a_lado", hide_index=True)
+
+def exibir_estrategia(nome: str, tabelas: dict):
+    estrategia = ESTRATEGIAS[nome]
+    for tabela, titulo in estrategia.tabelas.items():
+        st.subheader(f"{titulo} ({len(tabelas[tabela])})")
+        if tabelas[tabela].empty:
+            st.info("Nenhuma linha.")
+        else:
+            tabela_paginada(tabelas[tabela], f"{nome}.{tabela}", quebrar_linhas=True)
+
+# ----------------------
+# UI: Uploads e modo
+# ----------------------
+with st.expander("📄 Upload de arquivos", expanded=True):
+    col1, col2 = st.columns(2)
+    with col1:
+        singra_file = st.file_uploader("Upload planilha do SINGRA (.csv)", type=["csv"])
+    with col2:
+        pwa_file = st.file_uploader("Upload planilha do PWA (.xlsx)", type=["xlsx"])
+    sync_incremental = st.checkbox("Sincronização incremental da planilha de conferência (Google)", value=True,
+                                   help="Busca só as linhas novas a cada 15 s; desmarcado, relê a planilha inteira a cada hora.")
+    medir_desempenho = st.checkbox("Medir desempenho das etapas", value=desempenho_ativo(),
+                                   help="Tempo, linhas e memória de cada etapa no painel Desempenho (fim da página) e no log.")
+
+if not (singra_file and pwa_file):
+    st.info("Faça upload do SINGRA (.csv) e do PWA (.xlsx) para prosseguir.")
+    st.stop()
+
+modo = st.radio("Modo", ["Uma verificação", "Lado a lado"], horizontal=True)
+if modo == "Lado a lado":
+    nomes = st.multiselect("Verificações", list(ESTRATEGIAS), default=list(ESTRATEGIAS),
+                           format_func=lambda nome: ESTRATEGIAS[nome].titulo)
+else:
+    nomes = [st.selectbox("Verificação", list(ESTRATEGIAS), format_func=lambda nome: ESTRATEGIAS[nome].titulo)]
+
+# ----------------------
+# Carregamento
+# ----------------------
+medidor = Medidor('conciliacao', ativo=medir_desempenho)
+motor = motor_execucao()  # 'pandas' ou 'duckdb' (CONTROLE_RM_MOTOR)
+processos = processos_bloco1()  # BLOCO 1 por CAM em N processos (CONTROLE_RM_PROCESSOS)
+# SINGRA, PWA e conferência (Google Sheets) carregados ao mesmo tempo
+try:
+    SHEET_URL = "https://docs.google.com/spreadsheets/d/1naVnAlUGmeAMb_YftLGYit-1e1BcYFJgiJwSnOcgJf4/edit?gid=0"
+    service_account_dict = dict(st.secrets["gcp_service_account"])
+    carregar_conferencia = carregar_conferencia_incremental if sync_incremental else carregar_conferencia_google
+    fontes = carregar_fontes({
+        "SINGRA (carregar)": (carregar_singra, (singra_file,)),
+        "PWA (carregar)": (carregar_pwa, (pwa_file,)),
+        "Conferência (Google)": (carregar_conferencia, (service_account_dict, SHEET_URL)),
+    }, medidor)
+except ErroFonte as e:
+    if e.fonte != "Conferência (Google)":
+        raise
+    st.error(f"Erro ao conectar com o Google Sheets: {e.__cause__}")
+    st.stop()
+except Exception as e:
+    st.error(f"Erro ao conectar com o Google Sheets: {e}")
+    st.stop()
+chave_singra = impressao_digital(singra_file, 'conciliacao.singra')
+chave_pwa = impressao_digital(pwa_file, 'conciliacao.pwa')
+chave_lotes = impressao_digital_df(fontes["Conferência (Google)"])
+base = carregar_base(chave_singra, chave_pwa, chave_lotes, motor,
+                     fontes["SINGRA (carregar)"], fontes["PWA (carregar)"], fontes["Conferência (Google)"])
+
+df_pwa = medidor.medir("PWA (normalizar)", base.pwa, 'lote')
+df_lotes_user = medidor.medir("Conferência (normalizar)", base.conferencia, 'lote')
+
+c1, c2, c3 = st.columns(3)
+c1.metric("RMs únicas (PWA)", df_pwa['PEDIDO_LIMPO'].nunique())
+c2.metric("Linhas PWA", len(df_pwa))
+c3.metric("Linhas na planilha (Google)", len(df_lotes_user))
+
+st.divider()
+
+# ----------------------
+# BLOCO 1: estratégias escolhidas, sobre a mesma base
+# ----------------------
+st.markdown("## 🔵 BLOCO 1 — Verificação das CAPAs")
+
+resultados = {}
+for nome in nomes:
+    try:
+        resultados[nome] = medidor.medir(f"BLOCO 1 ({nome})", executar_estrategia, base, nome, processos, linhas=len(df_pwa))
+    except ValueError as e:
+        st.error(f"{ESTRATEGIAS[nome].titulo}: {e}")
+
+if modo == "Lado a lado" and resultados:
+    comparacao = medidor.medir("BLOCO 1 (lado a lado)", lado_a_lado, resultados)
+    ca, cb = st.columns(2)
+    ca.metric("CAPAs avaliadas", len(comparacao))
+    cb.metric("CAPAs com veredictos divergentes", int(comparacao['DIVERGENTE'].sum()))
+    comparacao_capas(comparacao)
+
+if resultados:
+    with medidor.etapa("BLOCO 1 (tela)"):
+        abas = st.tabs([ESTRATEGIAS[nome].titulo for nome in resultados])
+        for aba, (nome, tabelas) in zip(abas, resultados.items()):
+            with aba:
+                exibir_estrategia(nome, tabelas)
+
+# BLOCOS 2-5 uma vez, iguais para todas as estratégias
+blocos = medidor.medir("BLOCOS 2-5", base.blocos_2a5)
+exibidas_blocos = exibir_blocos_2a5(blocos, df_pwa, df_lotes_user, medidor)
+
+# ----------------------
+# Exportação: tabelas de cada estratégia, comparação e blocos; uploads originais no ZIP
+# ----------------------
+with st.expander("📥 Exportar resultados"):
+    export_dfs = {f"{nome}_{tabela}"[:31]: df for nome, tabelas in resultados.items() for tabela, df in tabelas.items()}
+    if 'comparacao' in locals():
+        export_dfs["LADO_A_LADO"] = comparacao
+    export_dfs.update({nome.upper(): df for nome, df in exibidas_blocos.items()})
+    export_dfs.update({"SINGRA_RAW": base.singra_bruto, "PWA_RAW": base.pwa_bruto, "LOTES_CONFERENCIA": df_lotes_user})
+    exportar_resultados(
+        f"{chave_pwa}:{chave_singra}:{chave_lotes}:{','.join(resultados)}",
+        export_dfs,
+        {"SINGRA_RAW": singra_file, "PWA_RAW": pwa_file},
+        medidor
+    )
+
+painel_desempenho(medidor)
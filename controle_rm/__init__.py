@@ -0,0 +1 @@
+# Pacote compartilhado pelos apps de controle de RMs (main.py, main2.py, main3.py)
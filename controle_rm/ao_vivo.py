@@ -0,0 +1,120 @@
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from controle_rm.bloco1 import juntar_tabelas
+from controle_rm.indices import IndicePWA, PresencaVolumes, construir_presenca_volumes, sub_indice
+from controle_rm.paralelo import verificar_capas_por_lote_paralelo, verificar_capas_por_volume_paralelo
+
+# ----------------------
+# Modo ao vivo: durante o carregamento, o BLOCO 1 fica num fragment que se refaz sozinho a cada
+# N segundos (o resto da página não roda de novo). A cada rodada a conferência é relida
+# (sincronização incremental) e só as CAPAs com algum LOTE afetado pelos LOTES/VOLUMES que
+# entraram ou saíram da planilha são reavaliadas; as demais linhas das tabelas são mantidas.
+#   CONTROLE_RM_AO_VIVO_S=30   intervalo entre as rodadas, em segundos (mínimo 5)
+# ----------------------
+
+INTERVALO_PADRAO_S = 30
+INTERVALO_MINIMO_S = 5
+
+
+def intervalo_ao_vivo() -> int:
+    try:
+        valor = int(float(os.environ.get('CONTROLE_RM_AO_VIVO_S', INTERVALO_PADRAO_S)))
+    except ValueError:
+        valor = INTERVALO_PADRAO_S
+    return max(valor, INTERVALO_MINIMO_S)
+
+
+def capas_dos_lotes(indice: IndicePWA, lotes: set) -> list:
+    """CAPAs (na ordem do índice) com alguma RM num dos `lotes`."""
+    if not lotes:
+        return []
+    rms = {rm for rm, lotes_rm in indice.rm_lotes.items() if not lotes.isdisjoint(lotes_rm)}
+    return [capa for capa in indice.capas if not rms.isdisjoint(indice.capa_rms.get(capa, []))]
+
+
+def lotes_dos_volumes(df_pwa: pd.DataFrame, volumes: set) -> set:
+    """LOTES do PWA com algum dos `volumes` previstos."""
+    if not volumes or 'VOLUME' not in df_pwa.columns or 'LOTE' not in df_pwa.columns:
+        return set()
+    linhas = df_pwa['VOLUME'].astype(str).str.strip().isin(volumes)
+    return set(df_pwa.loc[linhas, 'LOTE'].astype(str))
+
+
+def atualizar_presenca_volumes(presenca: PresencaVolumes, df_pwa: pd.DataFrame, volumes_expedicao: set, lotes: set) -> PresencaVolumes:
+    """`presenca` com os `lotes` recalculados para a conferência atual (os demais LOTES não mudam)."""
+    if not lotes:
+        return presenca
+    parcial = construir_presenca_volumes(df_pwa[df_pwa['LOTE'].astype(str).isin(lotes)], volumes_expedicao)
+
+    def trocar(anterior: dict, novo: dict) -> dict:
+        return {**{l: v for l, v in anterior.items() if l not in lotes}, **novo}
+
+    return PresencaVolumes(
+        faltantes=trocar(presenca.faltantes, parcial.faltantes),
+        completo=trocar(presenca.completo, parcial.completo),
+        algum_presente=trocar(presenca.algum_presente, parcial.algum_presente),
+        sem_volumes=(presenca.sem_volumes - lotes) | parcial.sem_volumes,
+    )
+
+
+@dataclass
+class Bloco1AoVivo:
+    """Último BLOCO 1 (main.py / main2.py) do modo ao vivo desta sessão e a conferência que o produziu."""
+    entradas: tuple = None                  # (chave_pwa, chave_singra) do último cálculo
+    conferidos: frozenset = frozenset()     # LOTES (main.py) ou VOLUMES (main2.py) da conferência
+    presenca: PresencaVolumes = None        # main2.py
+    resultado: tuple = None
+    resumo: dict = field(default_factory=dict)  # última rodada: 'modo', 'capas', 'conferidos', 'hora'
+
+    def chave_conferidos(self) -> str:
+        """sha256 dos LOTES/VOLUMES conferidos da última rodada (identifica `resultado` junto com `entradas`)."""
+        return hashlib.sha256('\n'.join(sorted(self.conferidos)).encode('utf-8')).hexdigest()
+
+    def verificar_por_lote(self, entradas: tuple, indice: IndicePWA, singra_map: dict, lotes_disponiveis: set, processos: int = 1):
+        """Mesmo resultado de verificar_capas_por_lote(indice, singra_map, lotes_disponiveis)."""
+        lotes = frozenset(lotes_disponiveis)
+        alterados = None if entradas != self.entradas else set(lotes ^ self.conferidos)
+        return self._atualizar(
+            entradas, indice, lotes, alterados, processos,
+            lambda sub, n: verificar_capas_por_lote_paralelo(sub, singra_map, lotes, n),
+        )
+
+    def verificar_por_volume(self, entradas: tuple, indice: IndicePWA, singra_map: dict, df_pwa: pd.DataFrame,
+                             volumes_expedicao: set, processos: int = 1):
+        """Mesmo resultado de verificar_capas_por_volume com a presença de volumes da conferência atual."""
+        volumes = frozenset(volumes_expedicao)
+        if entradas != self.entradas or self.presenca is None:
+            alterados = None
+            self.presenca = construir_presenca_volumes(df_pwa, volumes)
+        else:
+            alterados = lotes_dos_volumes(df_pwa, volumes ^ self.conferidos)
+            self.presenca = atualizar_presenca_volumes(self.presenca, df_pwa, volumes, alterados)
+        presenca = self.presenca
+        return self._atualizar(
+            entradas, indice, volumes, alterados, processos,
+            lambda sub, n: verificar_capas_por_volume_paralelo(sub, singra_map, presenca, n),
+        )
+
+    def _atualizar(self, entradas: tuple, indice: IndicePWA, conferidos: frozenset, lotes_alterados, processos: int, calcular):
+        if lotes_alterados is None or self.resultado is None:
+            resultado = calcular(indice, processos)
+            self.resumo = {'modo': 'completo', 'capas': len(indice.capas)}
+        else:
+            capas = capas_dos_lotes(indice, lotes_alterados)
+            resultado = self.resultado
+            if capas:
+                # poucas CAPAs por rodada: no próprio processo, sem o pool
+                novas = calcular(sub_indice(indice, capas), 1)
+                resultado = tuple(
+                    juntar_tabelas([anterior[~anterior['CAPA'].isin(capas)] if len(anterior) else anterior, nova], 'CAPA')
+                    for anterior, nova in zip(self.resultado, novas)
+                )
+            self.resumo = {'modo': 'parcial', 'capas': len(capas)}
+        self.resumo.update(conferidos=len(conferidos), hora=time.strftime('%H:%M:%S'))
+        self.entradas, self.conferidos, self.resultado = entradas, conferidos, resultado
+        return resultado
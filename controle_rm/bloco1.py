@@ -0,0 +1,304 @@
+import numpy as np
+import pandas as pd
+
+from controle_rm.normalizacao import normalizar_codigo_rm_serie, normalizar_lote_serie
+
+# ----------------------
+# BLOCO 1 — verificação de CAPAs (somente RMs sem MAPA), lida a partir do IndicePWA
+# ----------------------
+
+def singra_indica_em_expedicao(val: str) -> bool:
+    if pd.isna(val) or str(val).strip() == '':
+        return False
+    v = str(val).strip().upper()
+    return ('EXPED' in v) or ('EM EXPED' in v) or ('EXPEDIÇÃO' in v) or ('EXPEDICAO' in v)
+
+
+def juntar_tabelas(partes: list, coluna: str) -> pd.DataFrame:
+    """Junta tabelas do BLOCO 1 calculadas por partes (cada CAPA/RM numa só parte) na ordem do cálculo inteiro."""
+    partes = [p for p in partes if len(p)]
+    if not partes:
+        return pd.DataFrame()
+    return pd.concat(partes, ignore_index=True).sort_values(coluna, kind='stable').reset_index(drop=True)
+
+
+def rms_sem_mapa(indice, capa) -> list:
+    # RMs da CAPA cujas linhas não têm MAPA (as demais seguem outro fluxo)
+    return [rm for rm in indice.capa_rms.get(capa, []) if not indice.rm_tem_mapa.get(rm, False)]
+
+
+def verificar_capas_por_lote(indice, singra_map: dict, lotes_disponiveis: set):
+    """main.py: CAPA completa quando todas as RMs sem MAPA estão no SINGRA e têm todos os lotes na conferência."""
+    capa_completa_rows = []
+    capa_incompleta_rows = []
+    migration_errors = []  # tabela separada para RMs que não existem no SINGRA
+
+    for capa in indice.capas:
+        rms_considered = rms_sem_mapa(indice, capa)
+        if len(rms_considered) == 0:
+            continue
+        cam = indice.capa_cam.get(capa, '')
+        pendencias = []
+
+        for rm in rms_considered:
+            if not singra_map.get(rm):
+                migration_errors.append({
+                    "RM": rm,
+                    "CAPA": capa,
+                    "CAM": cam,
+                    "Erro": "RM não encontra-se em Expedição no SINGRA"
+                })
+                pendencias.append(f"{rm} (Status SINGRA não migrou)")
+                continue
+
+            faltando = [l for l in indice.rm_lotes.get(rm, []) if l not in lotes_disponiveis]
+            if faltando:
+                pendencias.append(f"{rm} – faltando lotes: {', '.join(faltando)}")
+
+        if len(pendencias) == 0:
+            capa_completa_rows.append({"CAM": cam, "CAPA": capa, "RMs": ', '.join(rms_considered)})
+        else:
+            capa_incompleta_rows.append({"CAM": cam, "CAPA": capa, "Pendências": '; '.join(pendencias)})
+
+    return pd.DataFrame(capa_completa_rows), pd.DataFrame(capa_incompleta_rows), pd.DataFrame(migration_errors)
+
+
+def verificar_capas_por_volume(indice, singra_map: dict, presenca):
+    """main2.py: mesma seleção de RMs, mas a conferência é feita por VOLUME e exige a RM 'Em Expedição' no SINGRA."""
+    capa_completa_rows = []
+    capa_incompleta_rows = []
+    migration_errors = []
+
+    for capa in indice.capas:
+        rms_considered = rms_sem_mapa(indice, capa)
+        if len(rms_considered) == 0:
+            continue
+        cam = indice.capa_cam.get(capa, '')
+        pendencias = []
+        all_rms_migrated_in_singra = True
+
+        for rm in rms_considered:
+            singra_info = singra_map.get(rm)
+            rm_migrated = bool(singra_info and singra_indica_em_expedicao(singra_info.get('SITUACAO', '')))
+            if not rm_migrated:
+                all_rms_migrated_in_singra = False
+
+            lotes_do_rm = indice.rm_lotes.get(rm, [])
+            partes = []
+            for lote_key in lotes_do_rm:
+                if lote_key in presenca.sem_volumes:
+                    partes.append(f"{lote_key} (volumes não informados no PWA)")
+                elif lote_key in presenca.faltantes:
+                    partes.append(f"{lote_key} – faltando volumes: {', '.join(presenca.faltantes[lote_key])}")
+            if partes:
+                pendencias.append(f"{rm} – " + '; '.join(partes))
+
+            if not rm_migrated:
+                if all(presenca.completo.get(l, False) for l in lotes_do_rm):
+                    pendencias.append(f"{rm} – Todos os volumes de suas remessas estão na Expedição mas RM não migrou no SINGRA")
+                    migration_errors.append({
+                        "RM": rm,
+                        "CAPA": capa,
+                        "CAM": cam,
+                        "Erro": "Todos volumes na expedição, porém RM não migrou no SINGRA"
+                    })
+                elif any(presenca.algum_presente.get(l, False) for l in lotes_do_rm):
+                    pendencias.append(f"{rm} – Material na Expedição porém RM não consta como Em Expedição no SINGRA")
+                    migration_errors.append({
+                        "RM": rm,
+                        "CAPA": capa,
+                        "CAM": cam,
+                        "Erro": "Material na Expedição porém RM não consta em Expedição no SINGRA"
+                    })
+
+        # CAPA completa somente sem pendências e com todas as RMs migradas
+        if len(pendencias) == 0 and all_rms_migrated_in_singra:
+            capa_completa_rows.append({"CAM": cam, "CAPA": capa, "RMs": ', '.join(rms_considered)})
+        else:
+            capa_incompleta_rows.append({"CAM": cam, "CAPA": capa, "Pendências": '; '.join(pendencias)})
+
+    return pd.DataFrame(capa_completa_rows), pd.DataFrame(capa_incompleta_rows), pd.DataFrame(migration_errors)
+
+
+# ----------------------
+# BLOCO 1 de main3.py: agregados por RM e por CAPA calculados de uma vez (groupby) e
+# categorias escolhidas com seleções vetorizadas, em vez de um laço por grupo.
+# ----------------------
+
+def _juntar_ordenados(chaves: list, valores: pd.Series) -> pd.Series:
+    """Valores distintos de cada grupo, ordenados e juntados com ', ' (índice: as chaves)."""
+    nomes = [f'_K{i}' for i in range(len(chaves))]
+    pares = pd.DataFrame(dict(zip(nomes, chaves), _V=valores)).drop_duplicates()
+    pares = pares.sort_values(nomes + ['_V'])
+    return pares.groupby(nomes, sort=False)['_V'].agg(', '.join)
+
+
+def _tabela_capas(linhas: pd.DataFrame, colunas: dict) -> pd.DataFrame:
+    # linhas sem CAPAs saem sem colunas, como pd.DataFrame([])
+    if linhas.empty:
+        return pd.DataFrame()
+    return linhas[list(colunas.values())].set_axis(list(colunas), axis=1).reset_index(drop=True)
+
+
+def _texto_fora_singra(fora: pd.DataFrame) -> pd.Series:
+    """CAPA -> "- STATUS: RMs" por STATUS (ordenados), a partir de linhas (CAPA, RM, STATUS)."""
+    por_status = _juntar_ordenados([fora['CAPA'], fora['STATUS']], fora['RM']).reset_index()
+    por_status.columns = ['CAPA', 'STATUS', 'RMS']
+    linhas = '- ' + por_status['STATUS'] + ': ' + por_status['RMS']
+    return linhas.groupby(por_status['CAPA'], sort=False).agg('\n'.join)
+
+
+def _partes(*partes: pd.Series, separador: str) -> pd.Series:
+    """Junta as partes não vazias de cada linha com `separador`."""
+    texto = pd.Series('', index=partes[0].index, dtype=object)
+    for parte in partes:
+        parte = parte.fillna('')
+        texto = texto.where(parte == '', texto.where(texto == '', texto + separador) + parte)
+    return texto
+
+
+def _visao_por_rm(df: pd.DataFrame, tem_mapa: pd.Series, mapa: pd.Series, lote: pd.Series, falta: pd.Series,
+                  pedidos_singra: set) -> pd.DataFrame:
+    validas = df['PEDIDO_LIMPO'].notna() & (df['PEDIDO_LIMPO'] != '')
+    rm = df['PEDIDO_LIMPO'][validas]
+    if rm.empty:
+        return pd.DataFrame()
+
+    # primeira linha de cada RM (CAPA, CAM e STATUS dela), RMs em ordem
+    primeiras = df[validas].drop_duplicates('PEDIDO_LIMPO').sort_values('PEDIDO_LIMPO', kind='stable')
+    indice = pd.Index(primeiras['PEDIDO_LIMPO'])
+    status = primeiras['STATUS'].astype(str).str.upper().to_numpy()
+    com_mapa = tem_mapa[validas].groupby(rm, sort=False).any().reindex(indice).to_numpy()
+    com_mapa_txt = mapa[validas].notna()
+    mapas = _juntar_ordenados([rm[com_mapa_txt]], mapa[validas][com_mapa_txt]).reindex(indice).fillna('')
+    falta_rm = falta[validas]
+    faltantes = _juntar_ordenados([rm[falta_rm]], lote[validas][falta_rm]).reindex(indice).fillna('')
+    no_singra = indice.isin(list(pedidos_singra))
+
+    cancelada = status == 'CANCELADO'
+    pronta = (faltantes == '').to_numpy() & no_singra
+    situacao = np.select([cancelada, com_mapa, pronta], ["CANCELADA", "COM MAPA", "PRONTA"], "PENDENTE")
+    erros = _partes(
+        ("Lotes não bipados na exp.: " + faltantes).where(faltantes != '', ''),
+        pd.Series(np.where(no_singra, '', "Não consta 'Em Expedição' no SINGRA"), index=indice),
+        separador=" | ",
+    )
+    detalhe = np.select(
+        [cancelada, com_mapa, pronta],
+        ["Item cancelado no sistema", ("MAPA gerado: " + mapas).to_numpy(), "Apta para gerar MAPA (Em Expedição)"],
+        erros.to_numpy(),
+    )
+    return pd.DataFrame({
+        "RM": indice.to_numpy(), "CAPA": primeiras['CAPA'].astype(str).to_numpy(), "CAM": primeiras['CAM'].astype(str).to_numpy(),
+        "STATUS PWA": status, "SITUAÇÃO": situacao, "DETALHE": detalhe,
+    })
+
+
+_COLUNAS_CAPAS = {
+    'prontas': {"CAPA": 'CAPA', "CAM": 'CAM', "Qtd RM": 'QTD_RM', "RMs (100% Prontas)": 'RMS'},
+    'quebradas_prontas': {"CAPA": 'CAPA', "CAM": 'CAM', "Qtd RM": 'QTD_SEM', "RMs Pendentes (Prontas)": 'RMS_SEM', "Histórico": 'HISTORICO'},
+    'pendentes': {"CAPA": 'CAPA', "CAM": 'CAM', "Qtd RM": 'QTD_RM', "RMs da CAPA": 'RMS', "O que falta?": 'TEXTO'},
+    'quebradas_pendentes': {"CAPA": 'CAPA', "CAM": 'CAM', "Qtd RM": 'QTD_SEM', "RMs s/ MAPA": 'RMS_SEM', "Pendência do Restante": 'TEXTO'},
+    'finalizadas': {"CAPA": 'CAPA', "CAM": 'CAM', "RMs": 'RMS', "MAPAs": 'MAPAS'},
+    'parciais': {"CAPA": 'CAPA', "CAM": 'CAM', "RMs Ativas": 'RMS'},
+}
+
+
+def _visao_por_capa(df: pd.DataFrame, tem_mapa: pd.Series, mapa: pd.Series, lote: pd.Series, falta: pd.Series,
+                    pedidos_singra: set) -> dict:
+    validas = df['CAPA'].notna() & (df['CAPA'] != '')
+    capa = df['CAPA'][validas]
+    status = df['STATUS'][validas].astype(str).str.upper()
+    cancelado = status == 'CANCELADO'
+    # CAM da primeira linha da CAPA (inclusive canceladas); só CAPAs com alguma linha ativa seguem
+    primeiras = df[validas].drop_duplicates('CAPA')
+    cam = pd.Series(primeiras['CAM'].astype(str).to_numpy(), index=primeiras['CAPA'].to_numpy())
+    tem_cancelado = cancelado.groupby(capa, sort=False).any()
+
+    ativas = ~cancelado
+    a = pd.DataFrame({
+        'CAPA': capa[ativas],
+        'RM': df['PEDIDO_LIMPO'][validas][ativas],
+        'RM_NORM': normalizar_codigo_rm_serie(df['PEDIDO_LIMPO'][validas][ativas], remover_bom=True),
+        'STATUS': status[ativas],
+        'TEM_MAPA': tem_mapa[validas][ativas],
+        'MAPA': mapa[validas][ativas],
+        'LOTE': lote[validas][ativas],
+        'FALTA': falta[validas][ativas],
+    })
+    if a.empty:
+        return {nome: pd.DataFrame() for nome in _COLUNAS_CAPAS}
+
+    por_capa = a.groupby('CAPA', sort=True).agg(TOTAL=('TEM_MAPA', 'size'), QTD_COM_MAPA=('TEM_MAPA', 'sum'))
+    c = por_capa.index
+    por_capa['CAM'] = cam.reindex(c).to_numpy()
+    por_capa['TEM_CANCELADO'] = tem_cancelado.reindex(c).to_numpy()
+
+    # RMs (normalizadas) de cada CAPA: com MAPA em alguma linha ativa ou sem MAPA (o "restante")
+    rms = a[a['RM_NORM'] != ''].groupby(['CAPA', 'RM_NORM'], sort=True)['TEM_MAPA'].any().reset_index()
+    rms['FORA_SINGRA'] = ~rms['RM_NORM'].isin(list(pedidos_singra))
+    sem = rms[~rms['TEM_MAPA']]
+    por_capa['RMS'] = _juntar_ordenados([rms['CAPA']], rms['RM_NORM']).reindex(c).fillna('')
+    por_capa['QTD_RM'] = rms.groupby('CAPA', sort=False).size().reindex(c, fill_value=0)
+    por_capa['RMS_COM'] = _juntar_ordenados([rms['CAPA'][rms['TEM_MAPA']]], rms['RM_NORM'][rms['TEM_MAPA']]).reindex(c).fillna('')
+    por_capa['RMS_SEM'] = _juntar_ordenados([sem['CAPA']], sem['RM_NORM']).reindex(c).fillna('')
+    por_capa['QTD_SEM'] = sem.groupby('CAPA', sort=False).size().reindex(c, fill_value=0)
+
+    com_texto = a['MAPA'].notna() & (a['MAPA'] != '')
+    por_capa['MAPAS'] = _juntar_ordenados([a['CAPA'][com_texto]], a['MAPA'][com_texto]).reindex(c).fillna('')
+
+    # linhas do restante: as da CAPA cuja RM (como está no PWA) é uma das RMs sem MAPA
+    restante = pd.MultiIndex.from_arrays([a['CAPA'], a['RM']]).isin(pd.MultiIndex.from_arrays([sem['CAPA'], sem['RM_NORM']]))
+    falta, falta_resto = a['FALTA'], a['FALTA'] & restante
+    por_capa['LOTES'] = _juntar_ordenados([a['CAPA'][falta]], a['LOTE'][falta]).reindex(c).fillna('')
+    por_capa['LOTES_RESTO'] = _juntar_ordenados([a['CAPA'][falta_resto]], a['LOTE'][falta_resto]).reindex(c).fillna('')
+
+    # STATUS da primeira linha ativa de cada RM fora do SINGRA
+    primeiro_status = a.drop_duplicates(['CAPA', 'RM']).set_index(['CAPA', 'RM'])['STATUS']
+    fora = rms[rms['FORA_SINGRA']].rename(columns={'RM_NORM': 'RM'})
+    fora['STATUS'] = primeiro_status.reindex(pd.MultiIndex.from_frame(fora[['CAPA', 'RM']])).to_numpy()
+    fora_resto = fora[~fora['TEM_MAPA']]
+    fora = fora.assign(STATUS=fora['STATUS'].where(fora['STATUS'] != '', "SEM STATUS"))
+    por_capa['FORA'] = _texto_fora_singra(fora).reindex(c).fillna('')
+    por_capa['FORA_RESTO'] = _texto_fora_singra(fora_resto).reindex(c).fillna('')
+
+    finalizada = por_capa['QTD_COM_MAPA'] == por_capa['TOTAL']
+    quebrada = (por_capa['QTD_COM_MAPA'] > 0) & ~finalizada
+    resto_pronto = (por_capa['LOTES_RESTO'] == '') & (por_capa['FORA_RESTO'] == '')
+    toda_pronta = (por_capa['LOTES'] == '') & (por_capa['FORA'] == '')
+    categoria = np.select(
+        [finalizada, quebrada & resto_pronto, quebrada, toda_pronta & por_capa['TEM_CANCELADO'], toda_pronta],
+        ['finalizadas', 'quebradas_prontas', 'quebradas_pendentes', 'parciais', 'prontas'],
+        'pendentes',
+    )
+
+    por_capa['HISTORICO'] = "MAPAs existentes: " + por_capa['MAPAS'] + "\n" + "RMs já com MAPA: " + por_capa['RMS_COM'] + "\n"
+    lotes_resto = ("Lotes Restantes ausentes: " + por_capa['LOTES_RESTO']).where(por_capa['LOTES_RESTO'] != '', '')
+    fora_resto = ("RMs Restantes fora Singra:\n" + por_capa['FORA_RESTO']).where(por_capa['FORA_RESTO'] != '', '')
+    lotes = ("Lotes que não estão na Expedição: " + por_capa['LOTES']).where(por_capa['LOTES'] != '', '')
+    fora = ("RMs fora Singra:\n" + por_capa['FORA']).where(por_capa['FORA'] != '', '')
+    por_capa['TEXTO'] = np.where(
+        quebrada,
+        _partes(por_capa['HISTORICO'], lotes_resto, fora_resto, separador="\n\n"),
+        _partes(lotes, fora, separador="\n\n"),
+    )
+
+    por_capa = por_capa.reset_index()
+    return {nome: _tabela_capas(por_capa[categoria == nome], colunas) for nome, colunas in _COLUNAS_CAPAS.items()}
+
+
+def classificar_capas_estrito(df_pwa: pd.DataFrame, lotes_disponiveis: set, pedidos_singra: set):
+    """main3.py: situação de cada RM e categorias rigorosas de CAPA.
+
+    Retorna (df_rm_visao, capas), onde capas mapeia 'prontas', 'quebradas_prontas', 'pendentes',
+    'quebradas_pendentes', 'finalizadas' e 'parciais' (C/ Cancelamento) para DataFrames.
+    """
+    df = df_pwa[['PEDIDO_LIMPO', 'CAPA', 'CAM', 'STATUS', 'MAPA', 'LOTE']].astype(object).reset_index(drop=True)
+    # por linha: MAPA preenchido (não só espaços), MAPA aparado, LOTE normalizado e se falta na conferência
+    tem_mapa = df['MAPA'].notna() & ~df['MAPA'].astype(str).str.fullmatch(r'\s*')
+    mapa = df['MAPA'].astype(str).str.strip().where(df['MAPA'].notna())
+    lote = normalizar_lote_serie(df['LOTE'], remover_bom=True)
+    falta = (lote != '') & ~lote.isin(list(lotes_disponiveis))
+
+    df_rm_visao = _visao_por_rm(df, tem_mapa, mapa, lote, falta, pedidos_singra)
+    return df_rm_visao, _visao_por_capa(df, tem_mapa, mapa, lote, falta, pedidos_singra)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------
+# BLOCOS 2-5: agrupamentos por CAM a partir do PWA já normalizado, numa única passada.
+# As máscaras (MAPA/STC/STATUS/LOTE confirmado) são calculadas uma vez e compartilhadas;
+# cada coluna agregada é montada a partir dos pares (CAM, chave, valor) distintos,
+# deduplicados sobre códigos inteiros, em vez de um lambda por grupo. Tabelas sem linhas saem como DataFrame vazio;
+# as mensagens e a checagem de colunas ficam no app.
+# ----------------------
+
+COLUNAS_MAPA_SEM_STC = ['MAPA', 'STC', 'STATUS', 'CAM', 'CAPA']
+COLUNAS_STC_NAO_EXPEDIDA = ['STC', 'STATUS', 'CAM', 'MAPA']
+
+
+def lotes_confirmados(df_lotes_user: pd.DataFrame) -> set:
+    return set(df_lotes_user['LOTE'].astype(str).str.strip().unique())
+
+
+def _codificar(serie: pd.Series, aparar: bool = False):
+    # códigos inteiros na ordem alfabética dos valores: ordenar códigos = ordenar textos
+    codigos, valores = pd.factorize(serie, sort=True)
+    if aparar:
+        # strip só nos valores distintos, depois recodifica
+        recodigos, valores = pd.factorize(pd.Series(valores, dtype=object).str.strip(), sort=True)
+        codigos = recodigos[codigos]
+    return codigos, np.asarray(valores, dtype=object)
+
+
+def _juntar(grupo: np.ndarray, n_grupos: int, codigos: np.ndarray, valores: np.ndarray, ignorar_vazios: bool) -> list:
+    # ', '.join(sorted(set(valores))) por grupo, sobre os pares (grupo, valor) distintos
+    if ignorar_vazios and len(valores):
+        vazio = np.searchsorted(valores, '')
+        if vazio < len(valores) and valores[vazio] == '':
+            grupo, codigos = grupo[codigos != vazio], codigos[codigos != vazio]
+    pares = np.unique(grupo.astype(np.int64) * len(valores) + codigos)
+    grupo_par, textos = pares // max(len(valores), 1), valores[pares % max(len(valores), 1)]
+    inicio = np.searchsorted(grupo_par, np.arange(n_grupos + 1))
+    return [', '.join(textos[inicio[g]:inicio[g + 1]]) for g in range(n_grupos)]
+
+
+def _agrupar(linhas: np.ndarray, chaves: dict, colunas: dict) -> pd.DataFrame:
+    """`chaves`: nome -> (códigos, valores); `colunas`: nome -> (códigos, valores, ignorar vazios)."""
+    if len(linhas) == 0:
+        return pd.DataFrame()
+    chave = np.zeros(len(linhas), dtype=np.int64)
+    for codigos, valores in chaves.values():
+        chave = chave * len(valores) + codigos[linhas]
+    # grupos em ordem (CAM, chave), como o groupby
+    _, primeira, grupo = np.unique(chave, return_index=True, return_inverse=True)
+    tabela = {nome: valores[codigos[linhas[primeira]]] for nome, (codigos, valores) in chaves.items()}
+    for nome, (codigos, valores, ignorar_vazios) in colunas.items():
+        tabela[nome] = _juntar(grupo, len(primeira), codigos[linhas], valores, ignorar_vazios)
+    return pd.DataFrame(tabela)
+
+
+def agregar_blocos(df_pwa: pd.DataFrame, lotes_validos: set = None) -> dict:
+    """Tabelas dos BLOCOS 2-5, só as que as colunas do PWA permitem montar
+    (as de LOTE confirmado também exigem `lotes_validos`):
+
+    'mapa_sem_stc'          MAPA sem STC, fora EXPEDIDO, por CAM e MAPA (CAPAs)
+    'mapa_sem_stc_com_lote' idem, só LOTES confirmados na expedição (CAPAs e LOTES)
+    'stc_nao_expedida'      STC fora EXPEDIDO/CANCELADO, por CAM e STC (MAPAs)
+    'stc_com_lote'          idem, só LOTES confirmados na expedição (MAPAs e LOTES)
+    """
+    cols = set(df_pwa.columns)
+    tabelas = {}
+    tem_mapa = set(COLUNAS_MAPA_SEM_STC) <= cols
+    tem_stc = set(COLUNAS_STC_NAO_EXPEDIDA) <= cols
+    if not (tem_mapa or tem_stc):
+        return tabelas
+
+    status = df_pwa['STATUS']
+    stc_vazio = (df_pwa['STC'] == '').to_numpy(dtype=bool)
+    nao_expedido = (status != 'EXPEDIDO').to_numpy(dtype=bool)
+    com_lote = lotes_validos is not None and 'LOTE' in cols
+    if com_lote:
+        lote = _codificar(df_pwa['LOTE'].astype(str), aparar=True)
+        lote_confirmado = pd.Index(lote[1], dtype=object).isin(list(lotes_validos))[lote[0]]
+
+    cam = _codificar(df_pwa['CAM'])
+    mapa = _codificar(df_pwa['MAPA'])
+
+    if tem_mapa:
+        mascara = (df_pwa['MAPA'] != '').to_numpy(dtype=bool) & stc_vazio & nao_expedido
+        capa = _codificar(df_pwa['CAPA'])
+        chaves = {'CAM': cam, 'MAPA': mapa}
+        tabelas['mapa_sem_stc'] = _agrupar(np.flatnonzero(mascara), chaves, {'CAPA': (*capa, False)})
+        if com_lote:
+            tabelas['mapa_sem_stc_com_lote'] = _agrupar(
+                np.flatnonzero(mascara & lote_confirmado), chaves, {'CAPA': (*capa, False), 'LOTE': (*lote, False)}
+            )
+
+    if tem_stc:
+        mascara = ~stc_vazio & nao_expedido & (status != 'CANCELADO').to_numpy(dtype=bool)
+        chaves = {'CAM': cam, 'STC': _codificar(df_pwa['STC'])}
+        tabelas['stc_nao_expedida'] = _agrupar(np.flatnonzero(mascara), chaves, {'MAPA': (*mapa, True)})
+        if com_lote:
+            tabelas['stc_com_lote'] = _agrupar(
+                np.flatnonzero(mascara & lote_confirmado), chaves, {'MAPA': (*mapa, True), 'LOTE': (*lote, False)}
+            )
+    return tabelas
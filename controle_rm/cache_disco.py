@@ -0,0 +1,150 @@
+import functools
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+from controle_rm.compacto import modo_armazenamento
+from controle_rm.leitura import engine_pwa
+from controle_rm.normalizacao import VERSAO_NORMALIZACAO
+
+# ----------------------
+# Cache em disco dos DataFrames normalizados (Parquet), endereçado pelo conteúdo do upload.
+# Compartilhado entre reinícios do servidor e réplicas que montem o mesmo diretório.
+# ----------------------
+
+DIRETORIO_PADRAO = os.path.join(tempfile.gettempdir(), 'controle_rm_cache')
+LIMITE_PADRAO_MB = 2048
+
+
+def diretorio_cache() -> str:
+    return os.environ.get('CONTROLE_RM_CACHE_DIR', DIRETORIO_PADRAO)
+
+
+def limite_cache_bytes() -> int:
+    return int(float(os.environ.get('CONTROLE_RM_CACHE_MAX_MB', LIMITE_PADRAO_MB)) * 1024 * 1024)
+
+
+def ler_bytes(file) -> bytes:
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    if hasattr(file, 'read'):
+        file.seek(0)
+        dados = file.read()
+        file.seek(0)
+        return dados
+    with open(file, 'rb') as f:
+        return f.read()
+
+
+def chave_cache(namespace: str, dados: bytes) -> str:
+    h = hashlib.sha256(f"{namespace}:v{VERSAO_NORMALIZACAO}:".encode('utf-8'))
+    h.update(dados)
+    return h.hexdigest()
+
+
+def _caminho(chave: str) -> str:
+    return os.path.join(diretorio_cache(), f"{chave}.parquet")
+
+
+def ler_cache(chave: str):
+    caminho = _caminho(chave)
+    try:
+        # colunas 'string' (modo arrow) voltam com armazenamento Arrow, não como objetos Python
+        with pd.option_context('mode.string_storage', 'pyarrow'):
+            df = pd.read_parquet(caminho)
+        os.utime(caminho)  # marca uso recente para a política de remoção
+        return df
+    except (OSError, ValueError):
+        return None
+
+
+def gravar_cache(chave: str, df: pd.DataFrame) -> None:
+    diretorio = diretorio_cache()
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, _caminho(chave))  # escrita atômica: outras réplicas nunca leem arquivo parcial
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        remover_excedente()
+    except (OSError, ValueError, TypeError):
+        # cache é só otimização: falha de escrita não impede o carregamento
+        pass
+
+
+def remover_excedente(limite: int = None, manter: str = None) -> None:
+    """Remove os arquivos menos usados até o diretório caber em `limite` bytes (nunca o caminho `manter`)."""
+    limite = limite_cache_bytes() if limite is None else limite
+    diretorio = diretorio_cache()
+    arquivos = []
+    for entrada in os.scandir(diretorio):
+        if entrada.name.endswith('.parquet') and entrada.path != manter:
+            info = entrada.stat()
+            arquivos.append((info.st_mtime, info.st_size, entrada.path))
+    total = sum(tamanho for _, tamanho, _ in arquivos) + (os.path.getsize(manter) if manter else 0)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        try:
+            os.remove(caminho)
+            total -= tamanho
+        except OSError:
+            pass
+
+
+def cache_em_disco(namespace: str):
+    """Decorador para carregadores `f(file) -> DataFrame`: reaproveita o resultado de um upload idêntico.
+
+    A chave é o conteúdo do upload (sem outros argumentos), o modo de armazenamento e o leitor do PWA.
+    """
+    def decorador(carregar):
+        @functools.wraps(carregar)
+        def wrapper(file):
+            dados = ler_bytes(file)
+            # o modo de armazenamento (objeto/categoria/arrow) muda os dtypes gravados e o leitor do PWA,
+            # as células só com espaços (vazias no calamine)
+            chave = chave_cache(f"{namespace}:{modo_armazenamento()}:{engine_pwa()}", dados)
+            df = ler_cache(chave)
+            if df is not None:
+                return df
+            if hasattr(file, 'seek'):
+                file.seek(0)
+            df = carregar(file)
+            gravar_cache(chave, df)
+            return df
+        return wrapper
+    return decorador
+
+
+def arquivo_em_disco(chave: str, file, escrever) -> str:
+    """Caminho do arquivo gravado por `escrever(file, caminho)` para o upload de impressão digital `chave`.
+
+    Gravado só na primeira vez (escrita atômica) e sujeito ao mesmo limite do cache; usado pelo motor
+    DuckDB, que consulta o arquivo em disco sem carregar o upload num DataFrame.
+    """
+    caminho = _caminho(f"{chave}.bruto")
+    try:
+        os.utime(caminho)
+        return caminho
+    except OSError:
+        pass
+    diretorio = diretorio_cache()
+    os.makedirs(diretorio, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    os.close(fd)
+    try:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        escrever(file, tmp)
+        os.replace(tmp, caminho)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    remover_excedente(manter=caminho)
+    return caminho
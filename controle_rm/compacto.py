@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ----------------------
+# Armazenamento compacto dos DataFrames carregados (CONTROLE_RM_ARMAZENAMENTO):
+#   'objeto'    texto como objetos Python (padrão, comportamento original)
+#   'categoria' colunas repetitivas (RM, CAPA, CAM, LOTE, VOLUME, STATUS...) como Categorical:
+#               cada valor distinto guardado uma vez e as linhas como códigos inteiros
+#   'arrow'     'categoria' + demais colunas de texto como strings do Arrow
+# ----------------------
+
+MODOS_ARMAZENAMENTO = ('objeto', 'categoria', 'arrow')
+
+COLUNAS_CATEGORICAS_PWA = ['PEDIDO', 'PEDIDO_LIMPO', 'CAPA', 'CAM', 'LOTE', 'STATUS', 'VOLUME']
+COLUNAS_CATEGORICAS_SINGRA = ['ID', 'SITUACAO', 'OMS', 'LISTA_WMS_ID']
+
+
+def modo_armazenamento() -> str:
+    modo = os.environ.get('CONTROLE_RM_ARMAZENAMENTO', 'objeto').strip().lower()
+    return modo if modo in MODOS_ARMAZENAMENTO else 'objeto'
+
+
+def compactar(df: pd.DataFrame, colunas_categoricas: list, modo: str = None) -> pd.DataFrame:
+    modo = modo or modo_armazenamento()
+    if modo == 'objeto':
+        return df
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        if col in colunas_categoricas:
+            df[col] = df[col].astype('category')
+        elif modo == 'arrow':
+            df[col] = df[col].astype('string[pyarrow]')
+    return df
+
+
+def pertence(serie: pd.Series, conjunto) -> np.ndarray:
+    """`serie.isin(conjunto)` testado uma vez por valor distinto e expandido pelos códigos inteiros."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, valores = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, valores = pd.factorize(serie)
+    marcados = pd.Index(valores, dtype=object).isin(list(conjunto))
+    if len(marcados) == 0:
+        return np.zeros(len(serie), dtype=bool)
+    return np.where(codigos >= 0, marcados[codigos], False)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from controle_rm.compacto import pertence
+
+# ============================================================
+# main2.py — ANÁLISE DE LOTE E CAPA COMPLETAMENTE ATENDIDOS
+# Colunar: pares LOTE×VOLUME distintos com a presença marcada por um único isin, LOTE completo
+# por `all` agrupado e CAPA completa pela incidência CAPA×LOTE (pares distintos em códigos
+# inteiros, somados com bincount). As listas de faltantes só são montadas para os LOTES e
+# CAPAS incompletos, que são os exibidos com elas.
+# ============================================================
+
+def _texto(df_pwa: pd.DataFrame, col: str) -> pd.Series:
+    return df_pwa[col].astype(str).str.strip().reset_index(drop=True)
+
+
+def _juntar_ordenados(chave: pd.Series, valores: pd.Series) -> pd.Series:
+    """Chave -> valores ordenados juntados com ', ' (fatias contíguas após ordenar, sem um groupby por grupo)."""
+    pares = pd.DataFrame({'K': chave, 'V': valores}).sort_values(['K', 'V'])
+    if pares.empty:
+        return pd.Series(dtype=object)
+    k, v = pares['K'].to_numpy(), pares['V'].tolist()
+    inicios = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    fins = np.r_[inicios[1:], len(k)]
+    return pd.Series([', '.join(v[i:j]) for i, j in zip(inicios, fins)], index=k[inicios], dtype=object)
+
+
+def _tabela(colunas: dict) -> pd.DataFrame:
+    # sem linhas, sem colunas: como pd.DataFrame([])
+    tabela = pd.DataFrame(colunas)
+    return tabela if len(tabela) else pd.DataFrame()
+
+
+def analisar_lotes_e_capas(df_pwa: pd.DataFrame, volumes_exp: set):
+    """Retorna (df_lotes_completos, df_lotes_incompletos, df_capas_completas, df_capas_incompletas)."""
+    lote = _texto(df_pwa, "LOTE")
+    capa = _texto(df_pwa, "CAPA")
+
+    # LOTES: volumes distintos de cada lote, presentes quando estão na planilha LOTE
+    volumes = pd.DataFrame({"LOTE": lote, "VOLUME": _texto(df_pwa, "VOLUME")}).drop_duplicates()
+    volumes["PRESENTE"] = pertence(volumes["VOLUME"], volumes_exp)
+    por_lote = volumes.groupby("LOTE", sort=True)["PRESENTE"].agg(["size", "all"])
+    completo = por_lote["all"].to_numpy()
+
+    df_lotes_completos = _tabela({
+        "LOTE": por_lote.index[completo],
+        "TOTAL VOLUMES": por_lote["size"].to_numpy()[completo],
+        "STATUS": "COMPLETO",
+    })
+    ausentes = volumes[~volumes["PRESENTE"]]
+    df_lotes_incompletos = _tabela({
+        "LOTE": por_lote.index[~completo],
+        "TOTAL VOLUMES": por_lote["size"].to_numpy()[~completo],
+        "VOLUMES FALTANTES": _juntar_ordenados(ausentes["LOTE"], ausentes["VOLUME"]).reindex(por_lote.index[~completo]).to_numpy(),
+        "STATUS": "INCOMPLETO",
+    })
+
+    # CAPAS: incidência CAPA×LOTE; completa quando nenhum dos seus lotes está incompleto
+    incidencia = pd.DataFrame({"CAPA": capa, "LOTE": lote}).drop_duplicates()
+    codigo_capa, capas = pd.factorize(incidencia["CAPA"], sort=True)
+    codigo_lote = por_lote.index.get_indexer(incidencia["LOTE"])
+    lote_incompleto = ~completo[codigo_lote]
+    total_lotes = np.bincount(codigo_capa, minlength=len(capas))
+    nao_atendidos = np.bincount(codigo_capa, weights=lote_incompleto, minlength=len(capas)) > 0
+
+    df_capas_completas = _tabela({
+        "CAPA": capas[~nao_atendidos],
+        "TOTAL LOTES": total_lotes[~nao_atendidos],
+        "STATUS": "COMPLETA",
+    })
+    pendentes = incidencia[lote_incompleto]
+    df_capas_incompletas = _tabela({
+        "CAPA": capas[nao_atendidos],
+        "TOTAL LOTES": total_lotes[nao_atendidos],
+        "LOTES NÃO ATENDIDOS": _juntar_ordenados(pendentes["CAPA"], pendentes["LOTE"]).reindex(capas[nao_atendidos]).to_numpy(),
+        "STATUS": "INCOMPLETA",
+    })
+    return df_lotes_completos, df_lotes_incompletos, df_capas_completas, df_capas_incompletas
@@ -0,0 +1,105 @@
+import threading
+
+import pandas as pd
+
+from controle_rm.blocos import agregar_blocos, lotes_confirmados
+from controle_rm.indices import construir_indice_pwa, construir_presenca_volumes, construir_singra_map
+from controle_rm.motor_sql import agregar_blocos_sql, construir_singra_map_sql
+from controle_rm.normalizacao import normalizar_lote_serie
+from controle_rm.preparo import preparar_conferencia, preparar_pwa, preparar_singra
+
+# ----------------------
+# Base da conciliação: SINGRA, PWA e conferência lidos uma vez (texto, sem normalizar) e tudo o
+# que as verificações do BLOCO 1 usam derivado daqui sob demanda, uma vez por base: as fontes
+# normalizadas de cada variante (controle_rm.preparo), o índice do PWA, o mapa do SINGRA, os
+# conjuntos da conferência e o resultado de cada estratégia (controle_rm.estrategias).
+# 'lote' e 'volume' leem as mesmas colunas normalizadas do PWA e do SINGRA: dividem as fontes,
+# o índice e o mapa.
+# ----------------------
+
+# variante de preparo de cada fonte por estratégia
+_VARIANTE_PWA = {'lote': 'volume', 'volume': 'volume', 'estrito': 'estrito'}
+_VARIANTE_SINGRA = {'lote': 'lote', 'volume': 'lote', 'estrito': 'estrito'}
+
+
+class BaseConciliacao:
+    """Fontes de uma execução e os derivados já calculados, compartilhados pelas estratégias."""
+
+    def __init__(self, df_singra: pd.DataFrame, df_pwa: pd.DataFrame, df_conferencia: pd.DataFrame, motor: str = 'pandas'):
+        self.singra_bruto = df_singra
+        self.pwa_bruto = df_pwa
+        self.conferencia_bruta = df_conferencia
+        self.motor = motor
+        self._derivados = {}
+        # reentrante: um derivado pode pedir outro (ex.: o índice pede o PWA normalizado)
+        self._trava = threading.RLock()
+
+    def derivado(self, chave, construir):
+        """construir() na primeira vez que `chave` é pedida; depois, o mesmo objeto."""
+        with self._trava:
+            if chave not in self._derivados:
+                self._derivados[chave] = construir()
+            return self._derivados[chave]
+
+    # ----------------------
+    # Fontes normalizadas
+    # ----------------------
+    def singra(self, variante: str = 'lote') -> pd.DataFrame:
+        variante = _VARIANTE_SINGRA[variante]
+        return self.derivado(('singra', variante), lambda: preparar_singra(self.singra_bruto, variante))
+
+    def pwa(self, variante: str = 'lote') -> pd.DataFrame:
+        variante = _VARIANTE_PWA[variante]
+        return self.derivado(('pwa', variante), lambda: preparar_pwa(self.pwa_bruto, variante))
+
+    def conferencia(self, variante: str = 'lote') -> pd.DataFrame:
+        return self.derivado(('conferencia', variante), lambda: preparar_conferencia(self.conferencia_bruta, variante))
+
+    # ----------------------
+    # Índices e conjuntos
+    # ----------------------
+    def indice_pwa(self):
+        return self.derivado('indice_pwa', lambda: construir_indice_pwa(self.pwa('lote')))
+
+    def singra_map(self) -> dict:
+        construir = construir_singra_map_sql if self.motor == 'duckdb' else construir_singra_map
+        return self.derivado('singra_map', lambda: construir(self.singra('lote')))
+
+    def lotes_conferidos(self, variante: str = 'lote') -> set:
+        """LOTEs da conferência como cada app os compara (em 'volume', os números de VOLUME)."""
+        def construir():
+            df = self.conferencia(variante)
+            if 'LOTE' not in df.columns:
+                return set()
+            if variante == 'estrito':
+                lotes = set(normalizar_lote_serie(df['LOTE'], remover_bom=True))
+                # lotes vazios dariam falso positivo
+                lotes.discard('')
+                return lotes
+            if variante == 'volume':
+                return set(df['LOTE'].astype(str).str.strip().tolist())
+            return set(df['LOTE'].astype(str).tolist())
+        return self.derivado(('lotes_conferidos', variante), construir)
+
+    def presenca_volumes(self):
+        return self.derivado('presenca_volumes',
+                             lambda: construir_presenca_volumes(self.pwa('volume'), self.lotes_conferidos('volume')))
+
+    def pedidos_singra(self) -> set:
+        def construir():
+            df = self.singra('estrito')
+            pedidos = set(df['ID'].dropna().tolist()) if 'ID' in df.columns else set()
+            pedidos.discard('')
+            return pedidos
+        return self.derivado('pedidos_singra', construir)
+
+    # ----------------------
+    # BLOCOS 2-5 (iguais para todas as estratégias)
+    # ----------------------
+    def blocos_2a5(self) -> dict:
+        def construir():
+            conferencia = self.conferencia('lote')
+            lotes_validos = lotes_confirmados(conferencia) if 'LOTE' in conferencia.columns else None
+            agregar = agregar_blocos_sql if self.motor == 'duckdb' else agregar_blocos
+            return agregar(self.pwa('lote'), lotes_validos)
+        return self.derivado('blocos_2a5', construir)
@@ -0,0 +1,190 @@
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from controle_rm.cache_disco import diretorio_cache
+
+# ----------------------
+# Planilha de conferência (Google Sheets): sincronização incremental.
+# Durante o turno a planilha só cresce; guardamos localmente as linhas já lidas e
+# buscamos apenas o intervalo a partir da última linha conhecida.
+# ----------------------
+
+RECARGA_TOTAL_S = 3600  # releitura completa periódica (edições no meio da planilha)
+
+ESCOPOS_GOOGLE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+
+class PlanilhaGoogle:
+    """Backend real: primeira aba da planilha, via gspread."""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    @classmethod
+    def de_credenciais(cls, credentials_dict: dict, sheet_url: str):
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, ESCOPOS_GOOGLE)
+        client = gspread.authorize(creds)
+        return cls(client.open_by_url(sheet_url).get_worksheet(0))
+
+    def todas_linhas(self) -> list:
+        return [list(l) for l in self.worksheet.get()]
+
+    def linhas_a_partir(self, inicio: int) -> list:
+        from gspread.utils import rowcol_to_a1
+
+        ultima_coluna = rowcol_to_a1(1, max(self.worksheet.col_count, 1)).rstrip('0123456789')
+        return [list(l) for l in self.worksheet.get(f"A{inicio}:{ultima_coluna}")]
+
+
+class PlanilhaMemoria:
+    """Backend local (testes e desenvolvimento): linhas mantidas em memória, cabeçalho na primeira."""
+
+    def __init__(self, linhas: list = None):
+        self.linhas = [list(l) for l in (linhas or [])]
+        self.celulas_lidas = 0
+
+    def acrescentar(self, *linhas):
+        self.linhas.extend(list(l) for l in linhas)
+
+    def _ler(self, linhas: list) -> list:
+        # como a API do Sheets: omite células vazias no fim da linha e linhas vazias no fim
+        aparadas = [_aparar(l) for l in linhas]
+        while aparadas and not aparadas[-1]:
+            aparadas.pop()
+        self.celulas_lidas += sum(len(l) for l in aparadas)
+        return aparadas
+
+    def todas_linhas(self) -> list:
+        return self._ler(self.linhas)
+
+    def linhas_a_partir(self, inicio: int) -> list:
+        return self._ler(self.linhas[inicio - 1:])
+
+
+def _aparar(linha: list) -> list:
+    linha = ['' if v is None else str(v) for v in linha]
+    while linha and linha[-1] == '':
+        linha.pop()
+    return linha
+
+
+def diretorio_conferencia(sheet_url: str) -> str:
+    chave = hashlib.sha256(sheet_url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(diretorio_cache(), 'conferencia', chave)
+
+
+@contextlib.contextmanager
+def _trava(diretorio: str):
+    # evita que duas sessões/processos acrescentem as mesmas linhas ao snapshot
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(os.path.join(diretorio, '.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _ler_snapshot(diretorio: str) -> list:
+    caminho = os.path.join(diretorio, 'linhas.jsonl')
+    try:
+        with open(caminho, 'rb') as f:
+            dados = f.read()
+    except OSError:
+        return []
+    linhas, fim = [], 0
+    while True:
+        quebra = dados.find(b'\n', fim)
+        if quebra < 0:
+            break
+        try:
+            linhas.append(json.loads(dados[fim:quebra].decode('utf-8')))
+        except ValueError:
+            break
+        fim = quebra + 1
+    if fim < len(dados):
+        # escrita interrompida: descarta a linha parcial e o que vier depois, também no arquivo,
+        # para que as próximas linhas acrescentadas não fiquem coladas nela
+        with open(caminho, 'r+b') as f:
+            f.truncate(fim)
+    return linhas
+
+
+def _ultima_recarga_total(diretorio: str) -> float:
+    try:
+        with open(os.path.join(diretorio, 'estado.json'), encoding='utf-8') as f:
+            return float(json.load(f).get('recarga_total', 0))
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _reescrever_snapshot(diretorio: str, linhas: list) -> None:
+    fd, tmp = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for linha in linhas:
+            f.write(json.dumps(linha, ensure_ascii=False) + '\n')
+    os.replace(tmp, os.path.join(diretorio, 'linhas.jsonl'))
+    with open(os.path.join(diretorio, 'estado.json'), 'w', encoding='utf-8') as f:
+        json.dump({'recarga_total': time.time(), 'linhas': len(linhas)}, f)
+
+
+def _acrescentar_snapshot(diretorio: str, linhas: list) -> None:
+    if not linhas:
+        return
+    with open(os.path.join(diretorio, 'linhas.jsonl'), 'a', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(linha, ensure_ascii=False) + '\n' for linha in linhas))
+
+
+def sincronizar_linhas(backend, diretorio: str, recarga_total_a_cada: float = RECARGA_TOTAL_S) -> list:
+    """Atualiza o snapshot local com as linhas novas do backend e devolve todas as linhas (cabeçalho incluído).
+
+    A última linha conhecida é relida junto com as novas: se ela mudou (linhas apagadas ou
+    editadas no fim), ou se a última releitura completa é mais antiga que `recarga_total_a_cada`
+    segundos, a planilha inteira é baixada de novo.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    with _trava(diretorio):
+        linhas = _ler_snapshot(diretorio)
+        expirado = time.time() - _ultima_recarga_total(diretorio) > recarga_total_a_cada
+        if linhas and not expirado:
+            novas = [_aparar(l) for l in backend.linhas_a_partir(len(linhas))]
+            if novas and novas[0] == linhas[-1]:
+                _acrescentar_snapshot(diretorio, novas[1:])
+                return linhas + novas[1:]
+        linhas = [_aparar(l) for l in backend.todas_linhas()]
+        _reescrever_snapshot(diretorio, linhas)
+        return linhas
+
+
+def registros_conferencia(linhas: list) -> pd.DataFrame:
+    """Mesmo DataFrame que pd.DataFrame(worksheet.get_all_records())."""
+    from gspread.utils import numericise_all, to_records
+
+    if not linhas or linhas == [[]]:
+        return pd.DataFrame([])
+    largura = max(len(l) for l in linhas)
+    completas = [l + [''] * (largura - len(l)) for l in linhas]
+    valores = [numericise_all(l, empty2zero=False, default_blank='') for l in completas[1:]]
+    return pd.DataFrame(to_records(completas[0], valores))
+
+
+def ler_conferencia(backend) -> pd.DataFrame:
+    """Planilha inteira, sem o snapshot local (releitura completa)."""
+    return registros_conferencia(backend.todas_linhas())
+
+
+def sincronizar_conferencia(backend, diretorio: str, recarga_total_a_cada: float = RECARGA_TOTAL_S) -> pd.DataFrame:
+    return registros_conferencia(sincronizar_linhas(backend, diretorio, recarga_total_a_cada))
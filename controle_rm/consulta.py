@@ -0,0 +1,55 @@
+import re
+
+import pandas as pd
+
+# ----------------------
+# Consulta rápida de RMs: extração do texto colado / lista enviada e busca em lote
+# na tabela RM -> MAPA/STC/STATUS (indices.construir_tabela_rms).
+# ----------------------
+
+# 8 dígitos no formato 2-3-3, com o mesmo separador (ponto, hífen, espaço) ou sem separador:
+# 12.345.678 | 12-345-678 | 12 345 678 | 12345678
+# (sem pegar pedaço de número maior, como 1.12.345.678 ou 12.345.678.9)
+PADRAO_RM = re.compile(r"(?<!\w)(?<![0-9][.\-])[0-9]{2}([.\- ]?)[0-9]{3}\1[0-9]{3}(?!\w)(?![.\-][0-9])")
+
+COLUNAS_CONSULTA = ["RM (texto)", "RM (planilha)", "STATUS (PWA)", "MAPA", "STC"]
+
+
+def extrair_rms(texto: str) -> pd.DataFrame:
+    """Uma linha por ocorrência, na ordem do texto: RM como escrita e RM só com dígitos."""
+    rms_texto = [m.group(0) for m in PADRAO_RM.finditer(texto)]
+    rms = pd.Series(rms_texto, dtype=object)
+    return pd.DataFrame({
+        "RM (texto)": rms,
+        "RM (planilha)": rms.str.replace(r"[^0-9]", "", regex=True),
+    })
+
+
+def texto_de_arquivo(file) -> str:
+    """Conteúdo de uma lista de RMs enviada (.txt / .csv / .xlsx) como texto único."""
+    nome = getattr(file, 'name', '').lower()
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    if nome.endswith('.xlsx'):
+        planilhas = pd.read_excel(file, sheet_name=None, header=None, dtype=str)
+        return "\n".join(
+            " ".join(linha) for df in planilhas.values()
+            for linha in df.fillna('').itertuples(index=False, name=None)
+        )
+    dados = file.read() if hasattr(file, 'read') else open(file, 'rb').read()
+    if isinstance(dados, str):
+        return dados
+    try:
+        return dados.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return dados.decode('latin1')
+
+
+def consultar_rms(rms: pd.DataFrame, tabela_rms: pd.DataFrame) -> pd.DataFrame:
+    """Junta as RMs extraídas com a tabela do PWA; RMs ausentes ficam como "Não consta"."""
+    resultado = rms.merge(
+        tabela_rms.rename(columns={'STATUS': 'STATUS (PWA)'}),
+        how='left', left_on="RM (planilha)", right_index=True,
+    )
+    resultado = resultado.fillna({"MAPA": "Não consta", "STC": "Não consta", "STATUS (PWA)": ""})
+    return resultado[COLUNAS_CONSULTA].reset_index(drop=True)
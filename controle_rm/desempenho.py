@@ -0,0 +1,114 @@
+import importlib.util
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# ----------------------
+# Medição opcional das etapas (carregamento, mapas, BLOCOS, telas, exportação):
+# tempo de relógio, linhas e variação de memória do processo (RSS) por etapa,
+# mostradas no painel "Desempenho" e acrescentadas a um log JSON (uma linha por etapa).
+#   CONTROLE_RM_DESEMPENHO=1         liga a medição por padrão
+#   CONTROLE_RM_DESEMPENHO_LOG=...   arquivo do log (padrão: controle_rm_desempenho.jsonl no diretório temporário)
+# ----------------------
+
+LOG_PADRAO = os.path.join(tempfile.gettempdir(), 'controle_rm_desempenho.jsonl')
+
+
+def desempenho_ativo() -> bool:
+    return os.environ.get('CONTROLE_RM_DESEMPENHO', '').strip().lower() in ('1', 'true', 'sim', 'on')
+
+
+def arquivo_log_desempenho() -> str:
+    return os.environ.get('CONTROLE_RM_DESEMPENHO_LOG', LOG_PADRAO)
+
+
+def memoria_rss_mb():
+    """Memória residente do processo em MB (psutil quando instalado, /proc no Linux); None se indisponível."""
+    if importlib.util.find_spec('psutil') is not None:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _contar_linhas(resultado, args: tuple):
+    # linhas produzidas (DataFrame, tupla/dict de DataFrames, mapa/conjunto);
+    # sem resultado (telas), as linhas da primeira tabela recebida
+    if isinstance(resultado, pd.DataFrame):
+        return len(resultado)
+    if isinstance(resultado, (tuple, list)) and resultado and all(isinstance(r, pd.DataFrame) for r in resultado):
+        return sum(len(r) for r in resultado)
+    if isinstance(resultado, dict) and resultado and all(isinstance(r, pd.DataFrame) for r in resultado.values()):
+        return sum(len(r) for r in resultado.values())
+    if isinstance(resultado, (dict, set)):
+        return len(resultado)
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            return len(arg)
+    return None
+
+
+class Medidor:
+    """Medidas das etapas de uma execução do app; inativo, só executa as etapas."""
+
+    def __init__(self, app: str, ativo: bool = True):
+        self.app = app
+        self.ativo = ativo
+        self.execucao = uuid.uuid4().hex[:12]
+        self.medidas = []
+        self._gravadas = 0
+
+    @contextmanager
+    def etapa(self, nome: str, linhas: int = None):
+        medida = {'etapa': nome, 'linhas': linhas}
+        if not self.ativo:
+            yield medida
+            return
+        memoria_antes = memoria_rss_mb()
+        inicio = time.perf_counter()
+        try:
+            yield medida
+        finally:
+            medida['segundos'] = time.perf_counter() - inicio
+            memoria_depois = memoria_rss_mb()
+            medida['memoria_mb'] = None if memoria_antes is None else memoria_depois - memoria_antes
+            medida['momento'] = datetime.now().isoformat(timespec='seconds')
+            self.medidas.append(medida)
+
+    def medir(self, nome: str, funcao, *args, linhas: int = None, **kwargs):
+        """`funcao(*args, **kwargs)` medida como a etapa `nome`; as linhas saem do resultado quando não informadas."""
+        with self.etapa(nome, linhas) as medida:
+            resultado = funcao(*args, **kwargs)
+            if medida['linhas'] is None:
+                medida['linhas'] = _contar_linhas(resultado, args)
+        return resultado
+
+    def tabela(self) -> pd.DataFrame:
+        colunas = ['etapa', 'segundos', 'linhas', 'memoria_mb']
+        df = pd.DataFrame(self.medidas, columns=colunas)
+        return df.rename(columns={'etapa': 'ETAPA', 'segundos': 'SEGUNDOS', 'linhas': 'LINHAS', 'memoria_mb': 'MEMÓRIA (MB)'})
+
+    def gravar_log(self, caminho: str = None) -> bool:
+        """Acrescenta ao log as medidas ainda não gravadas; False se o arquivo não pôde ser escrito."""
+        pendentes = self.medidas[self._gravadas:]
+        if not self.ativo or not pendentes:
+            return True
+        caminho = caminho or arquivo_log_desempenho()
+        try:
+            os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+            with open(caminho, 'a', encoding='utf-8') as f:
+                for medida in pendentes:
+                    f.write(json.dumps({'app': self.app, 'execucao': self.execucao, **medida}, ensure_ascii=False) + '\n')
+        except OSError:
+            return False
+        self._gravadas = len(self.medidas)
+        return True
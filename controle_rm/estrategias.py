@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+
+from controle_rm.historico import SITUACOES_CAPAS_MAIN3
+from controle_rm.motor_sql import classificar_capas_estrito_sql
+from controle_rm.paralelo import (classificar_capas_estrito_paralelo, verificar_capas_por_lote_paralelo,
+                                  verificar_capas_por_volume_paralelo)
+
+# ----------------------
+# Estratégias do BLOCO 1 sobre uma BaseConciliacao (controle_rm.conciliacao): a verificação
+# por LOTE (main.py), por VOLUME (main2.py) e a estrita (main3.py), com as mesmas tabelas de
+# cada app. Cada uma declara a situação da CAPA em cada tabela, o que permite comparar os
+# veredictos lado a lado. Uma estratégia nova entra com registrar_estrategia.
+# ----------------------
+
+COLUNAS_PWA_LOTE = ['PEDIDO_LIMPO', 'LOTE', 'CAPA', 'CAM', 'STATUS']
+COLUNAS_PWA_ESTRITO = COLUNAS_PWA_LOTE + ['MAPA']
+
+
+@dataclass(frozen=True)
+class Estrategia:
+    nome: str
+    titulo: str
+    verificar: Callable       # (base, processos) -> {tabela: DataFrame}
+    tabelas: dict             # tabela -> título na tela, na ordem de exibição
+    situacoes: dict           # tabela de CAPAs -> situação das CAPAs nela
+    atendidas: frozenset      # situações em que a CAPA está atendida
+
+
+ESTRATEGIAS = {}
+
+
+def registrar_estrategia(estrategia: Estrategia) -> Estrategia:
+    ESTRATEGIAS[estrategia.nome] = estrategia
+    return estrategia
+
+
+def _exigir_colunas(df_pwa: pd.DataFrame, colunas: list) -> None:
+    faltando = [c for c in colunas if c not in df_pwa.columns]
+    if faltando:
+        raise ValueError(f"Colunas essenciais faltando no PWA: {', '.join(faltando)}")
+
+
+def executar_estrategia(base, nome: str, processos: int = 1) -> dict:
+    """Tabelas da estratégia `nome`, calculadas uma vez por base e número de processos."""
+    return base.derivado(('estrategia', nome, processos), lambda: ESTRATEGIAS[nome].verificar(base, processos))
+
+
+# ----------------------
+# Por LOTE (main.py) e por VOLUME (main2.py): somente RMs sem MAPA
+# ----------------------
+_TABELAS_CAPAS = {
+    'completas': "✅ CAPAs completamente atendidas",
+    'incompletas': "⚠️ CAPAs parcialmente atendidas",
+    'fora_singra': "🚨 RMs do PWA que não constam no SINGRA (migração)",
+}
+_SITUACOES_CAPAS = {'completas': 'ATENDIDA', 'incompletas': 'PENDENTE'}
+
+
+def _verificar_por_lote(base, processos: int) -> dict:
+    _exigir_colunas(base.pwa('lote'), COLUNAS_PWA_LOTE)
+    tabelas = verificar_capas_por_lote_paralelo(base.indice_pwa(), base.singra_map(), base.lotes_conferidos('lote'), processos)
+    return dict(zip(_TABELAS_CAPAS, tabelas))
+
+
+def _verificar_por_volume(base, processos: int) -> dict:
+    _exigir_colunas(base.pwa('volume'), COLUNAS_PWA_LOTE + ['VOLUME'])
+    tabelas = verificar_capas_por_volume_paralelo(base.indice_pwa(), base.singra_map(), base.presenca_volumes(), processos)
+    return dict(zip(_TABELAS_CAPAS, tabelas))
+
+
+registrar_estrategia(Estrategia(
+    'lote', "Por LOTE (main.py)", _verificar_por_lote, _TABELAS_CAPAS, _SITUACOES_CAPAS, frozenset(['ATENDIDA'])
+))
+registrar_estrategia(Estrategia(
+    'volume', "Por VOLUME (main2.py)", _verificar_por_volume, _TABELAS_CAPAS, _SITUACOES_CAPAS, frozenset(['ATENDIDA'])
+))
+
+
+# ----------------------
+# Estrita (main3.py): situação de cada RM e categorias rigorosas de CAPA
+# ----------------------
+_TABELAS_ESTRITO = {
+    'prontas': "✅ Prontas",
+    'quebradas_prontas': "🧩 Quebradas Prontas",
+    'pendentes': "⚠️ Pendentes",
+    'quebradas_pendentes': "🧩 Quebradas Pendentes",
+    'finalizadas': "🏁 Finalizadas",
+    'parciais': "🔶 C/ Cancelamento",
+    'visao_rm': "📄 Visão por RM",
+}
+
+
+def _verificar_estrito(base, processos: int) -> dict:
+    df_pwa = base.pwa('estrito')
+    _exigir_colunas(df_pwa, COLUNAS_PWA_ESTRITO)
+    if base.motor == 'duckdb':
+        df_rm_visao, capas = classificar_capas_estrito_sql(df_pwa, base.lotes_conferidos('estrito'), base.pedidos_singra())
+    else:
+        df_rm_visao, capas = classificar_capas_estrito_paralelo(
+            df_pwa, base.lotes_conferidos('estrito'), base.pedidos_singra(), processos
+        )
+    return {**{nome: capas[nome] for nome in SITUACOES_CAPAS_MAIN3}, 'visao_rm': df_rm_visao}
+
+
+registrar_estrategia(Estrategia(
+    'estrito', "Estrita (main3.py)", _verificar_estrito, _TABELAS_ESTRITO, SITUACOES_CAPAS_MAIN3,
+    frozenset([SITUACOES_CAPAS_MAIN3['prontas'], SITUACOES_CAPAS_MAIN3['quebradas_prontas']])
+))
+
+
+# ----------------------
+# Veredictos lado a lado
+# ----------------------
+def situacao_das_capas(estrategia: Estrategia, tabelas: dict) -> pd.DataFrame:
+    """CAPA (índice) -> CAM e SITUACAO segundo `estrategia`."""
+    partes = [
+        tabelas[nome][['CAPA', 'CAM']].assign(SITUACAO=situacao)
+        for nome, situacao in estrategia.situacoes.items()
+        if not tabelas[nome].empty
+    ]
+    if not partes:
+        return pd.DataFrame({'CAM': pd.Series(dtype=object), 'SITUACAO': pd.Series(dtype=object)},
+                            index=pd.Index([], dtype=object, name='CAPA'))
+    situacoes = pd.concat(partes, ignore_index=True).astype({'CAPA': str, 'CAM': str})
+    return situacoes.drop_duplicates('CAPA').set_index('CAPA')
+
+
+def lado_a_lado(resultados: dict) -> pd.DataFrame:
+    """Uma linha por CAPA com a situação em cada estratégia (nome -> tabelas em `resultados`).
+
+    '' quando a estratégia não avalia a CAPA; DIVERGENTE quando umas a dão como atendida e outras não.
+    """
+    situacoes, atendidas, cams = {}, {}, []
+    for nome, tabelas in resultados.items():
+        estrategia = ESTRATEGIAS[nome]
+        por_capa = situacao_das_capas(estrategia, tabelas)
+        situacoes[estrategia.titulo] = por_capa['SITUACAO']
+        atendidas[estrategia.titulo] = por_capa['SITUACAO'].isin(estrategia.atendidas)
+        cams.append(por_capa['CAM'])
+    if not situacoes:
+        return pd.DataFrame(columns=['CAPA', 'CAM', 'DIVERGENTE'])
+
+    tabela = pd.DataFrame(situacoes)
+    tabela = tabela.loc[tabela.index.sort_values()]
+    avaliadas = tabela.notna()
+    n_atendidas = pd.DataFrame(atendidas).reindex(tabela.index).eq(True).sum(axis=1)
+    cam = pd.concat(cams)
+    cam = cam[~cam.index.duplicated()].reindex(tabela.index)
+
+    tabela = tabela.fillna('')
+    tabela.insert(0, 'CAM', cam.to_numpy())
+    tabela['DIVERGENTE'] = (n_atendidas > 0) & (n_atendidas < avaliadas.sum(axis=1))
+    return tabela.rename_axis('CAPA').reset_index()
@@ -0,0 +1,29 @@
+import hashlib
+
+import pandas as pd
+import streamlit as st
+
+from controle_rm.cache_disco import chave_cache, ler_bytes
+
+# ----------------------
+# Chaves das etapas em cache: ingestão -> normalização -> índices -> resultados por bloco.
+# Cada etapa recebe a impressão digital das entradas reais e os dados em argumentos com
+# prefixo '_' (que o Streamlit não re-hasheia); assim trocar um filtro não recalcula nada.
+# ----------------------
+
+def impressao_digital(file, namespace: str = 'upload') -> str:
+    """sha256 do conteúdo de um upload, calculado uma vez por arquivo na sessão."""
+    file_id = getattr(file, 'file_id', None)
+    memo = st.session_state.setdefault('_impressoes_digitais', {}) if file_id else {}
+    chave = (namespace, file_id)
+    if chave not in memo:
+        memo[chave] = chave_cache(namespace, ler_bytes(file))
+    return memo[chave]
+
+
+def impressao_digital_df(df: pd.DataFrame) -> str:
+    """sha256 de um DataFrame (valores, índice e nomes das colunas)."""
+    h = hashlib.sha256(repr(list(df.columns)).encode('utf-8'))
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
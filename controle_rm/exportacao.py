@@ -0,0 +1,99 @@
+import io
+import os
+import zipfile
+
+import pandas as pd
+
+from controle_rm.cache_disco import ler_bytes
+
+# ----------------------
+# Exportação dos resultados.
+# Excel: escrito linha a linha no modo constant_memory do xlsxwriter (cada aba vai para
+# um arquivo temporário em vez de ficar inteira na memória).
+# ZIP: os uploads originais são copiados byte a byte, sem re-serializar SINGRA/PWA;
+# as demais tabelas vão em Parquet ou CSV.
+# ----------------------
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_ZIP = "application/zip"
+
+# limites de uma aba do Excel (o cabeçalho ocupa uma linha)
+LIMITE_LINHAS_EXCEL = 1_048_576
+LIMITE_COLUNAS_EXCEL = 16_384
+
+# mesmo estilo de cabeçalho que o pandas aplica em to_excel
+_ESTILO_CABECALHO = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+
+class ExcelGrandeDemais(ValueError):
+    """Alguma tabela não cabe numa aba do Excel."""
+
+
+def _linhas(df: pd.DataFrame):
+    # NaN/None viram célula vazia (como na_rep='' do pandas)
+    valores = df.astype(object).where(df.notna(), None)
+    return valores.itertuples(index=False, name=None)
+
+
+def gerar_excel(tabelas: dict) -> bytes:
+    """Uma aba por item de `tabelas` (nome -> DataFrame), sem índice.
+
+    ExcelGrandeDemais, antes de gravar qualquer aba, se alguma tabela não cabe numa aba do Excel
+    (o xlsxwriter descartaria as linhas excedentes sem erro).
+    """
+    import xlsxwriter
+
+    tabelas = {nome: pd.DataFrame(df) for nome, df in tabelas.items()}
+    grandes = [
+        f"{nome} ({len(df):,} linhas, {len(df.columns)} colunas)" for nome, df in tabelas.items()
+        if len(df) + 1 > LIMITE_LINHAS_EXCEL or len(df.columns) > LIMITE_COLUNAS_EXCEL
+    ]
+    if grandes:
+        raise ExcelGrandeDemais(f"Tabelas grandes demais para o Excel (máximo de {LIMITE_LINHAS_EXCEL:,} linhas e "
+                         f"{LIMITE_COLUNAS_EXCEL:,} colunas por aba): {', '.join(grandes)}")
+
+    out = io.BytesIO()
+    workbook = xlsxwriter.Workbook(out, {'constant_memory': True})
+    cabecalho = workbook.add_format(_ESTILO_CABECALHO)
+    for nome, df in tabelas.items():
+        ws = workbook.add_worksheet(nome)
+        ws.write_row(0, 0, [str(c) for c in df.columns], cabecalho)
+        for i, linha in enumerate(_linhas(df), start=1):
+            ws.write_row(i, 0, linha)
+    workbook.close()
+    return out.getvalue()
+
+
+def _parquet(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    buf = io.BytesIO()
+    try:
+        df.to_parquet(buf, index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # colunas com tipos misturados (ex.: planilha Google com números e textos)
+        buf = io.BytesIO()
+        df.astype({c: str for c in df.columns if df[c].dtype == object}).to_parquet(buf, index=False)
+    return buf.getvalue()
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(sep=';', index=False).encode('utf-8-sig')
+
+
+def gerar_zip(tabelas: dict, originais: dict = None, formato: str = 'parquet') -> bytes:
+    """ZIP com `tabelas` em Parquet/CSV; itens presentes em `originais` (nome -> upload) são copiados sem alteração."""
+    originais = originais or {}
+    serializar, extensao = (_parquet, 'parquet') if formato == 'parquet' else (_csv, 'csv')
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, df in tabelas.items():
+            if nome in originais:
+                file = originais[nome]
+                arquivo = os.path.basename(getattr(file, 'name', '') or nome)
+                # .xlsx já é compactado; o CSV do SINGRA ainda ganha com deflate
+                compressao = zipfile.ZIP_STORED if arquivo.lower().endswith('.xlsx') else zipfile.ZIP_DEFLATED
+                zf.writestr(f"originais/{nome}__{arquivo}", ler_bytes(file), compress_type=compressao)
+            else:
+                zf.writestr(f"{nome}.{extensao}", serializar(pd.DataFrame(df)))
+    return out.getvalue()
@@ -0,0 +1,317 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from typing import Callable, NamedTuple
+
+import pandas as pd
+
+# ----------------------
+# Histórico das execuções em SQLite (arquivo local, sem servidor):
+# cada entrada (PWA, SINGRA, conferência) e cada classificação do BLOCO 1 é gravada
+# uma vez por dia e conteúdo (impressão digital), com índices por RM, CAPA e LOTE,
+# para consultar o passado sem reenviar os arquivos.
+#   CONTROLE_RM_HISTORICO=caminho.sqlite3   arquivo do banco ('0' / 'off' desliga)
+#   CONTROLE_RM_HISTORICO_DIAS=365          envios mais antigos são apagados a cada gravação (0 guarda tudo)
+# ----------------------
+
+# fora do diretório temporário: o histórico sobrevive a reinícios da máquina
+ARQUIVO_PADRAO = os.path.join(os.path.expanduser('~'), '.controle_rm', 'historico.sqlite3')
+DIAS_PADRAO = 90
+RETENCAO_PADRAO_DIAS = 365
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ingestoes (
+    id INTEGER PRIMARY KEY,
+    fonte TEXT NOT NULL,
+    app TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    data TEXT NOT NULL,
+    momento TEXT NOT NULL,
+    linhas INTEGER NOT NULL,
+    UNIQUE (fonte, app, chave, data)
+);
+CREATE INDEX IF NOT EXISTS ingestoes_data ON ingestoes (data);
+
+CREATE TABLE IF NOT EXISTS pwa (
+    ingestao INTEGER NOT NULL REFERENCES ingestoes (id),
+    rm TEXT, capa TEXT, cam TEXT, lote TEXT, volume TEXT, mapa TEXT, stc TEXT, status TEXT
+);
+CREATE INDEX IF NOT EXISTS pwa_rm ON pwa (rm, ingestao);
+CREATE INDEX IF NOT EXISTS pwa_capa ON pwa (capa, ingestao);
+CREATE INDEX IF NOT EXISTS pwa_lote ON pwa (lote, ingestao);
+
+CREATE TABLE IF NOT EXISTS singra (
+    ingestao INTEGER NOT NULL REFERENCES ingestoes (id),
+    rm TEXT, situacao TEXT, oms TEXT, lista_wms_id TEXT
+);
+CREATE INDEX IF NOT EXISTS singra_rm ON singra (rm, ingestao);
+
+CREATE TABLE IF NOT EXISTS conferencia (
+    ingestao INTEGER NOT NULL REFERENCES ingestoes (id),
+    lote TEXT
+);
+CREATE INDEX IF NOT EXISTS conferencia_lote ON conferencia (lote, ingestao);
+
+CREATE TABLE IF NOT EXISTS classificacoes (
+    ingestao INTEGER NOT NULL REFERENCES ingestoes (id),
+    nivel TEXT, rm TEXT, capa TEXT, cam TEXT, situacao TEXT, detalhe TEXT
+);
+CREATE INDEX IF NOT EXISTS classificacoes_rm ON classificacoes (rm, ingestao);
+CREATE INDEX IF NOT EXISTS classificacoes_capa ON classificacoes (capa, ingestao);
+"""
+
+# fonte -> (tabela, coluna do banco -> coluna do DataFrame)
+_FONTES = {
+    'PWA': ('pwa', {'rm': 'PEDIDO_LIMPO', 'capa': 'CAPA', 'cam': 'CAM', 'lote': 'LOTE', 'volume': 'VOLUME',
+                    'mapa': 'MAPA', 'stc': 'STC', 'status': 'STATUS'}),
+    'SINGRA': ('singra', {'rm': 'ID', 'situacao': 'SITUACAO', 'oms': 'OMS', 'lista_wms_id': 'LISTA_WMS_ID'}),
+    'CONFERENCIA': ('conferencia', {'lote': 'LOTE'}),
+    'BLOCO1': ('classificacoes', {'nivel': 'NIVEL', 'rm': 'RM', 'capa': 'CAPA', 'cam': 'CAM',
+                                  'situacao': 'SITUACAO', 'detalhe': 'DETALHE'}),
+}
+
+# (caminho, fonte, app, chave, data) já gravados por este processo: reexecuções do app não abrem o banco
+_REGISTRADAS = set()
+
+COLUNAS_CLASSIFICACAO = ['NIVEL', 'RM', 'CAPA', 'CAM', 'SITUACAO', 'DETALHE']
+
+# tabelas de CAPA do BLOCO 1 de main3.py -> situação gravada
+SITUACOES_CAPAS_MAIN3 = {
+    'prontas': 'PRONTA',
+    'quebradas_prontas': 'QUEBRADA PRONTA',
+    'pendentes': 'PENDENTE',
+    'quebradas_pendentes': 'QUEBRADA PENDENTE',
+    'finalizadas': 'FINALIZADA',
+    'parciais': 'COM CANCELAMENTO',
+}
+
+
+class EmBlocos(NamedTuple):
+    """Entrada grande demais para um DataFrame (motor DuckDB): `linhas` da fonte e
+    `distintas(colunas)`, que gera blocos (DataFrames) sem linhas repetidas nessas colunas."""
+    linhas: int
+    distintas: Callable
+
+
+def arquivo_historico():
+    """Caminho do banco, ou None quando o histórico está desligado."""
+    valor = os.environ.get('CONTROLE_RM_HISTORICO', ARQUIVO_PADRAO).strip()
+    return None if valor.lower() in ('', '0', 'off', 'nao', 'não') else valor
+
+
+def dias_retencao() -> int:
+    """Dias de histórico mantidos no banco; 0 desliga a limpeza."""
+    try:
+        return max(int(os.environ.get('CONTROLE_RM_HISTORICO_DIAS', RETENCAO_PADRAO_DIAS)), 0)
+    except ValueError:
+        return RETENCAO_PADRAO_DIAS
+
+
+def conectar(caminho: str = None) -> sqlite3.Connection:
+    caminho = caminho or arquivo_historico()
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    con = sqlite3.connect(caminho, timeout=30)
+    # WAL: leituras (consultas) não bloqueiam a gravação de outra sessão
+    con.execute('PRAGMA journal_mode=WAL')
+    con.executescript(_ESQUEMA)
+    return con
+
+
+def _texto(df: pd.DataFrame, coluna: str) -> list:
+    if coluna not in df.columns:
+        return [''] * len(df)
+    serie = df[coluna]
+    return serie.astype(object).where(serie.notna(), '').astype(str).tolist()
+
+
+def _gravar(con: sqlite3.Connection, fonte: str, app: str, chave: str, df, agora: datetime) -> bool:
+    tabela, colunas = _FONTES[fonte]
+    cur = con.execute(
+        "INSERT OR IGNORE INTO ingestoes (fonte, app, chave, data, momento, linhas) VALUES (?, ?, ?, ?, ?, 0)",
+        (fonte, app, chave, agora.date().isoformat(), agora.isoformat(timespec='seconds')),
+    )
+    if cur.rowcount == 0:
+        # mesmo conteúdo já gravado hoje (por esta ou outra sessão)
+        return False
+    df = df() if callable(df) else df
+    if isinstance(df, EmBlocos):
+        linhas, blocos = df.linhas, df.distintas(list(colunas.values()))
+    else:
+        linhas, blocos = len(df), [df]
+    con.execute("UPDATE ingestoes SET linhas = ? WHERE id = ?", (linhas, cur.lastrowid))
+    marcadores = ', '.join('?' * (len(colunas) + 1))
+    for bloco in blocos:
+        dados = pd.DataFrame({col: _texto(bloco, origem) for col, origem in colunas.items()}).drop_duplicates()
+        con.executemany(
+            f"INSERT INTO {tabela} (ingestao, {', '.join(colunas)}) VALUES ({marcadores})",
+            ((cur.lastrowid, *linha) for linha in dados.itertuples(index=False, name=None)),
+        )
+    return True
+
+
+def _expurgar(con: sqlite3.Connection, agora: datetime, dias: int) -> int:
+    """Apaga os envios com mais de `dias` dias e as linhas deles; retorna quantos envios saíram."""
+    if dias <= 0:
+        return 0
+    limite = (agora.date() - timedelta(days=dias)).isoformat()
+    # pelo índice por data: as tabelas de linhas só são varridas quando há o que apagar
+    if con.execute("SELECT 1 FROM ingestoes WHERE data < ? LIMIT 1", (limite,)).fetchone() is None:
+        return 0
+    for tabela, _ in _FONTES.values():
+        con.execute(f"DELETE FROM {tabela} WHERE ingestao IN (SELECT id FROM ingestoes WHERE data < ?)", (limite,))
+    return con.execute("DELETE FROM ingestoes WHERE data < ?", (limite,)).rowcount
+
+
+def registrar_execucao(app: str, entradas: dict, caminho: str = None) -> int:
+    """Grava `entradas` (fonte -> (chave, DataFrame, EmBlocos ou função que monta um deles);
+    fontes: PWA, SINGRA, CONFERENCIA, BLOCO1).
+
+    Cada (fonte, app, chave) entra uma vez por dia; retorna quantas foram gravadas agora. Na mesma
+    transação, apaga os envios mais antigos que dias_retencao().
+    """
+    caminho = caminho or arquivo_historico()
+    agora = datetime.now()
+    pendentes = {
+        fonte: (chave, df) for fonte, (chave, df) in entradas.items()
+        if (caminho, fonte, app, chave, agora.date()) not in _REGISTRADAS
+    }
+    if not pendentes:
+        return 0
+    gravadas = 0
+    with closing(conectar(caminho)) as con, con:
+        for fonte, (chave, df) in pendentes.items():
+            gravadas += _gravar(con, fonte, app, chave, df, agora)
+        _expurgar(con, agora, dias_retencao())
+    _REGISTRADAS.update((caminho, fonte, app, chave, agora.date()) for fonte, (chave, _) in pendentes.items())
+    return gravadas
+
+
+# ----------------------
+# Classificação do BLOCO 1 no formato gravado (NIVEL, RM, CAPA, CAM, SITUACAO, DETALHE)
+# ----------------------
+def _detalhe(df: pd.DataFrame) -> pd.Series:
+    # demais colunas da tabela como "coluna: valor | ..."
+    extras = [c for c in df.columns if c not in ('RM', 'CAPA', 'CAM')]
+    if not extras:
+        return pd.Series('', index=df.index)
+    return df[extras].astype(str).apply(lambda linha: ' | '.join(f"{c}: {v}" for c, v in linha.items()), axis=1)
+
+
+def _classificar(df: pd.DataFrame, nivel: str, situacao: str) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=COLUNAS_CLASSIFICACAO)
+    return pd.DataFrame({
+        'NIVEL': nivel,
+        'RM': df['RM'] if 'RM' in df.columns else '',
+        'CAPA': df['CAPA'],
+        'CAM': df['CAM'],
+        'SITUACAO': situacao,
+        'DETALHE': _detalhe(df),
+    }, columns=COLUNAS_CLASSIFICACAO)
+
+
+def classificacao_bloco1(completas: pd.DataFrame, incompletas: pd.DataFrame, erros_migracao: pd.DataFrame) -> pd.DataFrame:
+    """BLOCO 1 de main.py / main2.py: CAPAs atendidas / pendentes e RMs com erro de migração."""
+    return pd.concat([
+        _classificar(completas, 'CAPA', 'ATENDIDA'),
+        _classificar(incompletas, 'CAPA', 'PENDENTE'),
+        _classificar(erros_migracao, 'RM', 'NÃO MIGRADA'),
+    ], ignore_index=True)
+
+
+def classificacao_bloco1_main3(df_rm_visao: pd.DataFrame, capas: dict) -> pd.DataFrame:
+    """BLOCO 1 de main3.py: situação de cada RM e de cada CAPA."""
+    partes = []
+    if not df_rm_visao.empty:
+        partes.append(pd.DataFrame({
+            'NIVEL': 'RM', 'RM': df_rm_visao['RM'], 'CAPA': df_rm_visao['CAPA'], 'CAM': df_rm_visao['CAM'],
+            'SITUACAO': df_rm_visao['SITUAÇÃO'], 'DETALHE': df_rm_visao['DETALHE'],
+        }, columns=COLUNAS_CLASSIFICACAO))
+    for nome, situacao in SITUACOES_CAPAS_MAIN3.items():
+        partes.append(_classificar(capas.get(nome, pd.DataFrame()), 'CAPA', situacao))
+    return pd.concat(partes, ignore_index=True)
+
+
+# ----------------------
+# Consultas (uso dos índices por RM / CAPA / LOTE)
+# ----------------------
+def _consultar(con: sqlite3.Connection, sql: str, parametros: tuple) -> pd.DataFrame:
+    return pd.read_sql_query(sql, con, params=parametros)
+
+
+def historico_rm(rm: str, dias: int = DIAS_PADRAO, caminho: str = None) -> dict:
+    """{'pwa', 'singra', 'classificacao'}: a RM em cada envio dos últimos `dias` dias."""
+    inicio = (date.today() - timedelta(days=dias)).isoformat()
+    with closing(conectar(caminho)) as con:
+        return {
+            'pwa': _consultar(con, """
+                SELECT i.momento, i.app, p.capa, p.cam, p.status, p.mapa, p.stc,
+                       group_concat(DISTINCT p.lote) AS lotes, count(*) AS itens
+                FROM pwa p JOIN ingestoes i ON i.id = p.ingestao
+                WHERE p.rm = ? AND i.data >= ?
+                GROUP BY i.id, p.capa, p.cam, p.status, p.mapa, p.stc
+                ORDER BY i.momento""", (rm, inicio)),
+            'singra': _consultar(con, """
+                SELECT i.momento, i.app, s.situacao, s.oms, group_concat(DISTINCT s.lista_wms_id) AS listas_wms
+                FROM singra s JOIN ingestoes i ON i.id = s.ingestao
+                WHERE s.rm = ? AND i.data >= ?
+                GROUP BY i.id, s.situacao, s.oms
+                ORDER BY i.momento""", (rm, inicio)),
+            'classificacao': _consultar(con, """
+                SELECT i.momento, i.app, c.nivel, c.capa, c.cam, c.situacao, c.detalhe
+                FROM classificacoes c JOIN ingestoes i ON i.id = c.ingestao
+                WHERE c.rm = ? AND i.data >= ?
+                ORDER BY i.momento""", (rm, inicio)),
+        }
+
+
+def historico_capa(capa: str, dias: int = DIAS_PADRAO, caminho: str = None) -> dict:
+    """{'pwa', 'classificacao'}: RMs e STATUS da CAPA e sua classificação no BLOCO 1 em cada envio."""
+    inicio = (date.today() - timedelta(days=dias)).isoformat()
+    with closing(conectar(caminho)) as con:
+        return {
+            'pwa': _consultar(con, """
+                SELECT i.momento, i.app, p.cam, p.status, group_concat(DISTINCT p.rm) AS rms,
+                       group_concat(DISTINCT p.lote) AS lotes, count(*) AS itens
+                FROM pwa p JOIN ingestoes i ON i.id = p.ingestao
+                WHERE p.capa = ? AND i.data >= ?
+                GROUP BY i.id, p.cam, p.status
+                ORDER BY i.momento""", (capa, inicio)),
+            'classificacao': _consultar(con, """
+                SELECT i.momento, i.app, c.nivel, c.rm, c.cam, c.situacao, c.detalhe
+                FROM classificacoes c JOIN ingestoes i ON i.id = c.ingestao
+                WHERE c.capa = ? AND i.data >= ?
+                ORDER BY i.momento, c.nivel, c.rm""", (capa, inicio)),
+        }
+
+
+def historico_lote(lote: str, dias: int = DIAS_PADRAO, caminho: str = None) -> dict:
+    """{'pwa', 'conferencia'}: RMs/volumes do LOTE em cada envio do PWA e quando apareceu na conferência."""
+    inicio = (date.today() - timedelta(days=dias)).isoformat()
+    with closing(conectar(caminho)) as con:
+        return {
+            'pwa': _consultar(con, """
+                SELECT i.momento, i.app, p.capa, p.cam, p.status, group_concat(DISTINCT p.rm) AS rms,
+                       group_concat(DISTINCT p.volume) AS volumes
+                FROM pwa p JOIN ingestoes i ON i.id = p.ingestao
+                WHERE p.lote = ? AND i.data >= ?
+                GROUP BY i.id, p.capa, p.cam, p.status
+                ORDER BY i.momento""", (lote, inicio)),
+            'conferencia': _consultar(con, """
+                SELECT i.momento, i.app
+                FROM conferencia c JOIN ingestoes i ON i.id = c.ingestao
+                WHERE c.lote = ? AND i.data >= ?
+                ORDER BY i.momento""", (lote, inicio)),
+        }
+
+
+def situacao_desde(classificacao: pd.DataFrame):
+    """(situação mais recente, momento do primeiro envio da sequência atual com essa situação) ou None."""
+    if classificacao.empty:
+        return None
+    situacoes = classificacao.groupby('momento', sort=True)['situacao'].agg(lambda s: ', '.join(sorted(set(s))))
+    atual = situacoes.iloc[-1]
+    diferentes = situacoes[situacoes != atual]
+    posteriores = situacoes.index[situacoes.index > diferentes.index[-1]] if len(diferentes) else situacoes.index
+    return atual, posteriores[0]
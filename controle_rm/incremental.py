@@ -0,0 +1,111 @@
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from controle_rm.bloco1 import classificar_capas_estrito, juntar_tabelas
+from controle_rm.normalizacao import normalizar_lote_serie
+
+# ----------------------
+# BLOCO 1 incremental (main3.py): entre uploads consecutivos do PWA, só as RMs e CAPAs
+# alteradas são reclassificadas e trocadas nas tabelas da execução anterior.
+# Cada RM/CAPA tem uma assinatura: soma dos hashes das suas linhas (colunas lidas pelo BLOCO 1)
+# combinados com a posição da linha no grupo, já que a "primeira linha" decide CAM/CAPA/STATUS.
+# Também entram as RMs/CAPAs cujos LOTES mudaram de situação na conferência ou cujas RMs
+# entraram/saíram do SINGRA. O resultado é o mesmo do cálculo completo.
+#   CONTROLE_RM_INCREMENTAL=0   desliga (recalcula tudo a cada upload)
+# ----------------------
+
+COLUNAS_BLOCO1 = ['PEDIDO_LIMPO', 'CAPA', 'CAM', 'STATUS', 'MAPA', 'LOTE']
+# acima desta fração de RMs/CAPAs alteradas o cálculo completo sai mais barato
+FRACAO_MAXIMA = 0.5
+
+_MISTURA = np.uint64(0x9E3779B97F4A7C15)
+
+
+def incremental_ativo() -> bool:
+    return os.environ.get('CONTROLE_RM_INCREMENTAL', '1').strip().lower() not in ('0', 'false', 'nao', 'não', 'off')
+
+
+def _assinaturas(chave: np.ndarray, hashes: np.ndarray) -> pd.Series:
+    posicao = pd.Series(chave).groupby(chave, sort=False).cumcount().to_numpy().astype(np.uint64)
+    with np.errstate(over='ignore'):
+        combinado = pd.util.hash_array(hashes ^ (posicao * _MISTURA))
+    return pd.Series(combinado).groupby(chave, sort=False).sum()
+
+
+def _alteradas(anteriores: pd.Series, atuais: pd.Series) -> set:
+    juntas = pd.concat([anteriores.rename('A'), atuais.rename('B')], axis=1)
+    return set(juntas.index[juntas['A'].ne(juntas['B'])])
+
+
+@dataclass
+class EstadoBloco1:
+    assinaturas_rm: pd.Series
+    assinaturas_capa: pd.Series
+    lotes: frozenset
+    pedidos: frozenset
+    resultado: tuple
+
+
+@dataclass
+class Bloco1Incremental:
+    """Resultado do último BLOCO 1 calculado e assinaturas do PWA que o produziu (um por sessão)."""
+    estado: EstadoBloco1 = None
+    resumo: dict = field(default_factory=dict)  # última execução: 'modo', 'rms', 'capas'
+
+    def classificar(self, df_pwa: pd.DataFrame, lotes_disponiveis: set, pedidos_singra: set,
+                    classificar=classificar_capas_estrito):
+        """Mesmo resultado de `classificar(df_pwa, lotes_disponiveis, pedidos_singra)`."""
+        rm = df_pwa['PEDIDO_LIMPO'].astype(str).to_numpy()
+        capa = df_pwa['CAPA'].astype(str).to_numpy()
+        hashes = pd.util.hash_pandas_object(df_pwa[COLUNAS_BLOCO1], index=False).to_numpy()
+        assinaturas_rm = _assinaturas(rm, hashes)
+        assinaturas_capa = _assinaturas(capa, hashes)
+        lotes, pedidos = frozenset(lotes_disponiveis), frozenset(pedidos_singra)
+
+        anterior = self.estado
+        rms, capas = set(assinaturas_rm.index), set(assinaturas_capa.index)
+        if anterior is not None:
+            rms = _alteradas(anterior.assinaturas_rm, assinaturas_rm)
+            capas = _alteradas(anterior.assinaturas_capa, assinaturas_capa)
+            linhas_afetadas = np.zeros(len(df_pwa), dtype=bool)
+            if lotes != anterior.lotes:
+                lote = normalizar_lote_serie(df_pwa['LOTE'], remover_bom=True)
+                linhas_afetadas |= lote.isin(lotes ^ anterior.lotes).to_numpy()
+            if pedidos != anterior.pedidos:
+                linhas_afetadas |= np.isin(rm, list(pedidos ^ anterior.pedidos))
+            rms.update(rm[linhas_afetadas])
+            capas.update(capa[linhas_afetadas])
+
+        if anterior is None or len(rms) + len(capas) > FRACAO_MAXIMA * (len(assinaturas_rm) + len(assinaturas_capa)):
+            resultado = classificar(df_pwa, lotes_disponiveis, pedidos_singra)
+            self.resumo = {'modo': 'completo', 'rms': len(assinaturas_rm), 'capas': len(assinaturas_capa)}
+        else:
+            resultado = self._corrigir(anterior.resultado, df_pwa, rm, capa, rms, capas,
+                                       lotes_disponiveis, pedidos_singra, classificar)
+            self.resumo = {'modo': 'incremental', 'rms': len(rms), 'capas': len(capas)}
+        self.estado = EstadoBloco1(assinaturas_rm, assinaturas_capa, lotes, pedidos, resultado)
+        return resultado
+
+    @staticmethod
+    def _corrigir(anterior: tuple, df_pwa, rm, capa, rms: set, capas: set, lotes_disponiveis, pedidos_singra, classificar):
+        # todas as linhas das RMs e CAPAs alteradas; do recálculo só valem essas RMs/CAPAs
+        # (as demais que aparecem nele estão incompletas)
+        linhas = np.isin(rm, list(rms)) | np.isin(capa, list(capas))
+        df_rm_novo, capas_novas = classificar(df_pwa[linhas], lotes_disponiveis, pedidos_singra)
+        df_rm_anterior, capas_anteriores = anterior
+
+        def trocar(tabela_anterior, tabela_nova, coluna, chaves):
+            if len(tabela_anterior):
+                tabela_anterior = tabela_anterior[~tabela_anterior[coluna].isin(chaves)]
+            if len(tabela_nova):
+                tabela_nova = tabela_nova[tabela_nova[coluna].isin(chaves)]
+            return juntar_tabelas([tabela_anterior, tabela_nova], coluna)
+
+        df_rm_visao = trocar(df_rm_anterior, df_rm_novo, 'RM', rms)
+        return df_rm_visao, {
+            nome: trocar(capas_anteriores[nome], capas_novas.get(nome, pd.DataFrame()), 'CAPA', capas)
+            for nome in capas_anteriores
+        }
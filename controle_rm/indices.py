@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from controle_rm.compacto import pertence
+
+# ----------------------
+# Índice do PWA: construído uma vez por upload e consultado pelo BLOCO 1,
+# evitando varrer df_pwa a cada CAPA / RM.
+# ----------------------
+
+@dataclass
+class IndicePWA:
+    capas: list = field(default_factory=list)        # CAPAs ordenadas (inclui '')
+    capa_linhas: dict = field(default_factory=dict)  # CAPA -> posições das linhas (np.ndarray)
+    rm_linhas: dict = field(default_factory=dict)    # RM -> posições das linhas (np.ndarray)
+    capa_cam: dict = field(default_factory=dict)     # CAPA -> CAM da primeira linha
+    capa_rms: dict = field(default_factory=dict)     # CAPA -> RMs ordenadas
+    rm_tem_mapa: dict = field(default_factory=dict)  # RM -> True se alguma linha tem MAPA
+    rm_lotes: dict = field(default_factory=dict)     # RM -> LOTES ordenados
+
+
+def _coluna_texto(df: pd.DataFrame, col: str) -> pd.Series:
+    if col in df.columns:
+        return df[col].astype(str)
+    return pd.Series('', index=df.index, dtype=object)
+
+
+def construir_indice_pwa(df_pwa: pd.DataFrame) -> IndicePWA:
+    indice = IndicePWA()
+    if df_pwa.empty:
+        return indice
+
+    df = df_pwa.reset_index(drop=True)
+    capa = _coluna_texto(df, 'CAPA')
+    rm = _coluna_texto(df, 'PEDIDO_LIMPO')
+    cam = _coluna_texto(df, 'CAM').to_numpy()
+
+    indice.capa_linhas = capa.groupby(capa, sort=True).indices
+    indice.rm_linhas = rm.groupby(rm, sort=True).indices
+    indice.capas = list(indice.capa_linhas.keys())
+    # posições são crescentes: a primeira é a primeira linha da CAPA no PWA
+    indice.capa_cam = {c: cam[pos[0]] for c, pos in indice.capa_linhas.items()}
+
+    pares = pd.DataFrame({'CAPA': capa, 'RM': rm}).drop_duplicates().sort_values(['CAPA', 'RM'])
+    indice.capa_rms = pares.groupby('CAPA', sort=False)['RM'].agg(list).to_dict()
+
+    tem_mapa = _coluna_texto(df, 'MAPA').str.strip() != ''
+    indice.rm_tem_mapa = tem_mapa.groupby(rm, sort=False).any().to_dict()
+
+    lotes = pd.DataFrame({'RM': rm, 'LOTE': _coluna_texto(df, 'LOTE')}).drop_duplicates().sort_values(['RM', 'LOTE'])
+    indice.rm_lotes = lotes.groupby('RM', sort=False)['LOTE'].agg(list).to_dict()
+    return indice
+
+
+def sub_indice(indice: IndicePWA, capas: list) -> IndicePWA:
+    """Índice restrito às `capas` (na ordem dada) e às RMs delas; sem as posições das linhas."""
+    rms = {rm for capa in capas for rm in indice.capa_rms.get(capa, [])}
+    return IndicePWA(
+        capas=capas,
+        capa_cam={c: indice.capa_cam[c] for c in capas if c in indice.capa_cam},
+        capa_rms={c: indice.capa_rms[c] for c in capas if c in indice.capa_rms},
+        rm_tem_mapa={rm: indice.rm_tem_mapa[rm] for rm in rms if rm in indice.rm_tem_mapa},
+        rm_lotes={rm: indice.rm_lotes[rm] for rm in rms if rm in indice.rm_lotes},
+    )
+
+
+# ----------------------
+# Presença de volumes por LOTE (main2.py): calculada uma vez por execução
+# a partir dos volumes previstos no PWA e dos volumes bipados na expedição.
+# ----------------------
+
+@dataclass
+class PresencaVolumes:
+    faltantes: dict = field(default_factory=dict)       # LOTE -> volumes previstos ausentes (ordenados)
+    completo: dict = field(default_factory=dict)        # LOTE -> todos os volumes previstos presentes
+    algum_presente: dict = field(default_factory=dict)  # LOTE -> ao menos um volume previsto presente
+    sem_volumes: set = field(default_factory=set)       # LOTES sem volumes informados no PWA
+
+
+def construir_presenca_volumes(df_pwa: pd.DataFrame, volumes_expedicao: set) -> PresencaVolumes:
+    presenca = PresencaVolumes()
+    lote = _coluna_texto(df_pwa, 'LOTE')
+    volume = _coluna_texto(df_pwa, 'VOLUME').str.strip()
+    valido = (volume != '') & (volume.str.upper() != 'NAN')
+
+    previstos = pd.DataFrame({'LOTE': lote[valido], 'VOLUME': volume[valido]}).drop_duplicates()
+    previstos['PRESENTE'] = pertence(previstos['VOLUME'], volumes_expedicao)
+
+    por_lote = previstos.groupby('LOTE', sort=False)['PRESENTE']
+    presenca.completo = por_lote.all().to_dict()
+    presenca.algum_presente = por_lote.any().to_dict()
+    ausentes = previstos[~previstos['PRESENTE']].sort_values(['LOTE', 'VOLUME'])
+    presenca.faltantes = ausentes.groupby('LOTE', sort=False)['VOLUME'].agg(list).to_dict()
+    presenca.sem_volumes = set(lote.unique()) - set(presenca.completo)
+    return presenca
+
+
+# ----------------------
+# Map SINGRA: RM -> {SITUACAO, OMS} da primeira linha de cada ID
+# ----------------------
+
+def construir_singra_map(df_singra: pd.DataFrame) -> dict:
+    if 'ID' not in df_singra.columns:
+        return {}
+    primeiras = df_singra.drop_duplicates('ID')
+    situ = _coluna_texto(primeiras, 'SITUACAO')
+    oms = _coluna_texto(primeiras, 'OMS')
+    return {rm: {'SITUACAO': s, 'OMS': o} for rm, s, o in zip(primeiras['ID'], situ, oms)}
+
+
+# ----------------------
+# Consulta rápida: RM -> MAPAs / STCs / STATUS já formatados, uma linha por RM do PWA
+# ----------------------
+
+def _juntar_por_rm(rm: pd.Series, valores: pd.Series, ignorar_vazios: bool) -> pd.Series:
+    pares = pd.DataFrame({'RM': rm, 'V': valores}).drop_duplicates()
+    if ignorar_vazios:
+        pares = pares[pares['V'] != '']
+    pares = pares.sort_values(['RM', 'V'])
+    return pares.groupby('RM', sort=False)['V'].agg(', '.join)
+
+
+def construir_tabela_rms(df_pwa: pd.DataFrame) -> pd.DataFrame:
+    rm = _coluna_texto(df_pwa, 'PEDIDO_LIMPO')
+    tabela = pd.DataFrame(index=pd.Index(rm.unique(), name='RM'))
+    tabela['MAPA'] = _juntar_por_rm(rm, _coluna_texto(df_pwa, 'MAPA'), True)
+    tabela['STC'] = _juntar_por_rm(rm, _coluna_texto(df_pwa, 'STC'), True)
+    tabela[['MAPA', 'STC']] = tabela[['MAPA', 'STC']].fillna("Não consta")
+    if 'STATUS' in df_pwa.columns:
+        tabela['STATUS'] = _juntar_por_rm(rm, _coluna_texto(df_pwa, 'STATUS'), False)
+    else:
+        tabela['STATUS'] = ''
+    return tabela
@@ -0,0 +1,77 @@
+import io
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from controle_rm.cache_disco import ler_bytes
+from controle_rm.leitura import ler_pwa_xlsx
+from controle_rm.paralelo import _pool, processos_bloco1
+
+# ----------------------
+# Carregamento concorrente das fontes (SINGRA, PWA e conferência do Google): as três começam
+# juntas, cada uma numa thread, e a espera total é a da mais lenta, não a soma. A leitura da
+# conferência é só espera de rede e os leitores do SINGRA (pyarrow/pandas) passam a maior parte
+# do tempo em código nativo; o PWA, lido em Python (XML da aba), vai para um processo do pool
+# do BLOCO 1 quando CONTROLE_RM_PROCESSOS > 1, para não disputar o GIL com as outras.
+# A primeira falha é informada na hora, sem esperar as fontes que ainda estão carregando.
+# ----------------------
+
+
+class ErroFonte(Exception):
+    """Falha ao carregar a fonte `fonte`; a exceção original fica em __cause__."""
+
+    def __init__(self, fonte: str, erro: BaseException):
+        super().__init__(f"Falha ao carregar {fonte}: {erro}")
+        self.fonte = fonte
+
+
+def _ler_pwa_bytes(dados: bytes) -> pd.DataFrame:
+    return ler_pwa_xlsx(io.BytesIO(dados))
+
+
+def ler_pwa(file, processos: int = None) -> pd.DataFrame:
+    """ler_pwa_xlsx(file), num processo do pool quando `processos` (padrão: CONTROLE_RM_PROCESSOS) > 1."""
+    processos = processos_bloco1() if processos is None else processos
+    if processos < 2:
+        return ler_pwa_xlsx(file)
+    return _pool(processos).apply(_ler_pwa_bytes, (ler_bytes(file),))
+
+
+def _anexar_contexto(contexto) -> None:
+    # as funções em st.cache_data rodam nas threads com o contexto da execução da página
+    if contexto is not None:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        add_script_run_ctx(threading.current_thread(), contexto)
+
+
+def _contexto_streamlit():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx(suppress_warning=True)
+
+
+def carregar_concorrente(fontes: dict):
+    """Executa as fontes (nome -> (funcao, args)) ao mesmo tempo.
+
+    Gera (nome, resultado, segundos) na ordem em que terminam. Na primeira falha as fontes ainda
+    não iniciadas são canceladas e ErroFonte é levantado sem esperar as que estão em andamento.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(len(fontes), 1), thread_name_prefix='controle_rm_fonte',
+                                  initializer=_anexar_contexto, initargs=(_contexto_streamlit(),))
+    inicio = time.perf_counter()
+    pendentes = {executor.submit(funcao, *args): nome for nome, (funcao, args) in fontes.items()}
+    try:
+        while pendentes:
+            prontas, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in prontas:
+                nome = pendentes.pop(futuro)
+                erro = futuro.exception()
+                if erro is not None:
+                    raise ErroFonte(nome, erro) from erro
+                yield nome, futuro.result(), time.perf_counter() - inicio
+    finally:
+        executor.shutdown(wait=not pendentes, cancel_futures=True)
@@ -0,0 +1,317 @@
+import inspect
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from controle_rm.consulta import consultar_rms, extrair_rms, texto_de_arquivo
+from controle_rm.desempenho import Medidor, arquivo_log_desempenho
+from controle_rm.exportacao import MIME_XLSX, MIME_ZIP, ExcelGrandeDemais, gerar_excel, gerar_zip
+from controle_rm.historico import DIAS_PADRAO, arquivo_historico, historico_capa, historico_lote, historico_rm, situacao_desde
+from controle_rm.ingestao import ErroFonte, carregar_concorrente
+
+# ----------------------
+# Trechos da tela isolados em fragments: interagir com um filtro ou botão daqui
+# re-executa só o fragment, sobre resultados já calculados, e não o app inteiro.
+# ----------------------
+
+# ----------------------
+# Tabelas sem Styler: o st.dataframe recebe só os dados (Arrow) e a configuração das colunas
+# (alinhamento à esquerda, altura das linhas para textos com quebra). Acima de LIMITE_SEM_PAGINAS
+# linhas, busca, ordenação e paginação são feitas aqui no servidor e só a página vai ao navegador.
+# ----------------------
+
+LIMITE_SEM_PAGINAS = 1000
+LINHAS_POR_PAGINA = 200
+ALTURA_LINHA_PX = 35      # altura padrão de uma linha do st.dataframe
+ALTURA_TEXTO_PX = 21      # cada linha de texto a mais numa célula com quebra
+MAXIMO_LINHAS_TEXTO = 12
+
+_SEM_ORDENACAO = "(ordem original)"
+# `alignment` das colunas só existe nas versões mais novas do Streamlit
+_ALINHAMENTO = 'alignment' in inspect.signature(st.column_config.Column).parameters
+# idem para `row_height` do st.dataframe (sem ele, os textos com quebra aparecem numa linha só)
+_ALTURA_LINHA = 'row_height' in inspect.signature(st.dataframe).parameters
+
+
+def _configuracao_colunas(tabela: pd.DataFrame) -> dict:
+    if not _ALINHAMENTO:
+        return {}
+    return {col: st.column_config.Column(alignment='left') for col in tabela.columns}
+
+
+def _altura_linha(tabela: pd.DataFrame) -> int:
+    # textos com várias linhas ('\n'): a linha da tabela cresce até MAXIMO_LINHAS_TEXTO linhas de texto
+    linhas = 1
+    for col in tabela.columns:
+        if tabela[col].dtype == object and len(tabela):
+            linhas = max(linhas, int(tabela[col].astype(str).str.count('\n').max()) + 1)
+    return ALTURA_LINHA_PX + ALTURA_TEXTO_PX * (min(linhas, MAXIMO_LINHAS_TEXTO) - 1)
+
+
+def filtrar_tabela(tabela: pd.DataFrame, termo: str) -> pd.DataFrame:
+    """Linhas com `termo` (sem diferenciar maiúsculas) em alguma coluna."""
+    termo = termo.strip()
+    if not termo:
+        return tabela
+    mascara = np.zeros(len(tabela), dtype=bool)
+    for col in tabela.columns:
+        mascara |= tabela[col].astype(str).str.contains(termo, case=False, regex=False).to_numpy()
+    return tabela[mascara]
+
+
+@st.fragment
+def tabela_paginada(tabela: pd.DataFrame, chave: str, quebrar_linhas: bool = False, hide_index: bool = None):
+    """Exibe `tabela` sem Styler; acima de LIMITE_SEM_PAGINAS linhas, com busca, ordenação e páginas no servidor.
+
+    `chave` distingue os controles de cada tabela da página; `quebrar_linhas` aumenta a altura das
+    linhas para mostrar textos com '\\n' (o antigo white-space: pre-wrap).
+    """
+    exibida = tabela
+    if len(tabela) > LIMITE_SEM_PAGINAS:
+        c1, c2, c3 = st.columns([3, 2, 1])
+        termo = c1.text_input("Buscar", key=f"{chave}.busca", placeholder="RM, CAPA, LOTE...")
+        coluna = c2.selectbox("Ordenar por", [_SEM_ORDENACAO] + [str(c) for c in tabela.columns], key=f"{chave}.ordem")
+        decrescente = c3.toggle("Decrescente", key=f"{chave}.decrescente")
+
+        exibida = filtrar_tabela(tabela, termo)
+        if coluna != _SEM_ORDENACAO:
+            exibida = exibida.sort_values(coluna, ascending=not decrescente, kind='stable')
+        paginas = max((len(exibida) - 1) // LINHAS_POR_PAGINA + 1, 1)
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, step=1, key=f"{chave}.pagina")
+        inicio = (min(pagina, paginas) - 1) * LINHAS_POR_PAGINA
+        st.caption(f"Linhas {min(inicio + 1, len(exibida))}–{min(inicio + LINHAS_POR_PAGINA, len(exibida))} de {len(exibida)}"
+                   + (f" (filtradas de {len(tabela)})" if len(exibida) != len(tabela) else ""))
+        exibida = exibida.iloc[inicio:inicio + LINHAS_POR_PAGINA]
+
+    opcoes = {'row_height': _altura_linha(exibida)} if quebrar_linhas and _ALTURA_LINHA else {}
+    st.dataframe(exibida, use_container_width=True, hide_index=hide_index,
+                 column_config=_configuracao_colunas(exibida), **opcoes)
+
+
+@st.fragment
+def tabela_por_cam(tabela: pd.DataFrame, rotulo: str):
+    cams = ["Todos"] + sorted(tabela['CAM'].unique().tolist())
+    cam_sel = st.selectbox(rotulo, cams)
+    display = tabela if cam_sel == "Todos" else tabela[tabela['CAM'] == cam_sel]
+    tabela_paginada(display, rotulo)
+
+
+@st.fragment
+def consulta_rapida_rms(tabela_rms: pd.DataFrame):
+    texto_rms = st.text_area("Cole aqui a mensagem com as RMs", height=180)
+    arquivo_rms = st.file_uploader("...ou envie uma lista de RMs (.txt, .csv ou .xlsx)", type=["txt", "csv", "xlsx"])
+    if st.button("🔎 Consultar RMs no sistema"):
+        if texto_rms.strip() or arquivo_rms:
+            texto = texto_rms
+            if arquivo_rms:
+                texto += "\n" + texto_de_arquivo(arquivo_rms)
+            rms_extraidas = extrair_rms(texto)
+            if not rms_extraidas.empty:
+                resultados = consultar_rms(rms_extraidas, tabela_rms)
+                st.write(f"{len(resultados)} RMs encontradas no texto ({resultados['RM (planilha)'].nunique()} distintas)")
+                tabela_paginada(resultados, "consulta_rapida")
+            else:
+                st.warning("⚠️ Nenhuma RM válida encontrada no texto.")
+        else:
+            st.info("Cole o texto (ou envie a lista) e clique em Consultar.")
+
+FORMATOS_EXPORTACAO = {
+    "Excel (.xlsx)": "xlsx",
+    "ZIP: originais + Parquet": "parquet",
+    "ZIP: originais + CSV": "csv",
+}
+
+
+@st.cache_data(max_entries=4, show_spinner="Gerando arquivo de saída...")
+def _arquivo_exportacao(chave: str, formato: str, _tabelas: dict, _originais: dict) -> bytes:
+    # `chave` identifica as entradas (PWA + SINGRA + conferência) de que as tabelas derivam
+    if formato == "xlsx":
+        return gerar_excel(_tabelas)
+    return gerar_zip(_tabelas, _originais, formato)
+
+
+@st.fragment
+def exportar_resultados(chave: str, tabelas: dict, originais: dict, medidor: Medidor = None, atualizar=None):
+    # `atualizar`, se dado, devolve (chave, tabelas) a trocar a cada rodada do fragment: no modo ao vivo,
+    # o BLOCO 1 da última rodada, que pode ser mais novo que o resto da página
+    if atualizar is not None:
+        chave_atual, atuais = atualizar()
+        chave, tabelas = f"{chave}:{chave_atual}", {**tabelas, **atuais}
+    formato = FORMATOS_EXPORTACAO[st.radio("Formato", list(FORMATOS_EXPORTACAO), horizontal=True)]
+    if st.button("Gerar arquivo de saída"):
+        medidor = medidor or Medidor('', ativo=False)
+        try:
+            dados = medidor.medir(f"Exportação ({formato})", _arquivo_exportacao, chave, formato, tabelas, originais,
+                                  linhas=sum(len(df) for df in tabelas.values()))
+        except ExcelGrandeDemais as e:
+            # o ZIP (Parquet ou CSV) não tem o limite de linhas de uma aba do Excel
+            st.error(f"{e}. Use a exportação em ZIP (Parquet ou CSV).")
+            return
+        if medidor.ativo:
+            # o fragment roda depois do painel: a medida vai direto para o log
+            medidor.gravar_log()
+            st.caption(f"⏱️ Arquivo gerado em {medidor.medidas[-1]['segundos']:.2f} s")
+        if formato == "xlsx":
+            st.download_button(
+                label="📥 Baixar Excel completo",
+                data=dados,
+                file_name="resultado_controle_rm_completo.xlsx",
+                mime=MIME_XLSX
+            )
+        else:
+            st.download_button(
+                label="📥 Baixar ZIP completo",
+                data=dados,
+                file_name=f"resultado_controle_rm_completo_{formato}.zip",
+                mime=MIME_ZIP
+            )
+
+
+def painel_desempenho(medidor: Medidor):
+    """Expander "Desempenho" com as etapas medidas nesta execução; grava as medidas no log."""
+    if not medidor.ativo:
+        return
+    with st.expander("⏱️ Desempenho"):
+        tabela = medidor.tabela()
+        st.write(f"{len(tabela)} etapas, {tabela['SEGUNDOS'].sum():.2f} s no total")
+        st.dataframe(tabela, use_container_width=True, hide_index=True)
+        if medidor.gravar_log():
+            st.caption(f"Log: {arquivo_log_desempenho()}")
+        else:
+            st.warning(f"⚠️ Não foi possível gravar o log em {arquivo_log_desempenho()}")
+
+
+def carregar_fontes(fontes: dict, medidor: Medidor) -> dict:
+    """Carrega as fontes (rótulo -> (funcao, args)) ao mesmo tempo, com o andamento de cada uma; rótulo -> resultado.
+
+    Cada fonte é medida com o próprio rótulo. A primeira falha levanta ErroFonte sem esperar as demais.
+    """
+    resultados = {}
+    with st.status(f"Carregando {', '.join(fontes)}...", expanded=False) as status:
+        linhas = {nome: st.empty() for nome in fontes}
+        for nome, linha in linhas.items():
+            linha.markdown(f"⏳ {nome}")
+        medidas = {nome: (medidor.medir, (nome, funcao, *args)) for nome, (funcao, args) in fontes.items()}
+        try:
+            for nome, resultado, segundos in carregar_concorrente(medidas):
+                resultados[nome] = resultado
+                linhas[nome].markdown(f"✅ {nome} — {segundos:.1f} s")
+        except ErroFonte as e:
+            linhas[e.fonte].markdown(f"❌ {e.fonte}: {e.__cause__}")
+            status.update(label=str(e), state="error", expanded=True)
+            raise
+        status.update(label=f"Fontes carregadas em {segundos:.1f} s", state="complete")
+    return resultados
+
+
+def exibir_blocos_2a5(blocos: dict, df_pwa: pd.DataFrame, df_lotes_user: pd.DataFrame, medidor: Medidor) -> dict:
+    """BLOCOS 2 a 5 (main.py, main2.py e conciliação) a partir de agregar_blocos; devolve as tabelas de
+    MAPA sem STC e de STC não expedidas exibidas, para a exportação."""
+    exibidas = {}
+    # ----------------------
+    # BLOCO 2: MAPA sem STC (agrupar por CAM e MAPA) — excluir STATUS EXPEDIDO
+    # ----------------------
+    st.markdown("## 🔷 BLOCO 2 — MAPA sem STC (agrupar por CAM e MAPA)")
+    if all(c in df_pwa.columns for c in ['MAPA','STC','STATUS','CAM','CAPA']):
+        agrupado_mapa = exibidas['mapa_sem_stc'] = blocos['mapa_sem_stc']
+        if agrupado_mapa.empty:
+            st.info("Nenhuma MAPA sem STC (após filtrar EXPEDIDO).")
+        else:
+            medidor.medir("BLOCO 2 (tela)", tabela_por_cam, agrupado_mapa, "Filtrar por CAM (Bloco 2)")
+    else:
+        st.info("Colunas necessárias para Bloco 2 ausentes no PWA.")
+
+    # ----------------------
+    # BLOCO 3: MAPA sem STC + LOTE confirmado na expedição
+    # ----------------------
+    st.markdown("## 🔷 BLOCO 3 — MAPA sem STC com LOTE confirmado na expedição (agrupar por CAM e MAPA)")
+
+    # Verificar colunas necessárias
+    if all(c in df_pwa.columns for c in ['MAPA','STC','STATUS','CAM','CAPA','LOTE']) and \
+       'LOTE' in df_lotes_user.columns:
+
+        # MAPA sem STC e não expedido
+        if blocos['mapa_sem_stc'].empty:
+            st.info("Nenhuma MAPA sem STC encontrada para este filtro.")
+        else:
+            # Somente linhas cujos lotes constam na planilha de LOTE
+            agrupado_mapa5 = blocos['mapa_sem_stc_com_lote']
+
+            if agrupado_mapa5.empty:
+                st.info("Nenhuma MAPA sem STC possui lote confirmado na expedição.")
+            else:
+                medidor.medir("BLOCO 3 (tela)", tabela_por_cam, agrupado_mapa5, "Filtrar por CAM (Bloco 3)")
+
+    else:
+        st.info("Colunas necessárias para Bloco 3 ausentes no PWA ou no arquivo de LOTE.")
+
+    # ----------------------
+    # BLOCO 4: STC não expedidas (agrupar por CAM e STC)
+    # ----------------------
+    st.markdown("## 🔶 BLOCO 4 — STC não expedidas (agrupar por CAM e STC)")
+    if all(c in df_pwa.columns for c in ['STC','STATUS','CAM','MAPA']):
+        agrupado_stc = exibidas['stc_nao_expedida'] = blocos['stc_nao_expedida']
+        if agrupado_stc.empty:
+            st.info("Nenhuma STC pendente.")
+        else:
+            medidor.medir("BLOCO 4 (tela)", tabela_por_cam, agrupado_stc, "Filtrar por CAM (Bloco 4)")
+    else:
+        st.info("Colunas necessárias para Bloco 4 ausentes no PWA.")
+
+    # ============================
+    # 🔷 BLOCO 5 — STC não expedidas (agrupar por CAM e STC) com LOTE confirmado na Expedição
+    # ============================
+
+    st.markdown("## 🔷 BLOCO 5 — STC com lote confirmado na expedição (agrupar por CAM e STC)")
+
+    # Verificar se todas as colunas necessárias existem
+    if all(c in df_pwa.columns for c in ['STC','STATUS','CAM','MAPA','LOTE']) and \
+       'LOTE' in df_lotes_user.columns:
+
+        # Somente LOTE realmente existente na planilha LOTE (Google Sheets)
+        agrupado_stc4 = blocos['stc_com_lote']
+
+        if agrupado_stc4.empty:
+            st.info("Nenhuma STC encontrada com lote confirmado na expedição.")
+        else:
+            medidor.medir("BLOCO 5 (tela)", tabela_por_cam, agrupado_stc4, "Filtrar por CAM (Bloco 5)")
+
+    return exibidas
+
+
+_CONSULTAS_HISTORICO = {"RM": historico_rm, "CAPA": historico_capa, "LOTE": historico_lote}
+_TITULOS_HISTORICO = {
+    'pwa': "PWA em cada envio",
+    'singra': "SINGRA em cada envio",
+    'classificacao': "Classificação no BLOCO 1",
+    'conferencia': "Presença na planilha de conferência",
+}
+
+
+@st.fragment
+def consulta_historico():
+    if not arquivo_historico():
+        st.info("Histórico desligado (CONTROLE_RM_HISTORICO).")
+        return
+    tipo = st.radio("Buscar por", list(_CONSULTAS_HISTORICO), horizontal=True)
+    valor = st.text_input(f"{tipo} a consultar")
+    dias = st.slider("Período (dias)", min_value=7, max_value=365, value=DIAS_PADRAO)
+    if st.button("🕓 Consultar histórico"):
+        chave = valor.strip()
+        if tipo == "RM":
+            chave = re.sub(r"[^0-9]", "", chave)
+        if not chave:
+            st.info(f"Informe a {tipo} e clique em Consultar.")
+            return
+        resultado = _CONSULTAS_HISTORICO[tipo](chave, dias)
+        desde = situacao_desde(resultado['classificacao']) if 'classificacao' in resultado else None
+        if desde:
+            st.info(f"Situação atual no BLOCO 1: {desde[0]} (desde {desde[1]})")
+        for nome, df in resultado.items():
+            st.subheader(_TITULOS_HISTORICO[nome])
+            if df.empty:
+                st.write(f"Sem registros nos últimos {dias} dias.")
+            else:
+                st.dataframe(df, use_container_width=True, hide_index=True)
@@ -0,0 +1,449 @@
+import codecs
+import csv
+import importlib.util
+import io
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+# ----------------------
+# Leitura dos arquivos de entrada: somente as colunas usadas pelos blocos, em modo streaming
+# ----------------------
+
+COLUNAS_PWA = ['PEDIDO', 'CAPA', 'MAPA', 'STC', 'CAM', 'LOTE', 'STATUS', 'VOLUME', 'PI', 'NOMENCLATURA', 'QTD']
+COLUNAS_SINGRA = ['ID', 'SITUACAO', 'OMS', 'LISTA_WMS_ID']
+
+_TAMANHO_PREFIXO = 64 * 1024
+_BLOCO_CSV_BYTES = 16 * 1024 * 1024
+_BLOCO_CSV_LINHAS = 500_000
+
+# mesmos textos que o pd.read_excel trata como vazio por padrão
+_NA_PADRAO = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+# células de erro do Excel (o pandas as lê como vazio)
+_ERROS_EXCEL = frozenset(['#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A', '#GETTING_DATA'])
+
+
+def _chave_coluna(nome) -> str:
+    return str(nome).replace('\ufeff', '').replace("'", "").replace('"', '').strip().upper()
+
+
+def calamine_disponivel() -> bool:
+    # pd.read_excel(engine='calamine') existe a partir do pandas 2.2
+    versao = tuple(int(p) for p in re.findall(r'\d+', pd.__version__)[:2])
+    return versao >= (2, 2) and importlib.util.find_spec('python_calamine') is not None
+
+
+def engine_pwa() -> str:
+    """Leitor usado por ler_pwa_xlsx(engine='auto') neste ambiente."""
+    return 'calamine' if calamine_disponivel() else 'streaming'
+
+
+def _texto_celula(v):
+    # mesma conversão do leitor do pandas (float inteiro -> int) seguida de dtype=str
+    if v is None:
+        return np.nan
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() else str(v)
+    if isinstance(v, str):
+        return np.nan if v in _ERROS_EXCEL else v
+    return str(v)
+
+
+def _coluna(valores: list, textos: dict = None) -> pd.Series:
+    # como no pd.read_excel, valores iguais (1, 1.0 e True) ficam com o texto do primeiro que aparece
+    # (`textos` guarda essa escolha entre os blocos de uma mesma leitura)
+    textos = {} if textos is None else textos
+    serie = pd.Series([textos[v] if v in textos else textos.setdefault(v, _texto_celula(v)) for v in valores],
+                      dtype=object)
+    return serie.where(~serie.isin(_NA_PADRAO), np.nan)
+
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _caminho_primeira_aba(z: zipfile.ZipFile) -> tuple:
+    wb = ElementTree.fromstring(z.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(z.read('xl/_rels/workbook.xml.rels'))
+    alvos = {r.get('Id'): r.get('Target') for r in rels.iter(_NS_PKG_REL + 'Relationship')}
+    aba = next(wb.iter(_NS_MAIN + 'sheet'))
+    alvo = alvos[aba.get(_NS_REL + 'id')]
+    caminho = alvo.lstrip('/') if alvo.startswith('/') else posixpath.normpath(posixpath.join('xl', alvo))
+    pr = wb.find(_NS_MAIN + 'workbookPr')
+    data_1904 = pr is not None and pr.get('date1904', '').lower() in ('1', 'true')
+    return caminho, data_1904
+
+
+def _estilos_de_data(z: zipfile.ZipFile) -> tuple:
+    # apenas os índices de estilo com formato de data/duração (o resto dos estilos é ignorado)
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+
+    if 'xl/styles.xml' not in z.namelist():
+        return set(), set()
+    raiz = ElementTree.fromstring(z.read('xl/styles.xml'))
+    formatos = dict(BUILTIN_FORMATS)
+    for nf in raiz.iter(_NS_MAIN + 'numFmt'):
+        formatos[int(nf.get('numFmtId'))] = nf.get('formatCode')
+    datas, duracoes = set(), set()
+    xfs = raiz.find(_NS_MAIN + 'cellXfs')
+    for i, xf in enumerate(xfs if xfs is not None else []):
+        fmt = formatos.get(int(xf.get('numFmtId', 0)))
+        if fmt and is_date_format(fmt):
+            datas.add(i)
+            if is_timedelta_format(fmt):
+                duracoes.add(i)
+    return datas, duracoes
+
+
+def _blocos_streaming(file, colunas: list, linhas_por_bloco: int = None):
+    """DataFrames consecutivos de até `linhas_por_bloco` linhas (None: um só) com as colunas projetadas.
+
+    Concatenados, equivalem a _ler_streaming; sempre gera ao menos um (sem linhas, quando a aba está vazia),
+    de modo que as colunas são conhecidas mesmo sem dados.
+    """
+    from openpyxl.reader.strings import read_string_table
+    from openpyxl.utils import column_index_from_string
+    from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_ISO8601, from_excel
+
+    tag_linha, tag_celula = _NS_MAIN + 'row', _NS_MAIN + 'c'
+    tag_valor, tag_inline = _NS_MAIN + 'v', _NS_MAIN + 'is'
+    tag_texto, tag_trecho = _NS_MAIN + 't', _NS_MAIN + 'r'
+
+    with zipfile.ZipFile(file) as z:
+        caminho, data_1904 = _caminho_primeira_aba(z)
+        epoca = CALENDAR_MAC_1904 if data_1904 else CALENDAR_WINDOWS_1900
+        datas, duracoes = _estilos_de_data(z)
+        compartilhadas = []
+        if 'xl/sharedStrings.xml' in z.namelist():
+            with z.open('xl/sharedStrings.xml') as f:
+                compartilhadas = read_string_table(f)
+
+        indice_coluna = {}
+
+        def valor_celula(c, v):
+            # mesma conversão do openpyxl (read_only, data_only)
+            t = c.get('t', 'n')
+            if t == 'inlineStr':
+                filho = c.find(tag_inline)
+                if filho is None:
+                    return None
+                # texto simples + trechos formatados (sem o texto fonético), como Text.content
+                return (filho.findtext(tag_texto) or '') + ''.join(r.findtext(tag_texto) or '' for r in filho.iter(tag_trecho))
+            if v is None:
+                return None
+            if t == 'n':
+                numero = float(v) if ('.' in v or 'E' in v or 'e' in v) else int(v)
+                estilo = int(c.get('s', 0))
+                if estilo in datas:
+                    try:
+                        return from_excel(numero, epoca, timedelta=estilo in duracoes)
+                    except (OverflowError, ValueError):
+                        return '#VALUE!'
+                return numero
+            if t == 's':
+                return compartilhadas[int(v)]
+            if t == 'b':
+                return bool(int(v))
+            if t == 'd':
+                return from_ISO8601(v)
+            if t == 'e':
+                return '#N/A'
+            return v
+
+        # sem a linha 1 no XML o cabeçalho é vazio (como no pd.read_excel): nenhuma coluna projetada
+        nomes, posicoes, ordem = [], {}, {}
+        valores, textos = [], []
+        n_linhas = 0
+        # linhas acumuladas para o próximo bloco e quantas delas vão até a última com dados
+        # (as vazias depois dela só saem se aparecer mais uma linha com dados)
+        acumuladas = ultima_com_dados = 0
+        gerados = 0
+
+        def bloco(n):
+            df = pd.DataFrame({nome: _coluna(lista[:n], memo) for nome, lista, memo in zip(nomes, valores, textos)})
+            for lista in valores:
+                del lista[:n]
+            return df
+
+        with z.open(caminho) as f:
+            pai = None
+            for evento, elem in ElementTree.iterparse(f, events=('start', 'end')):
+                if evento == 'start':
+                    if elem.tag == _NS_MAIN + 'sheetData':
+                        pai = elem
+                    continue
+                if elem.tag != tag_linha:
+                    continue
+                r = elem.get('r')
+                numero_linha = int(r) if r else n_linhas + 1
+                col = 0
+                if numero_linha == 1:
+                    # cabeçalho: escolhe as colunas projetadas (primeira ocorrência de cada nome)
+                    alvo = {_chave_coluna(c) for c in colunas}
+                    for c in elem.iter(tag_celula):
+                        ref = c.get('r')
+                        col = column_index_from_string(ref.rstrip('0123456789')) if ref else col + 1
+                        nome = valor_celula(c, c.findtext(tag_valor) or None)
+                        chave = _chave_coluna(nome)
+                        if nome is not None and chave in alvo and chave not in posicoes.values():
+                            posicoes[col] = chave
+                            nomes.append(nome)
+                    ordem = {col: i for i, col in enumerate(posicoes)}
+                    valores = [[] for _ in nomes]
+                    textos = [{} for _ in nomes]
+                    elem.clear()
+                    continue
+
+                # linhas ausentes no XML são linhas vazias
+                for _ in range(n_linhas + 2, numero_linha):
+                    n_linhas += 1
+                    acumuladas += 1
+                    for lista in valores:
+                        lista.append(None)
+                n_linhas += 1
+                acumuladas += 1
+                linha = [None] * len(nomes)
+                tem_dados = False
+                for c in elem.iter(tag_celula):
+                    ref = c.get('r')
+                    if ref:
+                        letras = ref.rstrip('0123456789')
+                        col = indice_coluna.get(letras)
+                        if col is None:
+                            col = indice_coluna[letras] = column_index_from_string(letras)
+                    else:
+                        col += 1
+                    i = ordem.get(col)
+                    if i is None and tem_dados:
+                        continue
+                    v = valor_celula(c, c.findtext(tag_valor) or None)
+                    if v is not None and v != '':
+                        tem_dados = True
+                    if i is not None:
+                        linha[i] = v
+                for lista, v in zip(valores, linha):
+                    lista.append(v)
+                if tem_dados:
+                    ultima_com_dados = acumuladas
+                    if linhas_por_bloco and acumuladas >= linhas_por_bloco:
+                        gerados += 1
+                        yield bloco(acumuladas)
+                        acumuladas = ultima_com_dados = 0
+                elem.clear()
+                if pai is not None:
+                    # linhas já lidas saem da árvore (o elem.clear() deixa o elemento vazio pendurado nela)
+                    pai.clear()
+
+    # linhas vazias no fim da planilha são descartadas
+    if ultima_com_dados or not gerados:
+        yield bloco(ultima_com_dados)
+
+
+def _ler_streaming(file, colunas: list) -> pd.DataFrame:
+    return next(_blocos_streaming(file, colunas))
+
+
+def _ler_calamine(file, colunas: list) -> pd.DataFrame:
+    alvo = {_chave_coluna(c) for c in colunas}
+    df = pd.read_excel(file, sheet_name=0, dtype=str, engine='calamine',
+                       usecols=lambda c: _chave_coluna(c) in alvo)
+    chaves = pd.Index([_chave_coluna(c) for c in df.columns])
+    return df.loc[:, ~chaves.duplicated()]
+
+
+def ler_pwa_xlsx(file, colunas: list = COLUNAS_PWA, engine: str = 'auto') -> pd.DataFrame:
+    """Lê a primeira aba do PWA trazendo apenas `colunas` (comparadas sem aspas/BOM/caixa).
+
+    engine: 'auto' (calamine se instalado, senão 'streaming'), 'calamine' ou 'streaming' (XML da aba
+    lido sob demanda, convertendo só as colunas projetadas, sem estilos nem fórmulas).
+    O resultado equivale a pd.read_excel(file, sheet_name=0, dtype=str)[colunas presentes].
+    """
+    if engine == 'auto':
+        engine = engine_pwa()
+    if engine == 'calamine':
+        return _ler_calamine(file, colunas)
+    if engine == 'streaming':
+        return _ler_streaming(file, colunas)
+    raise ValueError(f"engine desconhecida: {engine}")
+
+
+# ----------------------
+# SINGRA (.csv)
+# ----------------------
+
+def detectar_encoding(prefixo: bytes) -> str:
+    """utf-8-sig quando o prefixo é UTF-8 válido (com ou sem BOM), senão latin1."""
+    if prefixo.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # final=False: tolera um caractere multibyte cortado no fim do prefixo
+        codecs.getincrementaldecoder('utf-8')().decode(prefixo, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+
+def _colunas_csv(prefixo: bytes, encoding: str, sep: str, colunas: list) -> list:
+    texto = codecs.getincrementaldecoder(encoding)(errors='replace').decode(prefixo, final=False)
+    cabecalho = next(csv.reader(io.StringIO(texto), delimiter=sep), [])
+    alvo = {_chave_coluna(c) for c in colunas}
+    nomes, vistos = [], set()
+    for nome in cabecalho:
+        chave = _chave_coluna(nome)
+        if chave in alvo and chave not in vistos:
+            vistos.add(chave)
+            nomes.append(nome)
+    if 'ID' in alvo and 'ID' not in vistos:
+        # mesma busca do main3.py: primeira coluna cujo nome contém 'ID'
+        extra = next((n for n in cabecalho if 'ID' in _chave_coluna(n)), None)
+        if extra is not None and extra not in nomes:
+            nomes.append(extra)
+    return [n for n in cabecalho if n in nomes]
+
+
+def _blocos_pyarrow(file, nomes: list, encoding: str, sep: str):
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    leitor = pacsv.open_csv(
+        file,
+        read_options=pacsv.ReadOptions(encoding='utf8' if encoding == 'utf-8-sig' else encoding,
+                                       block_size=_BLOCO_CSV_BYTES),
+        parse_options=pacsv.ParseOptions(delimiter=sep),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=nomes,
+            column_types={n: pa.string() for n in nomes},
+            null_values=list(_NA_PADRAO),
+            strings_can_be_null=True,
+        ),
+    )
+    for lote in leitor:
+        # nulos como NaN (o pyarrow entrega None), igual ao pd.read_csv
+        yield lote.to_pandas().fillna(np.nan)
+
+
+def _blocos_pandas(file, nomes: list, encoding: str, sep: str):
+    yield from pd.read_csv(file, sep=sep, encoding=encoding, dtype=str, usecols=nomes, chunksize=_BLOCO_CSV_LINHAS)
+
+
+def _ler_singra_em(destino, file, colunas: list, sep: str) -> list:
+    """Entrega o SINGRA a `destino` (reiniciar() / acrescentar(bloco)) e devolve as colunas lidas.
+
+    Quando uma tentativa falha no meio, o destino é reiniciado e o arquivo relido do começo.
+    """
+    file.seek(0)
+    prefixo = file.read(_TAMANHO_PREFIXO)
+    encoding = detectar_encoding(prefixo)
+    nomes = _colunas_csv(prefixo, encoding, sep, colunas)
+    if not nomes:
+        return nomes
+
+    import pyarrow as pa
+
+    while True:
+        file.seek(0)
+        destino.reiniciar()
+        try:
+            for bloco in _blocos_pyarrow(file, nomes, encoding, sep):
+                destino.acrescentar(bloco)
+        except pa.ArrowInvalid as erro:
+            if 'UTF8' in str(erro) and encoding != 'latin1':
+                encoding = 'latin1'
+                nomes = _colunas_csv(prefixo, encoding, sep, colunas)
+                continue
+            # pyarrow não aceita linhas com menos campos: o pandas relê tudo (o pyarrow descarta
+            # linhas em branco, então o número de registros já lidos não diz onde retomar no arquivo)
+            file.seek(0)
+            destino.reiniciar()
+            try:
+                for bloco in _blocos_pandas(file, nomes, encoding, sep):
+                    destino.acrescentar(bloco)
+            except UnicodeDecodeError:
+                if encoding == 'latin1':
+                    raise
+                encoding = 'latin1'
+                nomes = _colunas_csv(prefixo, encoding, sep, colunas)
+                continue
+        return nomes
+
+
+class _Blocos(list):
+    # destino em memória de _ler_singra_em
+    reiniciar = list.clear
+    acrescentar = list.append
+
+
+def ler_singra_csv(file, colunas: list = COLUNAS_SINGRA, sep: str = ';') -> pd.DataFrame:
+    """Lê o SINGRA trazendo apenas `colunas`, em blocos, com o leitor CSV do pyarrow.
+
+    O encoding é detectado em um prefixo do arquivo. Equivale a
+    pd.read_csv(file, sep=sep, encoding=..., dtype=str) restrito às colunas usadas, com o
+    mesmo fallback do main3.py: arquivo que não é UTF-8 válido é lido inteiro como latin1.
+    Linhas com menos campos (que o pyarrow recusa) fazem o arquivo inteiro ser relido pelo pandas.
+    """
+    blocos = _Blocos()
+    nomes = _ler_singra_em(blocos, file, colunas, sep)
+    if not nomes:
+        return pd.DataFrame()
+    df = pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame(columns=nomes)
+    return df[nomes]
+
+
+# ----------------------
+# Parquet bruto: as mesmas leituras gravadas em disco bloco a bloco (texto, nulos como nulos),
+# para o motor DuckDB consultar arquivos maiores que a memória sem montar o DataFrame inteiro
+# ----------------------
+
+_BLOCO_XLSX_LINHAS = 200_000
+
+
+class _ParquetEmBlocos:
+    """Destino de _ler_singra_em que grava cada bloco num arquivo Parquet (colunas de texto)."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._escritor = None
+
+    def reiniciar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def acrescentar(self, bloco: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        esquema = pa.schema([(str(c), pa.string()) for c in bloco.columns])
+        tabela = pa.Table.from_pandas(bloco.astype(object), schema=esquema, preserve_index=False)
+        if self._escritor is None:
+            self._escritor = pq.ParquetWriter(self.caminho, esquema)
+        self._escritor.write_table(tabela)
+
+    def fechar(self, nomes: list = ()):
+        if self._escritor is None:
+            # nenhum bloco: arquivo só com as colunas
+            self.acrescentar(pd.DataFrame(columns=list(nomes), dtype=object))
+        self._escritor.close()
+
+
+def pwa_para_parquet(file, caminho: str, colunas: list = COLUNAS_PWA) -> None:
+    """Grava em `caminho` o que ler_pwa_xlsx(file, colunas, engine='streaming') devolveria, em blocos."""
+    destino = _ParquetEmBlocos(caminho)
+    for bloco in _blocos_streaming(file, colunas, _BLOCO_XLSX_LINHAS):
+        destino.acrescentar(bloco)
+    destino.fechar()
+
+
+def singra_para_parquet(file, caminho: str, colunas: list = COLUNAS_SINGRA, sep: str = ';') -> None:
+    """Grava em `caminho` o que ler_singra_csv(file, colunas, sep) devolveria, em blocos."""
+    destino = _ParquetEmBlocos(caminho)
+    nomes = _ler_singra_em(destino, file, colunas, sep)
+    destino.fechar(nomes)
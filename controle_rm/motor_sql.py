@@ -0,0 +1,414 @@
+import importlib.util
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from controle_rm.blocos import COLUNAS_MAPA_SEM_STC, COLUNAS_STC_NAO_EXPEDIDA
+from controle_rm.preparo import _COLUNAS_TEXTO_PWA, limpar_nomes_colunas
+
+# ----------------------
+# Motor SQL opcional (DuckDB) para PWA/SINGRA grandes: o mapa do SINGRA, o BLOCO 1 do main3.py e os
+# BLOCOS 2-5 saem de consultas executadas em paralelo, com os agrupamentos despejados em disco quando
+# passam do limite de memória. As entradas são DataFrames já carregados (registrados como relações) ou,
+# no main3.py, arquivos Parquet brutos em disco (ParquetBruto), normalizados na própria consulta:
+# PWA e SINGRA maiores que a memória nunca viram DataFrame.
+# As tabelas devolvidas são as mesmas dos caminhos em pandas (controle_rm.indices/bloco1/blocos).
+#   CONTROLE_RM_MOTOR=duckdb           usa este motor (padrão: pandas; sem o duckdb instalado, pandas)
+#   CONTROLE_RM_DUCKDB_MEMORIA=4GB     limite de memória do DuckDB (padrão do DuckDB: 80% da RAM)
+#   CONTROLE_RM_DUCKDB_TEMP=...        diretório dos despejos (padrão: controle_rm_duckdb no diretório temporário)
+# ----------------------
+
+MOTORES = ('pandas', 'duckdb')
+
+# espaços removidos por str.strip() (RE2: \s não inclui \v nem os separadores Unicode)
+_ESPACO = r'[\s\x{0B}\x{1C}-\x{1F}\x{85}\p{Z}]'
+
+_MACROS = f"""
+CREATE OR REPLACE TEMP MACRO aparar(x) AS regexp_replace(x, '^{_ESPACO}+|{_ESPACO}+$', '', 'g');
+CREATE OR REPLACE TEMP MACRO normalizar_rm(x) AS
+    regexp_replace(aparar(replace(x, chr(65279), '')), '[''"., ]', '', 'g');
+CREATE OR REPLACE TEMP MACRO normalizar_lote(x) AS
+    regexp_replace(regexp_replace(aparar(replace(x, chr(65279), '')), '[''"]', '', 'g'), '\\.0$', '');
+"""
+
+
+def duckdb_disponivel() -> bool:
+    return importlib.util.find_spec('duckdb') is not None
+
+
+def motor_execucao() -> str:
+    motor = os.environ.get('CONTROLE_RM_MOTOR', 'pandas').strip().lower()
+    if motor == 'duckdb' and duckdb_disponivel():
+        return 'duckdb'
+    return 'pandas'
+
+
+def conectar_duckdb():
+    """Conexão em memória com limite de memória e diretório de despejo configuráveis."""
+    import duckdb
+    temp = os.environ.get('CONTROLE_RM_DUCKDB_TEMP') or os.path.join(tempfile.gettempdir(), 'controle_rm_duckdb')
+    config = {'temp_directory': temp, 'preserve_insertion_order': False}
+    memoria = os.environ.get('CONTROLE_RM_DUCKDB_MEMORIA', '').strip()
+    if memoria:
+        config['memory_limit'] = memoria
+    con = duckdb.connect(config=config)
+    con.execute(_MACROS)
+    return con
+
+
+def _registrar(con, nome: str, df: pd.DataFrame, colunas: list):
+    # só as colunas usadas (sem copiar os textos) + posição da linha, para "primeira linha do grupo";
+    # colunas ausentes entram vazias, como em controle_rm.indices._coluna_texto
+    relacao = pd.DataFrame(
+        {c: (df[c] if c in df.columns else pd.Series('', index=df.index, dtype=object)) for c in colunas}
+    ).reset_index(drop=True)
+    relacao['_LINHA'] = np.arange(len(relacao), dtype=np.int64)
+    con.register(nome, relacao)
+
+
+def _identificador(nome: str) -> str:
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+class ParquetBruto:
+    """PWA ou SINGRA gravado como texto por controle_rm.leitura (pwa_para_parquet / singra_para_parquet).
+
+    Consultado direto do arquivo: `consulta` é o SELECT com as colunas que preparar_pwa /
+    preparar_singra (variante 'estrito') devolveriam, mais _LINHA (posição da linha no arquivo).
+    `columns` e len() imitam o DataFrame preparado, para as verificações de colunas dos apps.
+    """
+
+    def __init__(self, caminho: str, colunas: dict, linhas: int):
+        self.caminho = caminho
+        self._colunas = colunas  # coluna preparada -> expressão SQL
+        self._linhas = linhas
+
+    @staticmethod
+    def _origens(caminho: str) -> tuple:
+        import pyarrow.parquet as pq
+        meta = pq.read_metadata(caminho)
+        nomes = meta.schema.to_arrow_schema().names
+        limpos = limpar_nomes_colunas(pd.DataFrame(columns=nomes), estrito=True).columns
+        origens = {}
+        for limpo, nome in zip(limpos, nomes):
+            origens.setdefault(limpo, f"coalesce({_identificador(nome)}, '')")
+        return origens, meta.num_rows
+
+    @classmethod
+    def pwa(cls, caminho: str) -> 'ParquetBruto':
+        origens, linhas = cls._origens(caminho)
+        colunas = {c: (f"aparar({e})" if c in _COLUNAS_TEXTO_PWA else e) for c, e in origens.items()}
+        colunas['PEDIDO_LIMPO'] = f"normalizar_rm({colunas['PEDIDO']})" if 'PEDIDO' in colunas else "''"
+        return cls(caminho, colunas, linhas)
+
+    @classmethod
+    def singra(cls, caminho: str) -> 'ParquetBruto':
+        origens, linhas = cls._origens(caminho)
+        if 'ID' not in origens:
+            # coluna ID com sujeira no nome: a primeira que contém 'ID'
+            extra = next((c for c in origens if 'ID' in c), None)
+            if extra is not None:
+                origens = {('ID' if c == extra else c): e for c, e in origens.items()}
+        if 'ID' in origens:
+            origens['ID'] = f"normalizar_rm({origens['ID']})"
+        return cls(caminho, origens, linhas)
+
+    @property
+    def columns(self) -> list:
+        return list(self._colunas)
+
+    def __len__(self) -> int:
+        return self._linhas
+
+    def consulta(self, colunas: list = None) -> str:
+        """SELECT das `colunas` preparadas (padrão: todas; ausentes entram vazias) e de _LINHA."""
+        colunas = self.columns if colunas is None else colunas
+        vazia = "''"
+        expressoes = [f"{self._colunas.get(c, vazia)} AS {_identificador(c)}" for c in colunas]
+        arquivo = self.caminho.replace("'", "''")
+        return (f"SELECT {', '.join(expressoes + ['file_row_number AS _LINHA'])} "
+                f"FROM read_parquet('{arquivo}', file_row_number = true)")
+
+
+def _registrar_fonte(con, nome: str, fonte, colunas: list):
+    # DataFrame carregado ou ParquetBruto (visão sobre o arquivo, normalizada na consulta)
+    if isinstance(fonte, ParquetBruto):
+        con.execute(f"CREATE TEMP VIEW {nome} AS {fonte.consulta(colunas)}")
+    else:
+        _registrar(con, nome, fonte, colunas)
+
+
+def contar_rms_sql(pwa: ParquetBruto) -> int:
+    """pwa['PEDIDO_LIMPO'].nunique() do PWA preparado."""
+    with conectar_duckdb() as con:
+        return con.execute(f"SELECT count(DISTINCT PEDIDO_LIMPO) FROM ({pwa.consulta(['PEDIDO_LIMPO'])})").fetchone()[0]
+
+
+def pedidos_singra_sql(singra: ParquetBruto) -> set:
+    """IDs normalizados do SINGRA preparado, sem o vazio."""
+    if 'ID' not in singra.columns:
+        return set()
+    with conectar_duckdb() as con:
+        linhas = con.execute(f"SELECT DISTINCT ID FROM ({singra.consulta(['ID'])}) WHERE ID <> ''").fetchall()
+    return {rm for rm, in linhas}
+
+
+def linhas_distintas_sql(fonte: ParquetBruto, colunas: list, linhas_por_bloco: int = 100_000):
+    """DataFrames com as linhas distintas das `colunas` preparadas (ausentes vazias), bloco a bloco."""
+    with conectar_duckdb() as con:
+        nomes = ', '.join(_identificador(c) for c in colunas)
+        resultado = con.execute(f"SELECT DISTINCT {nomes} FROM ({fonte.consulta(colunas)})")
+        # to_arrow_reader substitui fetch_record_batch nas versões recentes do duckdb
+        ler = getattr(resultado, 'to_arrow_reader', None) or resultado.fetch_record_batch
+        for lote in ler(linhas_por_bloco):
+            yield lote.to_pandas()
+
+
+def _registrar_conjunto(con, nome: str, conjunto):
+    # dtype 'string': o conjunto vazio também entra como VARCHAR (object vazio viraria INTEGER)
+    con.register(nome, pd.DataFrame({'VALOR': pd.Series([v for v in conjunto if isinstance(v, str)], dtype='string')}))
+
+
+def _tabela(df: pd.DataFrame) -> pd.DataFrame:
+    # tabelas sem linhas saem sem colunas, como pd.DataFrame([]) nos caminhos em pandas
+    return df.reset_index(drop=True) if len(df) else pd.DataFrame()
+
+
+# ----------------------
+# Map SINGRA: RM -> {SITUACAO, OMS} da primeira linha de cada ID
+# ----------------------
+
+def construir_singra_map_sql(df_singra: pd.DataFrame) -> dict:
+    if 'ID' not in df_singra.columns:
+        return {}
+    with conectar_duckdb() as con:
+        _registrar(con, 'singra', df_singra, ['ID', 'SITUACAO', 'OMS'])
+        linhas = con.execute("""
+            SELECT CAST(ID AS VARCHAR) AS ID,
+                   arg_min(coalesce(CAST(SITUACAO AS VARCHAR), 'nan'), _LINHA),
+                   arg_min(coalesce(CAST(OMS AS VARCHAR), 'nan'), _LINHA)
+            FROM singra GROUP BY 1 ORDER BY min(_LINHA)
+        """).fetchall()
+    return {rm: {'SITUACAO': s, 'OMS': o} for rm, s, o in linhas}
+
+
+# ----------------------
+# BLOCO 1 (main3.py): situação por RM e categorias rigorosas de CAPA.
+# Uma consulta por visão; a consulta das CAPAs devolve a categoria e os textos de cada uma,
+# e as seis tabelas são separadas aqui com os nomes de colunas de classificar_capas_estrito.
+# ----------------------
+
+_LINHAS_BLOCO1 = """
+    linhas AS (
+        SELECT _LINHA,
+               CAST(PEDIDO_LIMPO AS VARCHAR) AS RM,
+               CAST(CAPA AS VARCHAR) AS CAPA,
+               CAST(CAM AS VARCHAR) AS CAM,
+               upper(CAST(STATUS AS VARCHAR)) AS STATUS,
+               NOT regexp_full_match(CAST(MAPA AS VARCHAR), '{espaco}*') AS TEM_MAPA,
+               aparar(CAST(MAPA AS VARCHAR)) AS MAPA,
+               normalizar_lote(CAST(LOTE AS VARCHAR)) AS LOTE
+        FROM pwa
+    ),
+    linhas_conf AS (
+        SELECT *, LOTE IN (SELECT VALOR FROM lotes) AS CONFERIDO FROM linhas
+    )
+""".format(espaco=_ESPACO)
+
+_SQL_RMS = f"""
+WITH {_LINHAS_BLOCO1},
+por_rm AS (
+    SELECT RM,
+           arg_min(CAPA, _LINHA) AS CAPA,
+           arg_min(CAM, _LINHA) AS CAM,
+           arg_min(STATUS, _LINHA) AS STATUS,
+           bool_or(TEM_MAPA) AS TEM_MAPA,
+           string_agg(DISTINCT MAPA, ', ' ORDER BY MAPA) AS MAPAS,
+           coalesce(list(DISTINCT LOTE) FILTER (WHERE LOTE <> '' AND NOT CONFERIDO), []) AS FALTANTES
+    FROM linhas_conf WHERE RM <> '' GROUP BY RM
+),
+classificadas AS (
+    SELECT *, list_sort(FALTANTES) AS LOTES_FALTANTES, RM IN (SELECT VALOR FROM pedidos) AS NO_SINGRA FROM por_rm
+)
+SELECT RM, CAPA, CAM, STATUS AS "STATUS PWA",
+       CASE WHEN STATUS = 'CANCELADO' THEN 'CANCELADA'
+            WHEN TEM_MAPA THEN 'COM MAPA'
+            WHEN len(LOTES_FALTANTES) = 0 AND NO_SINGRA THEN 'PRONTA'
+            ELSE 'PENDENTE' END AS "SITUAÇÃO",
+       CASE WHEN STATUS = 'CANCELADO' THEN 'Item cancelado no sistema'
+            WHEN TEM_MAPA THEN 'MAPA gerado: ' || MAPAS
+            WHEN len(LOTES_FALTANTES) = 0 AND NO_SINGRA THEN 'Apta para gerar MAPA (Em Expedição)'
+            ELSE concat_ws(' | ',
+                CASE WHEN len(LOTES_FALTANTES) > 0 THEN 'Lotes não bipados na exp.: ' || array_to_string(LOTES_FALTANTES, ', ') END,
+                CASE WHEN NOT NO_SINGRA THEN 'Não consta ''Em Expedição'' no SINGRA' END)
+            END AS DETALHE
+FROM classificadas ORDER BY RM
+"""
+
+_SQL_CAPAS = f"""
+WITH {_LINHAS_BLOCO1},
+capas AS (
+    SELECT CAPA, arg_min(CAM, _LINHA) AS CAM, bool_or(STATUS = 'CANCELADO') AS TEM_CANCELADO
+    FROM linhas WHERE CAPA <> '' GROUP BY CAPA
+),
+ativos_rm AS (
+    SELECT CAPA, normalizar_rm(RM) AS RM,
+           bool_or(TEM_MAPA) AS COM_MAPA,
+           arg_min(STATUS, _LINHA) AS STATUS,
+           count(*) AS LINHAS,
+           count(*) FILTER (WHERE TEM_MAPA) AS LINHAS_COM_MAPA,
+           coalesce(list(DISTINCT LOTE) FILTER (WHERE LOTE <> '' AND NOT CONFERIDO), []) AS FALTANTES,
+           coalesce(list(DISTINCT MAPA) FILTER (WHERE MAPA <> ''), []) AS MAPAS
+    FROM linhas_conf WHERE CAPA <> '' AND STATUS <> 'CANCELADO' GROUP BY CAPA, normalizar_rm(RM)
+),
+ativos AS (
+    SELECT *, RM <> '' AND RM NOT IN (SELECT VALOR FROM pedidos) AS FORA_SINGRA FROM ativos_rm
+),
+por_capa AS (
+    SELECT CAPA,
+           sum(LINHAS) AS TOTAL,
+           sum(LINHAS_COM_MAPA) AS QTD_COM_MAPA,
+           list_sort(coalesce(list(RM) FILTER (WHERE RM <> ''), [])) AS PEDIDOS,
+           list_sort(coalesce(list(RM) FILTER (WHERE RM <> '' AND COM_MAPA), [])) AS RMS_COM,
+           list_sort(coalesce(list(RM) FILTER (WHERE RM <> '' AND NOT COM_MAPA), [])) AS RMS_SEM,
+           list_sort(list_distinct(flatten(list(FALTANTES)))) AS LOTES_FALTANTES,
+           list_sort(list_distinct(flatten(coalesce(list(FALTANTES) FILTER (WHERE RM <> '' AND NOT COM_MAPA), [])))) AS LOTES_FALTANTES_RESTO,
+           list_sort(list_distinct(flatten(list(MAPAS)))) AS MAPAS,
+           bool_or(FORA_SINGRA) AS ALGUMA_FORA_SINGRA,
+           coalesce(bool_or(FORA_SINGRA AND NOT COM_MAPA), false) AS ALGUMA_FORA_SINGRA_RESTO
+    FROM ativos GROUP BY CAPA
+),
+fora_singra AS (
+    SELECT CAPA, string_agg('- ' || S || ': ' || RMS, chr(10) ORDER BY S) AS TEXTO FROM (
+        SELECT CAPA, CASE WHEN STATUS = '' THEN 'SEM STATUS' ELSE STATUS END AS S,
+               array_to_string(list_sort(list(RM)), ', ') AS RMS
+        FROM ativos WHERE FORA_SINGRA GROUP BY ALL
+    ) GROUP BY CAPA
+),
+fora_singra_resto AS (
+    SELECT CAPA, string_agg('- ' || STATUS || ': ' || RMS, chr(10) ORDER BY STATUS) AS TEXTO FROM (
+        SELECT CAPA, STATUS, array_to_string(list_sort(list(RM)), ', ') AS RMS
+        FROM ativos WHERE FORA_SINGRA AND NOT COM_MAPA GROUP BY ALL
+    ) GROUP BY CAPA
+),
+categorizadas AS (
+    SELECT c.CAPA, c.CAM, p.*, f.TEXTO AS FORA, fr.TEXTO AS FORA_RESTO,
+           'MAPAs existentes: ' || array_to_string(p.MAPAS, ', ') || chr(10)
+               || 'RMs já com MAPA: ' || array_to_string(p.RMS_COM, ', ') || chr(10) AS HISTORICO,
+           CASE WHEN p.QTD_COM_MAPA = p.TOTAL THEN 'finalizadas'
+                WHEN p.QTD_COM_MAPA > 0 THEN
+                    CASE WHEN len(p.LOTES_FALTANTES_RESTO) = 0 AND NOT p.ALGUMA_FORA_SINGRA_RESTO
+                         THEN 'quebradas_prontas' ELSE 'quebradas_pendentes' END
+                WHEN len(p.LOTES_FALTANTES) = 0 AND NOT p.ALGUMA_FORA_SINGRA THEN
+                    CASE WHEN c.TEM_CANCELADO THEN 'parciais' ELSE 'prontas' END
+                ELSE 'pendentes' END AS CATEGORIA
+    FROM capas c
+    JOIN por_capa p USING (CAPA)
+    LEFT JOIN fora_singra f USING (CAPA)
+    LEFT JOIN fora_singra_resto fr USING (CAPA)
+)
+SELECT CAPA, CAM, CATEGORIA,
+       CASE WHEN CATEGORIA LIKE 'quebradas_%' THEN len(RMS_SEM) ELSE len(PEDIDOS) END AS QTD,
+       array_to_string(CASE WHEN CATEGORIA LIKE 'quebradas_%' THEN RMS_SEM ELSE PEDIDOS END, ', ') AS RMS,
+       array_to_string(MAPAS, ', ') AS MAPAS,
+       CASE CATEGORIA
+            WHEN 'quebradas_prontas' THEN HISTORICO
+            WHEN 'quebradas_pendentes' THEN concat_ws(chr(10) || chr(10), HISTORICO,
+                CASE WHEN len(LOTES_FALTANTES_RESTO) > 0
+                     THEN 'Lotes Restantes ausentes: ' || array_to_string(LOTES_FALTANTES_RESTO, ', ') END,
+                CASE WHEN FORA_RESTO IS NOT NULL THEN 'RMs Restantes fora Singra:' || chr(10) || FORA_RESTO END)
+            WHEN 'pendentes' THEN concat_ws(chr(10) || chr(10),
+                CASE WHEN len(LOTES_FALTANTES) > 0
+                     THEN 'Lotes que não estão na Expedição: ' || array_to_string(LOTES_FALTANTES, ', ') END,
+                CASE WHEN FORA IS NOT NULL THEN 'RMs fora Singra:' || chr(10) || FORA END)
+       END AS TEXTO
+FROM categorizadas ORDER BY CAPA
+"""
+
+# categoria -> colunas da tabela (nome exibido -> coluna da consulta), na ordem de classificar_capas_estrito
+_COLUNAS_CAPAS = {
+    'prontas': {'CAPA': 'CAPA', 'CAM': 'CAM', 'Qtd RM': 'QTD', 'RMs (100% Prontas)': 'RMS'},
+    'quebradas_prontas': {'CAPA': 'CAPA', 'CAM': 'CAM', 'Qtd RM': 'QTD', 'RMs Pendentes (Prontas)': 'RMS', 'Histórico': 'TEXTO'},
+    'pendentes': {'CAPA': 'CAPA', 'CAM': 'CAM', 'Qtd RM': 'QTD', 'RMs da CAPA': 'RMS', 'O que falta?': 'TEXTO'},
+    'quebradas_pendentes': {'CAPA': 'CAPA', 'CAM': 'CAM', 'Qtd RM': 'QTD', 'RMs s/ MAPA': 'RMS', 'Pendência do Restante': 'TEXTO'},
+    'finalizadas': {'CAPA': 'CAPA', 'CAM': 'CAM', 'RMs': 'RMS', 'MAPAs': 'MAPAS'},
+    'parciais': {'CAPA': 'CAPA', 'CAM': 'CAM', 'RMs Ativas': 'RMS'},
+}
+
+
+def classificar_capas_estrito_sql(df_pwa, lotes_disponiveis: set, pedidos_singra: set):
+    """Mesmo resultado de controle_rm.bloco1.classificar_capas_estrito: (df_rm_visao, capas).
+
+    `df_pwa`: DataFrame preparado ou ParquetBruto do PWA.
+    """
+    with conectar_duckdb() as con:
+        _registrar_fonte(con, 'pwa', df_pwa, ['PEDIDO_LIMPO', 'CAPA', 'CAM', 'STATUS', 'MAPA', 'LOTE'])
+        _registrar_conjunto(con, 'lotes', lotes_disponiveis)
+        _registrar_conjunto(con, 'pedidos', pedidos_singra)
+        df_rm_visao = con.execute(_SQL_RMS).df()
+        df_capas = con.execute(_SQL_CAPAS).df()
+
+    capas = {}
+    for categoria, colunas in _COLUNAS_CAPAS.items():
+        tabela = df_capas.loc[df_capas['CATEGORIA'] == categoria, list(colunas.values())]
+        capas[categoria] = _tabela(tabela.set_axis(list(colunas), axis=1))
+    return _tabela(df_rm_visao), capas
+
+
+# ----------------------
+# BLOCOS 2-5: mesmos filtros e agrupamentos de controle_rm.blocos.agregar_blocos
+# ----------------------
+
+def _agrupar_sql(con, chave: str, filtro: str, colunas: dict) -> pd.DataFrame:
+    """Grupos (CAM, chave) ordenados; `colunas`: nome -> ignorar vazios, juntadas como ', '.join(sorted(set(...)))."""
+    agregados = []
+    for nome, ignorar_vazios in colunas.items():
+        filtro_coluna = f" FILTER (WHERE {nome} <> '')" if ignorar_vazios else ''
+        agregados.append(f"coalesce(string_agg(DISTINCT {nome}, ', ' ORDER BY {nome}){filtro_coluna}, '') AS {nome}")
+    return _tabela(con.execute(f"""
+        SELECT CAM, {chave}, {', '.join(agregados)}
+        FROM linhas WHERE {filtro} GROUP BY CAM, {chave} ORDER BY CAM, {chave}
+    """).df())
+
+
+def agregar_blocos_sql(df_pwa, lotes_validos: set = None) -> dict:
+    """Mesmas tabelas de controle_rm.blocos.agregar_blocos; `df_pwa`: DataFrame preparado ou ParquetBruto."""
+    cols = set(df_pwa.columns)
+    tabelas = {}
+    tem_mapa = set(COLUNAS_MAPA_SEM_STC) <= cols
+    tem_stc = set(COLUNAS_STC_NAO_EXPEDIDA) <= cols
+    if not (tem_mapa or tem_stc):
+        return tabelas
+    com_lote = lotes_validos is not None and 'LOTE' in cols
+
+    with conectar_duckdb() as con:
+        _registrar_fonte(con, 'pwa', df_pwa, ['CAM', 'MAPA', 'STC', 'STATUS', 'CAPA', 'LOTE'])
+        _registrar_conjunto(con, 'lotes', lotes_validos or set())
+        con.execute(f"""
+            CREATE TEMP VIEW linhas AS
+            SELECT CAST(CAM AS VARCHAR) AS CAM, CAST(MAPA AS VARCHAR) AS MAPA, CAST(STC AS VARCHAR) AS STC,
+                   CAST(STATUS AS VARCHAR) AS STATUS, CAST(CAPA AS VARCHAR) AS CAPA,
+                   {'aparar(CAST(LOTE AS VARCHAR))' if com_lote else "''"} AS LOTE
+            FROM pwa
+        """)
+        if com_lote:
+            con.execute("CREATE TEMP TABLE lotes_confirmados AS SELECT DISTINCT VALOR FROM lotes")
+        confirmado = "LOTE IN (SELECT VALOR FROM lotes_confirmados)"
+
+        if tem_mapa:
+            filtro = "MAPA <> '' AND STC = '' AND STATUS <> 'EXPEDIDO'"
+            tabelas['mapa_sem_stc'] = _agrupar_sql(con, 'MAPA', filtro, {'CAPA': False})
+            if com_lote:
+                tabelas['mapa_sem_stc_com_lote'] = _agrupar_sql(
+                    con, 'MAPA', f"{filtro} AND {confirmado}", {'CAPA': False, 'LOTE': False}
+                )
+        if tem_stc:
+            filtro = "STC <> '' AND STATUS <> 'EXPEDIDO' AND STATUS <> 'CANCELADO'"
+            tabelas['stc_nao_expedida'] = _agrupar_sql(con, 'STC', filtro, {'MAPA': True})
+            if com_lote:
+                tabelas['stc_com_lote'] = _agrupar_sql(
+                    con, 'STC', f"{filtro} AND {confirmado}", {'MAPA': True, 'LOTE': False}
+                )
+    return tabelas
@@ -0,0 +1,80 @@
+import re
+
+import pandas as pd
+
+# versão das regras de normalização/carregamento: faz parte da chave do cache em disco
+# (controle_rm.cache_disco); incrementar sempre que a saída dos carregadores mudar
+VERSAO_NORMALIZACAO = 3
+
+# ----------------------
+# Normalização vetorizada (uma operação .str por coluna, em vez de .apply por célula)
+# Resultados idênticos às funções escalares originais dos apps.
+# ----------------------
+
+# caracteres removidos do código da RM (aspas, ponto, vírgula e espaço)
+_RE_CHARS_RM = r"['\"., ]"
+_RE_CHARS_LOTE = r"['\"]"
+# MAPA no formato "123.0" / "123.00": parte inteira com até 15 dígitos (exata em float)
+_RE_MAPA_INTEIRO = re.compile(r'^(-?)([0-9]{1,15})\.0*$')
+
+
+def _como_texto(serie: pd.Series) -> tuple:
+    # equivalente a str(valor) célula a célula; marca os nulos para devolver ''
+    nulos = serie.isna()
+    texto = serie.astype(object).where(~nulos, '').astype(str)
+    return texto, nulos
+
+
+def normalizar_codigo_rm_serie(serie: pd.Series, remover_bom: bool = False) -> pd.Series:
+    texto, nulos = _como_texto(serie)
+    if remover_bom:
+        texto = texto.str.replace('\ufeff', '', regex=False)
+    texto = texto.str.strip().str.replace(_RE_CHARS_RM, '', regex=True)
+    return texto.where(~nulos, '')
+
+
+def normalizar_lote_serie(serie: pd.Series, remover_bom: bool = False) -> pd.Series:
+    texto, nulos = _como_texto(serie)
+    if remover_bom:
+        texto = texto.str.replace('\ufeff', '', regex=False)
+    texto = texto.str.strip().str.replace(_RE_CHARS_LOTE, '', regex=True)
+    if remover_bom:
+        # main3.py: também remove o sufixo '.0' de lotes numéricos vindos do Sheets
+        texto = texto.str.replace(r'\.0\Z', '', regex=True)
+    return texto.where(~nulos, '')
+
+
+def _mapa_to_intstr(x):
+    # versão escalar original, usada apenas para os valores fora do caminho rápido
+    x = str(x).strip()
+    if x == '' or x.upper() == 'NAN':
+        return ''
+    try:
+        if '.' in x:
+            return str(int(float(x)))
+        return x
+    except:
+        return x
+
+
+def mapa_to_intstr_serie(serie: pd.Series) -> pd.Series:
+    texto, _ = _como_texto(serie)
+    texto = texto.str.strip()
+    texto = texto.where(texto.str.upper() != 'NAN', '')
+
+    com_ponto = texto.str.contains('.', regex=False)
+    if not com_ponto.any():
+        return texto
+
+    partes = texto[com_ponto].str.extract(_RE_MAPA_INTEIRO)
+    rapido = partes[1].notna()
+    inteiros = partes.loc[rapido, 1].str.lstrip('0').replace('', '0')
+    # int(float('-0.0')) == 0: o sinal só permanece para valores diferentes de zero
+    sinal = partes.loc[rapido, 0].where(inteiros != '0', '')
+    resultado = texto.copy()
+    resultado.loc[inteiros.index] = sinal + inteiros
+
+    restantes = com_ponto[com_ponto].index.difference(inteiros.index)
+    if len(restantes):
+        resultado.loc[restantes] = texto.loc[restantes].map(_mapa_to_intstr)
+    return resultado
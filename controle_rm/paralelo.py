@@ -0,0 +1,198 @@
+import os
+import pickle
+import struct
+import sys
+import threading
+import types
+from multiprocessing import get_context, shared_memory
+
+import pandas as pd
+
+from controle_rm.bloco1 import classificar_capas_estrito, juntar_tabelas, verificar_capas_por_lote, verificar_capas_por_volume
+from controle_rm.indices import IndicePWA, PresencaVolumes, sub_indice
+
+# ----------------------
+# BLOCO 1 em paralelo por CAM (CONTROLE_RM_PROCESSOS): as CAPAs são separadas pelo CAM e cada
+# partição roda num processo do pool. Os conjuntos grandes (lotes conferidos, RMs do SINGRA)
+# são gravados uma vez em memória compartilhada e cada processo os lê uma vez por execução,
+# em vez de recebê-los serializados a cada tarefa. As tabelas das partições são juntadas
+# na ordem do caminho sequencial.
+#   CONTROLE_RM_PROCESSOS=0|1   sequencial (padrão)
+#   CONTROLE_RM_PROCESSOS=N     N processos; 'auto' usa um por núcleo
+# ----------------------
+
+_POOL = {}
+_POOL_TRAVA = threading.Lock()
+_CONJUNTOS = {}  # no processo do pool: nome do bloco -> conjunto já lido
+
+
+def processos_bloco1() -> int:
+    valor = os.environ.get('CONTROLE_RM_PROCESSOS', '').strip().lower()
+    if valor == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(int(valor), 1)
+    except ValueError:
+        return 1
+
+
+def _pool(processos: int):
+    """Pool de `processos` processos, criado uma vez e reaproveitado entre execuções do app.
+
+    'spawn' porque o servidor do Streamlit tem threads (fork copiaria travas em estado indefinido).
+    O Streamlit executa a página como o módulo __main__; durante a criação dos processos ele é
+    trocado por um módulo vazio, senão cada processo novo executaria a página inteira ao iniciar.
+    """
+    with _POOL_TRAVA:
+        if processos not in _POOL:
+            principal = sys.modules['__main__']
+            sys.modules['__main__'] = types.ModuleType('__main__')
+            try:
+                _POOL[processos] = get_context('spawn').Pool(processos)
+            finally:
+                sys.modules['__main__'] = principal
+        return _POOL[processos]
+
+
+class ConjuntoCompartilhado:
+    """Conjunto serializado uma vez num bloco de memória compartilhada, lido nos processos pelo nome."""
+
+    def __init__(self, conjunto):
+        dados = pickle.dumps(list(conjunto), protocol=pickle.HIGHEST_PROTOCOL)
+        self._bloco = shared_memory.SharedMemory(create=True, size=len(dados) + 8)
+        self._bloco.buf[:8] = struct.pack('<Q', len(dados))
+        self._bloco.buf[8:8 + len(dados)] = dados
+        self.nome = self._bloco.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._bloco.close()
+        self._bloco.unlink()
+
+
+def _ler_conjunto(nome: str) -> set:
+    if nome not in _CONJUNTOS:
+        bloco = shared_memory.SharedMemory(name=nome)
+        try:
+            tamanho = struct.unpack('<Q', bytes(bloco.buf[:8]))[0]
+            conjunto = set(pickle.loads(bytes(bloco.buf[8:8 + tamanho])))
+        finally:
+            bloco.close()
+        # só os conjuntos da execução atual ficam guardados
+        if len(_CONJUNTOS) >= 4:
+            _CONJUNTOS.clear()
+        _CONJUNTOS[nome] = conjunto
+    return _CONJUNTOS[nome]
+
+
+def _executar_particao(funcao: str, args: tuple, compartilhados: tuple):
+    conjuntos = [_ler_conjunto(nome) for nome in compartilhados]
+    if funcao == 'lote':
+        return verificar_capas_por_lote(*args, *conjuntos)
+    if funcao == 'volume':
+        return verificar_capas_por_volume(*args)
+    if funcao == 'estrito':
+        return classificar_capas_estrito(*args, *conjuntos)
+    raise ValueError(f"função desconhecida: {funcao}")
+
+
+# ----------------------
+# main.py / main2.py: partições do índice do PWA (CAPAs de cada CAM e as RMs delas)
+# ----------------------
+
+def _particoes_indice(indice: IndicePWA) -> dict:
+    particoes = {}
+    for capa in indice.capas:
+        particoes.setdefault(indice.capa_cam.get(capa, ''), []).append(capa)
+    return particoes
+
+
+def _sub_presenca(presenca: PresencaVolumes, lotes: set) -> PresencaVolumes:
+    return PresencaVolumes(
+        faltantes={l: v for l, v in presenca.faltantes.items() if l in lotes},
+        completo={l: v for l, v in presenca.completo.items() if l in lotes},
+        algum_presente={l: v for l, v in presenca.algum_presente.items() if l in lotes},
+        sem_volumes=presenca.sem_volumes & lotes,
+    )
+
+
+def _juntar_capas(resultados: list) -> tuple:
+    return tuple(juntar_tabelas([r[i] for r in resultados], 'CAPA') for i in range(3))
+
+
+def verificar_capas_por_lote_paralelo(indice: IndicePWA, singra_map: dict, lotes_disponiveis: set, processos: int):
+    """Mesmo resultado de verificar_capas_por_lote, com as CAPAs de cada CAM num processo."""
+    particoes = _particoes_indice(indice)
+    if processos < 2 or len(particoes) < 2:
+        return verificar_capas_por_lote(indice, singra_map, lotes_disponiveis)
+    with ConjuntoCompartilhado(lotes_disponiveis) as lotes:
+        tarefas = []
+        for capas in particoes.values():
+            sub = sub_indice(indice, capas)
+            sub_singra = {rm: singra_map[rm] for rm in sub.rm_tem_mapa if rm in singra_map}
+            tarefas.append(_pool(processos).apply_async(_executar_particao, ('lote', (sub, sub_singra), (lotes.nome,))))
+        return _juntar_capas([t.get() for t in tarefas])
+
+
+def verificar_capas_por_volume_paralelo(indice: IndicePWA, singra_map: dict, presenca: PresencaVolumes, processos: int):
+    """Mesmo resultado de verificar_capas_por_volume, com as CAPAs de cada CAM num processo."""
+    particoes = _particoes_indice(indice)
+    if processos < 2 or len(particoes) < 2:
+        return verificar_capas_por_volume(indice, singra_map, presenca)
+    tarefas = []
+    for capas in particoes.values():
+        sub = sub_indice(indice, capas)
+        sub_singra = {rm: singra_map[rm] for rm in sub.rm_tem_mapa if rm in singra_map}
+        lotes = {l for lotes_rm in sub.rm_lotes.values() for l in lotes_rm}
+        tarefas.append(_pool(processos).apply_async(
+            _executar_particao, ('volume', (sub, sub_singra, _sub_presenca(presenca, lotes)), ())
+        ))
+    return _juntar_capas([t.get() for t in tarefas])
+
+
+# ----------------------
+# main3.py: partições de linhas do PWA. Cada linha vai para o CAM da primeira linha da sua CAPA
+# (linhas sem CAPA, para o próprio CAM); CAMs que dividem uma RM ficam na mesma partição,
+# para a visão por RM ver todas as linhas da RM.
+# ----------------------
+
+def _rotulos_por_cam(df_pwa: pd.DataFrame) -> pd.Series:
+    capa = df_pwa['CAPA'].astype(str)
+    cam = df_pwa['CAM'].astype(str)
+    rm = df_pwa['PEDIDO_LIMPO'].astype(str)
+    rotulo = capa.map(cam.groupby(capa, sort=False).first()).where(capa != '', cam)
+
+    pai = {r: r for r in rotulo.unique()}
+
+    def raiz(r):
+        while pai[r] != r:
+            pai[r] = pai[pai[r]]
+            r = pai[r]
+        return r
+
+    pares = pd.DataFrame({'RM': rm, 'ROTULO': rotulo})[rm != ''].drop_duplicates()
+    divididas = pares[pares['RM'].duplicated(keep=False)]
+    for _, rotulos in divididas.groupby('RM', sort=False)['ROTULO']:
+        primeiro, *outros = [raiz(r) for r in rotulos]
+        for r in outros:
+            pai[r] = primeiro
+    return rotulo.map({r: raiz(r) for r in pai})
+
+
+def classificar_capas_estrito_paralelo(df_pwa: pd.DataFrame, lotes_disponiveis: set, pedidos_singra: set, processos: int):
+    """Mesmo resultado de classificar_capas_estrito: (df_rm_visao, capas), com uma partição por CAM."""
+    rotulos = _rotulos_por_cam(df_pwa) if processos > 1 and len(df_pwa) else None
+    if rotulos is None or rotulos.nunique() < 2:
+        return classificar_capas_estrito(df_pwa, lotes_disponiveis, pedidos_singra)
+    colunas = ['PEDIDO_LIMPO', 'CAPA', 'CAM', 'STATUS', 'MAPA', 'LOTE']
+    with ConjuntoCompartilhado(lotes_disponiveis) as lotes, ConjuntoCompartilhado(pedidos_singra) as pedidos:
+        tarefas = [
+            _pool(processos).apply_async(_executar_particao, ('estrito', (particao,), (lotes.nome, pedidos.nome)))
+            for _, particao in df_pwa[colunas].groupby(rotulos.to_numpy(), sort=False)
+        ]
+        resultados = [t.get() for t in tarefas]
+    df_rm_visao = juntar_tabelas([r[0] for r in resultados], 'RM')
+    capas = {nome: juntar_tabelas([r[1][nome] for r in resultados], 'CAPA') for nome in resultados[0][1]}
+    return df_rm_visao, capas
@@ -0,0 +1,86 @@
+import pandas as pd
+
+from controle_rm.compacto import COLUNAS_CATEGORICAS_PWA, COLUNAS_CATEGORICAS_SINGRA, compactar
+from controle_rm.normalizacao import mapa_to_intstr_serie, normalizar_codigo_rm_serie, normalizar_lote_serie
+
+# ----------------------
+# Normalização das fontes já lidas (texto), compartilhada pelos apps e pela conciliação.
+# Cada verificação do BLOCO 1 normaliza um pouco diferente e as diferenças ficam aqui, lado a lado:
+#   'lote'    main.py   PWA com MAPA inteiro e STATUS em maiúsculas; LOTE da conferência normalizado
+#   'volume'  main2.py  idem, limpando também VOLUME/PI/NOMENCLATURA/QTD; conferência (volumes) só sem espaços
+#   'estrito' main3.py  cabeçalhos sem BOM e em maiúsculas; PWA e SINGRA sem BOM, MAPA/STATUS como vieram;
+#                       LOTE normalizado sem BOM
+# ----------------------
+
+VARIANTES = ('lote', 'volume', 'estrito')
+
+_COLUNAS_TEXTO_PWA = ['PEDIDO', 'CAPA', 'MAPA', 'STC', 'CAM', 'LOTE', 'STATUS']
+_COLUNAS_TEXTO_PWA_VOLUME = _COLUNAS_TEXTO_PWA + ['VOLUME', 'PI', 'NOMENCLATURA', 'QTD']
+
+
+def _variante(variante: str) -> str:
+    if variante not in VARIANTES:
+        raise ValueError(f"variante desconhecida: {variante}")
+    return variante
+
+
+def limpar_nomes_colunas(df: pd.DataFrame, estrito: bool = False) -> pd.DataFrame:
+    """Sem aspas nem espaços; `estrito` (main3.py) também tira o BOM e põe em maiúsculas."""
+    df = df.copy()
+    colunas = [str(c).replace("'", "").replace('"', '') for c in df.columns]
+    if estrito:
+        colunas = [c.replace('\ufeff', '') for c in colunas]
+    df.columns = [c.strip().upper() if estrito else c.strip() for c in colunas]
+    return df
+
+
+def preparar_singra(df: pd.DataFrame, variante: str = 'lote') -> pd.DataFrame:
+    df = limpar_nomes_colunas(df, estrito=_variante(variante) == 'estrito').fillna('')
+    if variante == 'estrito':
+        # coluna ID com sujeira no nome: a primeira que contém 'ID'
+        if 'ID' not in df.columns:
+            extra = next((col for col in df.columns if 'ID' in col), None)
+            if extra is not None:
+                df = df.rename(columns={extra: 'ID'})
+        if 'ID' in df.columns:
+            df['ID'] = normalizar_codigo_rm_serie(df['ID'], remover_bom=True)
+        return compactar(df, COLUNAS_CATEGORICAS_SINGRA)
+
+    if 'ID' in df.columns:
+        df['ID'] = normalizar_codigo_rm_serie(df['ID'])
+    for col in ['SITUACAO', 'OMS', 'LISTA_WMS_ID']:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+    return compactar(df, COLUNAS_CATEGORICAS_SINGRA)
+
+
+def preparar_pwa(df: pd.DataFrame, variante: str = 'lote') -> pd.DataFrame:
+    estrito = _variante(variante) == 'estrito'
+    df = limpar_nomes_colunas(df, estrito=estrito).fillna('')
+    for col in _COLUNAS_TEXTO_PWA_VOLUME if variante == 'volume' else _COLUNAS_TEXTO_PWA:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+    # PEDIDO limpo para comparar (remove pontos e espaços)
+    if 'PEDIDO' in df.columns:
+        df['PEDIDO_LIMPO'] = normalizar_codigo_rm_serie(df['PEDIDO'], remover_bom=estrito)
+    else:
+        if not estrito:
+            df['PEDIDO'] = ''
+        df['PEDIDO_LIMPO'] = ''
+    if not estrito:
+        if 'MAPA' in df.columns:
+            df['MAPA'] = mapa_to_intstr_serie(df['MAPA'])
+        if 'STATUS' in df.columns:
+            df['STATUS'] = df['STATUS'].astype(str).str.strip().str.upper()
+    return compactar(df, COLUNAS_CATEGORICAS_PWA)
+
+
+def preparar_conferencia(df: pd.DataFrame, variante: str = 'lote') -> pd.DataFrame:
+    df = limpar_nomes_colunas(df, estrito=_variante(variante) == 'estrito').fillna('')
+    if 'LOTE' in df.columns:
+        if variante == 'volume':
+            # em main2.py a coluna LOTE da planilha traz os números de VOLUME
+            df['LOTE'] = df['LOTE'].astype(str).str.strip()
+        else:
+            df['LOTE'] = normalizar_lote_serie(df['LOTE'], remover_bom=variante == 'estrito')
+    return df
@@ -1,9 +1,19 @@
+import sqlite3
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import re
+from controle_rm.ao_vivo import Bloco1AoVivo, intervalo_ao_vivo
+from controle_rm.blocos import agregar_blocos, lotes_confirmados
+from controle_rm.cache_disco import cache_em_disco
+from controle_rm.conferencia import PlanilhaGoogle, diretorio_conferencia, ler_conferencia, sincronizar_conferencia
+from controle_rm.desempenho import Medidor, desempenho_ativo
+from controle_rm.etapas import impressao_digital, impressao_digital_df
+from controle_rm.historico import arquivo_historico, classificacao_bloco1, registrar_execucao
+from controle_rm.indices import construir_indice_pwa, construir_singra_map, construir_tabela_rms
+from controle_rm.ingestao import ler_pwa
+from controle_rm.interface import carregar_fontes, consulta_historico, consulta_rapida_rms, exibir_blocos_2a5, exportar_resultados, painel_desempenho, tabela_paginada
+from controle_rm.motor_sql import agregar_blocos_sql, construir_singra_map_sql, motor_execucao
+from controle_rm.paralelo import processos_bloco1, verificar_capas_por_lote_paralelo
+from controle_rm.preparo import preparar_conferencia, preparar_pwa, preparar_singra
 
 st.set_page_config(page_title="Controle de RM atendidas", layout="wide")
 st.title("📦 Controle de RMs - Estocagem e Expedição")
@@ -12,27 +22,6 @@ st.markdown("Sistema: PWA = fonte da verdade. BLOCO 1 agora considera somente RM
 # ----------------------
 # Utilitários / Normalização
 # ----------------------
-def clean_colnames(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    newcols = []
-    for c in df.columns:
-        c2 = str(c).replace("'", "").replace('"', '').strip()
-        newcols.append(c2)
-    df.columns = newcols
-    return df
-
-def normalizar_codigo_rm(valor):
-    if pd.isna(valor) or str(valor).strip() == '':
-        return ''
-    s = str(valor).strip().replace("'", "").replace('"', "")
-    s = s.replace(".", "").replace(",", "").replace(" ", "")
-    return s
-
-def normalizar_lote(valor):
-    if pd.isna(valor):
-        return ''
-    return str(valor).strip().replace("'", "").replace('"', '')
-
 def singra_indica_em_expedicao(val: str) -> bool:
     if pd.isna(val) or str(val).strip() == '':
         return False
@@ -43,69 +32,65 @@ def singra_indica_em_expedicao(val: str) -> bool:
 # Cache: carregamento arquivos
 # ----------------------
 @st.cache_data
+@cache_em_disco('main.singra')
 def carregar_singra(file):
-    df = pd.read_csv(file, sep=';', encoding='latin1', dtype=str, low_memory=False)
-    df = clean_colnames(df)
-    df = df.fillna('')
-    # Normalizações
-    if 'ID' in df.columns:
-        df['ID'] = df['ID'].apply(normalizar_codigo_rm)
-    if 'SITUACAO' in df.columns:
-        df['SITUACAO'] = df['SITUACAO'].astype(str).str.strip()
-    if 'OMS' in df.columns:
-        df['OMS'] = df['OMS'].astype(str).str.strip()
-    if 'LISTA_WMS_ID' in df.columns:
-        df['LISTA_WMS_ID'] = df['LISTA_WMS_ID'].astype(str).str.strip()
-    return df
+    return preparar_singra(pd.read_csv(file, sep=';', encoding='latin1', dtype=str, low_memory=False), 'lote')
 
 @st.cache_data
+@cache_em_disco('main.pwa')
 def carregar_pwa(file):
-    df = pd.read_excel(file, sheet_name=0, dtype=str)
-    df = clean_colnames(df)
-    df = df.fillna('')
-    for col in ['PEDIDO', 'CAPA', 'MAPA', 'STC', 'CAM', 'LOTE', 'STATUS']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-    # PEDIDO limpo para comparar (remove pontos e espaços)
-    if 'PEDIDO' in df.columns:
-        df['PEDIDO_LIMPO'] = df['PEDIDO'].apply(normalizar_codigo_rm)
-    else:
-        df['PEDIDO'] = ''
-        df['PEDIDO_LIMPO'] = ''
-    # Normalize MAPA to integer-like string
-    if 'MAPA' in df.columns:
-        def mapa_to_intstr(x):
-            x = str(x).strip()
-            if x == '' or x.upper() == 'NAN':
-                return ''
-            try:
-                if '.' in x:
-                    return str(int(float(x)))
-                return x
-            except:
-                return x
-        df['MAPA'] = df['MAPA'].apply(mapa_to_intstr)
-    # Upper STATUS
-    if 'STATUS' in df.columns:
-        df['STATUS'] = df['STATUS'].astype(str).str.strip().str.upper()
-    return df
+    # somente as colunas usadas pelos blocos, lidas em streaming (calamine quando instalado),
+    # num processo do pool quando CONTROLE_RM_PROCESSOS > 1
+    return preparar_pwa(ler_pwa(file), 'lote')
+
+def preparar_lotes_google(df: pd.DataFrame) -> pd.DataFrame:
+    return preparar_conferencia(df, 'lote')
 
 @st.cache_data(ttl=3600)
 def carregar_lotes_google(credentials_dict: dict, sheet_url: str):
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(
-        credentials_dict,
-        ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    )
-    client = gspread.authorize(creds)
-    sheet = client.open_by_url(sheet_url)
-    worksheet = sheet.get_worksheet(0)
-    data = worksheet.get_all_records()
-    df = pd.DataFrame(data)
-    df = clean_colnames(df)
-    df = df.fillna('')
-    if 'LOTE' in df.columns:
-        df['LOTE'] = df['LOTE'].apply(normalizar_lote)
-    return df
+    # releitura completa da planilha
+    return preparar_lotes_google(ler_conferencia(PlanilhaGoogle.de_credenciais(credentials_dict, sheet_url)))
+
+@st.cache_resource
+def conectar_planilha_google(credentials_dict: dict, sheet_url: str):
+    return PlanilhaGoogle.de_credenciais(credentials_dict, sheet_url)
+
+@st.cache_data(ttl=15)
+def carregar_lotes_google_incremental(credentials_dict: dict, sheet_url: str):
+    # busca só as linhas novas desde a última leitura (snapshot local da planilha)
+    backend = conectar_planilha_google(credentials_dict, sheet_url)
+    return preparar_lotes_google(sincronizar_conferencia(backend, diretorio_conferencia(sheet_url)))
+
+# ----------------------
+# Etapas em cache: chaveadas pela impressão digital das entradas, de modo que
+# interagir com filtros (fragments) não refaz mapas, índices nem blocos
+# ----------------------
+@st.cache_resource(max_entries=4)
+def carregar_indice_pwa(chave_pwa: str, _df_pwa: pd.DataFrame):
+    # índice somente leitura, construído uma vez por upload do PWA
+    return construir_indice_pwa(_df_pwa)
+
+@st.cache_resource(max_entries=4)
+def carregar_tabela_rms(chave_pwa: str, _df_pwa: pd.DataFrame):
+    # RM -> MAPAs / STCs / STATUS para a consulta rápida
+    return construir_tabela_rms(_df_pwa)
+
+@st.cache_resource(max_entries=4)
+def carregar_singra_map(chave_singra: str, motor: str, _df_singra: pd.DataFrame):
+    if motor == 'duckdb':
+        return construir_singra_map_sql(_df_singra)
+    return construir_singra_map(_df_singra)
+
+@st.cache_data(max_entries=8)
+def etapa_bloco1(chave_pwa: str, chave_singra: str, chave_lotes: str, processos: int, _indice_pwa, _singra_map: dict, _lotes_disponiveis: set):
+    # processos > 1: CAPAs de cada CAM num processo do pool (mesmas tabelas)
+    return verificar_capas_por_lote_paralelo(_indice_pwa, _singra_map, _lotes_disponiveis, processos)
+
+@st.cache_data(max_entries=8)
+def etapa_blocos_2a5(chave_pwa: str, chave_lotes: str, motor: str, _df_pwa: pd.DataFrame, _lotes_validos: set):
+    if motor == 'duckdb':
+        return agregar_blocos_sql(_df_pwa, _lotes_validos)
+    return agregar_blocos(_df_pwa, _lotes_validos)
 
 # ----------------------
 # UI: Uploads
@@ -113,6 +98,14 @@ def carregar_lotes_google(credentials_dict: dict, sheet_url: str):
 with st.expander("📄 Upload de arquivos"):
     singra_file = st.file_uploader("Upload planilha do SINGRA (.csv)", type=["csv"])
     pwa_file = st.file_uploader("Upload planilha do PWA (.xlsx)", type=["xlsx"])
+    sync_incremental = st.checkbox("Sincronização incremental da planilha de conferência (Google)", value=True,
+                                   help="Busca só as linhas novas a cada 15 s; desmarcado, relê a planilha inteira a cada hora.")
+    ao_vivo = st.checkbox(f"Ao vivo: atualizar o BLOCO 1 com a conferência a cada {intervalo_ao_vivo()} s", value=False,
+                          help="Durante o carregamento: relê só as linhas novas da planilha e reavalia só as CAPAs dos lotes "
+                               "recém-conferidos, sem refazer o resto da página. "
+                               "O histórico grava o BLOCO 1 a cada execução completa da página.")
+    medir_desempenho = st.checkbox("Medir desempenho das etapas", value=desempenho_ativo(),
+                                   help="Tempo, linhas e memória de cada etapa no painel Desempenho (fim da página) e no log.")
 
 if not (singra_file and pwa_file):
     st.info("Faça upload do SINGRA (.csv) e do PWA (.xlsx) para prosseguir.")
@@ -121,28 +114,29 @@ if not (singra_file and pwa_file):
 # ----------------------
 # Carrega dados (cached)
 # ----------------------
-df_singra = carregar_singra(singra_file)
-df_pwa = carregar_pwa(pwa_file)
-
-# Carregar planilha de lotes (Google Sheets)
+medidor = Medidor('main', ativo=medir_desempenho)
+motor = motor_execucao()  # 'pandas' ou 'duckdb' (CONTROLE_RM_MOTOR)
+processos = processos_bloco1()  # BLOCO 1 por CAM em N processos (CONTROLE_RM_PROCESSOS)
+# SINGRA, PWA e planilha de lotes (Google Sheets) carregados ao mesmo tempo
 SHEET_URL = "https://docs.google.com/spreadsheets/d/1naVnAlUGmeAMb_YftLGYit-1e1BcYFJgiJwSnOcgJf4/edit?gid=0"
 service_account_dict = dict(st.secrets["gcp_service_account"])
-df_lotes_user = carregar_lotes_google(service_account_dict, SHEET_URL)
+carregar_conferencia = carregar_lotes_google_incremental if (sync_incremental or ao_vivo) else carregar_lotes_google
+fontes = carregar_fontes({
+    "SINGRA (carregar)": (carregar_singra, (singra_file,)),
+    "PWA (carregar)": (carregar_pwa, (pwa_file,)),
+    "Conferência (Google)": (carregar_conferencia, (service_account_dict, SHEET_URL)),
+}, medidor)
+df_singra, df_pwa, df_lotes_user = fontes["SINGRA (carregar)"], fontes["PWA (carregar)"], fontes["Conferência (Google)"]
+chave_singra = impressao_digital(singra_file, 'main.singra')
+chave_pwa = impressao_digital(pwa_file, 'main.pwa')
+chave_lotes = impressao_digital_df(df_lotes_user)
+indice_pwa = medidor.medir("Índice do PWA", carregar_indice_pwa, chave_pwa, df_pwa, linhas=len(df_pwa))
 
 # Preprocess: set de lotes disponíveis na conferência (Google)
 lotes_disponiveis = set(df_lotes_user['LOTE'].astype(str).tolist()) if 'LOTE' in df_lotes_user.columns else set()
 
 # Map SINGRA: RM -> {SITUACAO, OMS}
-singra_map = {}
-if 'ID' in df_singra.columns:
-    for rm, grp in df_singra.groupby('ID'):
-        situ = grp['SITUACAO'].iloc[0] if 'SITUACAO' in df_singra.columns else ''
-        oms = grp['OMS'].iloc[0] if 'OMS' in df_singra.columns else ''
-        singra_map[rm] = {'SITUACAO': situ, 'OMS': oms}
-
-# Precompute PWA maps for performance
-pwa_lotes_map = {pedido: sorted(set(g['LOTE'].astype(str).tolist())) for pedido, g in df_pwa.groupby('PEDIDO_LIMPO')}
-capa_to_rms = {capa: sorted(df_pwa[df_pwa['CAPA'] == capa]['PEDIDO_LIMPO'].unique().tolist()) for capa in sorted(df_pwa['CAPA'].unique().tolist())}
+singra_map = medidor.medir("Mapa do SINGRA", carregar_singra_map, chave_singra, motor, df_singra)
 
 # Quick metrics
 c1, c2, c3 = st.columns(3)
@@ -155,311 +149,128 @@ c3.metric("Lotes na planilha (Google)", len(lotes_disponiveis))
 # ----------------------
 st.markdown("### 🔍 Consulta rápida de RMs (via texto)")
 with st.expander("Consultar RMs colando mensagem"):
-    texto_rms = st.text_area("Cole aqui a mensagem com as RMs", height=180)
-    if st.button("🔎 Consultar RMs no sistema"):
-        if texto_rms.strip():
-            rms_extraidas = re.findall(r"\b\d{2}\.\d{3}\.\d{3}\b", texto_rms)
-            if rms_extraidas:
-                rms_sem_ponto = [rm.replace(".", "") for rm in rms_extraidas]
-                df_filtro = df_pwa[df_pwa['PEDIDO_LIMPO'].isin(rms_sem_ponto)]
-                resultados = []
-                for rm_texto, rm_limpo in zip(rms_extraidas, rms_sem_ponto):
-                    dados_rm = df_filtro[df_filtro['PEDIDO_LIMPO'] == rm_limpo]
-                    if not dados_rm.empty:
-                        mapa = ', '.join(sorted(set([m for m in dados_rm['MAPA'] if m and m != '']))) or "Não consta"
-                        stc  = ', '.join(sorted(set([s for s in dados_rm['STC'] if s and s != '']))) or "Não consta"
-                        status = ', '.join(sorted(set(dados_rm['STATUS']))) if 'STATUS' in dados_rm.columns else ''
-                    else:
-                        mapa = "Não consta"
-                        stc = "Não consta"
-                        status = ""
-                    resultados.append({
-                        "RM (texto)": rm_texto,
-                        "RM (planilha)": rm_limpo,
-                        "STATUS (PWA)": status,
-                        "MAPA": mapa,
-                        "STC": stc
-                    })
-                st.dataframe(pd.DataFrame(resultados).style.set_properties(**{'text-align':'left'}), use_container_width=True)
-            else:
-                st.warning("⚠️ Nenhuma RM válida encontrada no texto.")
-        else:
-            st.info("Cole o texto e clique em Consultar.")
+    consulta_rapida_rms(medidor.medir("Tabela de RMs (consulta)", carregar_tabela_rms, chave_pwa, df_pwa))
+
+st.markdown("### 🕓 Histórico de execuções anteriores")
+with st.expander("Consultar histórico de RM, CAPA ou LOTE"):
+    consulta_historico()
 
 # ----------------------
 # BLOCO 1 – NOVA LÓGICA (somente RMs sem MAPA)
 # ----------------------
 st.markdown("## 🔵 BLOCO 1 — CAPA: verificação (somente RMs sem MAPA)")
 
-required_pwa_cols = ['PEDIDO_LIMPO', 'LOTE', 'CAPA', 'CAM', 'STATUS']
-if not all(c in df_pwa.columns for c in required_pwa_cols):
-    st.error("Colunas essenciais faltando no PWA: preciso de PEDIDO/LOTE/CAPA/CAM/STATUS.")
-else:
-    capas = sorted(df_pwa['CAPA'].unique().tolist())
-    capa_completa_rows = []
-    capa_incompleta_rows = []
-    migration_errors = []  # tabela separada para RMs que não existem no SINGRA
-
-    for capa in capas:
-        rms_da_capa = capa_to_rms.get(capa, [])
-        cam = df_pwa[df_pwa['CAPA'] == capa]['CAM'].iloc[0] if len(df_pwa[df_pwa['CAPA'] == capa]) > 0 else ''
-        pendencias = []
-
-        # Consider only RMs that do NOT have MAPA (all rows for that pedido must have MAPA == '')
-        rms_considered = []
-        for rm in rms_da_capa:
-            df_rm_rows = df_pwa[df_pwa['PEDIDO_LIMPO'] == rm]
-            # RM has MAPA if any row has MAPA not empty
-            rm_has_mapa = df_rm_rows['MAPA'].apply(lambda x: str(x).strip() != '').any()
-            if not rm_has_mapa:
-                rms_considered.append(rm)
-            # else: skip RM for bloco1 because it already has MAPA and belongs to other flow
-
-        # If no RMS to consider (all RMs have MAPA), skip showing this CAPA (it's handled elsewhere)
-        if len(rms_considered) == 0:
-            continue
-
-        # For each RM considered: check if all PWA LOTES are present in the Google sheet (planilha de conferência)
-        for rm in rms_considered:
-            lotes_pwa = pwa_lotes_map.get(rm, [])
-            # Check if RM exists in SINGRA
-            singra_info = singra_map.get(rm)
-            if not singra_info:
-                # record migration error (and also treat as a pendency for this CAPA)
-                migration_errors.append({
-                    "RM": rm,
-                    "CAPA": capa,
-                    "CAM": cam,
-                    "Erro": "RM não encontra-se em Expedição no SINGRA"
-                })
-                pendencias.append(f"{rm} (Status SINGRA não migrou)")
-                continue
-
-            # Verify lotes presence in Google "lotes_disponiveis"
-            faltando = [l for l in lotes_pwa if l not in lotes_disponiveis]
-            if faltando:
-                pendencias.append(f"{rm} – faltando lotes: {', '.join(faltando)}")
-
-        # Decide CAPA status
-        if len(pendencias) == 0:
-            capa_completa_rows.append({"CAM": cam, "CAPA": capa, "RMs": ', '.join(rms_considered)})
-        else:
-            capa_incompleta_rows.append({"CAM": cam, "CAPA": capa, "Pendências": '; '.join(pendencias)})
-
-    df_capa_completa = pd.DataFrame(capa_completa_rows)
-    df_capa_incompleta = pd.DataFrame(capa_incompleta_rows)
-    df_migration_errors = pd.DataFrame(migration_errors)
-
-    # Resumo
-    ca, cb = st.columns(2)
-    ca.success(f"CAPAs totalmente atendidas (apenas RMs sem MAPA): {len(df_capa_completa)}")
-    cb.warning(f"CAPAs com pendências (considerando RMs sem MAPA): {len(df_capa_incompleta)}")
-
-    st.subheader("✅ CAPAs completamente atendidas (somente RMs sem MAPA)")
-    if not df_capa_completa.empty:
-        st.dataframe(df_capa_completa.style.set_properties(**{'text-align':'left'}), use_container_width=True)
-    else:
-        st.info("Nenhuma CAPA completamente atendida (considerando somente RMs sem MAPA).")
-
-    st.subheader("⚠️ CAPAs parcialmente atendidas (detalhes)")
-    if not df_capa_incompleta.empty:
-        st.dataframe(df_capa_incompleta.style.set_properties(**{'text-align':'left'}), use_container_width=True)
-    else:
-        st.info("Nenhuma CAPA parcialmente atendida encontrada (para RMs sem MAPA).")
-
-    st.subheader("🚨 RMs do PWA que não constam no SINGRA (migração)")
-    if not df_migration_errors.empty:
-        st.dataframe(df_migration_errors.style.set_properties(**{'text-align':'left'}), use_container_width=True)
-    else:
-        st.info("Nenhuma RM do PWA ausente no SINGRA encontrada.")
-
-# ----------------------
-# BLOCO 2: MAPA sem STC (agrupar por CAM e MAPA) — excluir STATUS EXPEDIDO
-# ----------------------
-st.markdown("## 🔷 BLOCO 2 — MAPA sem STC (agrupar por CAM e MAPA)")
-if all(c in df_pwa.columns for c in ['MAPA','STC','STATUS','CAM','CAPA']):
-    df_mapa_sem_stc = df_pwa[
-        (df_pwa['MAPA'] != '') &
-        (df_pwa['STC'] == '') &
-        (df_pwa['STATUS'] != 'EXPEDIDO')
-    ]
-    if df_mapa_sem_stc.empty:
-        st.info("Nenhuma MAPA sem STC (após filtrar EXPEDIDO).")
-    else:
-        agrupado_mapa = (
-            df_mapa_sem_stc.groupby(['CAM','MAPA'])
-            .agg({'CAPA': lambda x: ', '.join(sorted(set(x)))})
-            .reset_index()
+def bloco1(ao_vivo: bool):
+    # ao vivo: fragment refeito a cada intervalo_ao_vivo() s, com a conferência relida e só as CAPAs afetadas reavaliadas
+    if ao_vivo:
+        df_conferencia = medidor.medir("Conferência (ao vivo)", carregar_lotes_google_incremental, service_account_dict, SHEET_URL)
+        lotes_conferidos = set(df_conferencia['LOTE'].astype(str).tolist()) if 'LOTE' in df_conferencia.columns else set()
+        estado = st.session_state.setdefault('_bloco1_ao_vivo', Bloco1AoVivo())
+        tabelas = medidor.medir(
+            "BLOCO 1 (ao vivo)", estado.verificar_por_lote, (chave_pwa, chave_singra), indice_pwa, singra_map, lotes_conferidos, processos
         )
-        cams = ["Todos"] + sorted(agrupado_mapa['CAM'].unique().tolist())
-        cam_sel = st.selectbox("Filtrar por CAM (Bloco 2)", cams)
-        display = agrupado_mapa if cam_sel == "Todos" else agrupado_mapa[agrupado_mapa['CAM'] == cam_sel]
-        st.dataframe(display.style.set_properties(**{'text-align':'left'}), use_container_width=True)
-else:
-    st.info("Colunas necessárias para Bloco 2 ausentes no PWA.")
-
-# ----------------------
-# BLOCO 3: MAPA sem STC + LOTE confirmado na expedição
-# ----------------------
-st.markdown("## 🔷 BLOCO 3 — MAPA sem STC com LOTE confirmado na expedição (agrupar por CAM e MAPA)")
-
-# Verificar colunas necessárias
-if all(c in df_pwa.columns for c in ['MAPA','STC','STATUS','CAM','CAPA','LOTE']) and \
-   'LOTE' in df_lotes_user.columns:
-
-    # MAPA sem STC e não expedido
-    df_mapa_sem_stc = df_pwa[
-        (df_pwa['MAPA'] != '') &
-        (df_pwa['STC'] == '') &
-        (df_pwa['STATUS'] != 'EXPEDIDO')
-    ]
-
-    # Se nada encontrado, parar
-    if df_mapa_sem_stc.empty:
-        st.info("Nenhuma MAPA sem STC encontrada para este filtro.")
+        st.caption(f"🔴 Ao vivo — conferência lida às {estado.resumo['hora']}: {len(lotes_conferidos)} lotes, "
+                   f"{estado.resumo['capas']} CAPAs reavaliadas.")
     else:
+        tabelas = medidor.medir(
+            "BLOCO 1", etapa_bloco1, chave_pwa, chave_singra, chave_lotes, processos, indice_pwa, singra_map, lotes_disponiveis
+        )
+    df_capa_completa, df_capa_incompleta, df_migration_errors = tabelas
 
-        # Padronizar LOTE para comparação
-        df_mapa_sem_stc['LOTE'] = df_mapa_sem_stc['LOTE'].astype(str).str.strip()
-        df_lotes_user['LOTE']   = df_lotes_user['LOTE'].astype(str).str.strip()
-
-        # Obter lotes realmente confirmados
-        lotes_validos = set(df_lotes_user['LOTE'].unique())
+    with medidor.etapa("BLOCO 1 (tela)", len(df_capa_completa) + len(df_capa_incompleta) + len(df_migration_errors)):
+        # Resumo
+        ca, cb = st.columns(2)
+        ca.success(f"CAPAs totalmente atendidas (apenas RMs sem MAPA): {len(df_capa_completa)}")
+        cb.warning(f"CAPAs com pendências (considerando RMs sem MAPA): {len(df_capa_incompleta)}")
 
-        # Filtrar somente linhas cujos lotes constam na planilha de LOTE
-        df_mapa_com_lote_real = df_mapa_sem_stc[df_mapa_sem_stc['LOTE'].isin(lotes_validos)]
+        st.subheader("✅ CAPAs completamente atendidas (somente RMs sem MAPA)")
+        if not df_capa_completa.empty:
+            tabela_paginada(df_capa_completa, "capa_completa")
+        else:
+            st.info("Nenhuma CAPA completamente atendida (considerando somente RMs sem MAPA).")
 
-        if df_mapa_com_lote_real.empty:
-            st.info("Nenhuma MAPA sem STC possui lote confirmado na expedição.")
+        st.subheader("⚠️ CAPAs parcialmente atendidas (detalhes)")
+        if not df_capa_incompleta.empty:
+            tabela_paginada(df_capa_incompleta, "capa_incompleta")
         else:
-            # Agrupar igual ao bloco 3
-            agrupado_mapa5 = (
-                df_mapa_com_lote_real.groupby(['CAM', 'MAPA'])
-                .agg({'CAPA': lambda x: ', '.join(sorted(set(x))),
-                      'LOTE': lambda x: ', '.join(sorted(set(x)))})
-                .reset_index()
-            )
-
-            # Filtro por CAM
-            cams5 = ["Todos"] + sorted(agrupado_mapa5['CAM'].unique().tolist())
-            cam_sel5 = st.selectbox("Filtrar por CAM (Bloco 3)", cams5)
-
-            display5 = agrupado_mapa5 if cam_sel5 == "Todos" else agrupado_mapa5[agrupado_mapa5['CAM'] == cam_sel5]
-
-            # Exibir
-            st.dataframe(
-                display5.style.set_properties(**{'text-align':'left'}),
-                use_container_width=True
-            )
+            st.info("Nenhuma CAPA parcialmente atendida encontrada (para RMs sem MAPA).")
 
-else:
-    st.info("Colunas necessárias para Bloco 3 ausentes no PWA ou no arquivo de LOTE.")
+        st.subheader("🚨 RMs do PWA que não constam no SINGRA (migração)")
+        if not df_migration_errors.empty:
+            tabela_paginada(df_migration_errors, "migration_errors")
+        else:
+            st.info("Nenhuma RM do PWA ausente no SINGRA encontrada.")
+    return tabelas
 
-# ----------------------
-# BLOCO 4: STC não expedidas (agrupar por CAM e STC)
-# ----------------------
-st.markdown("## 🔶 BLOCO 4 — STC não expedidas (agrupar por CAM e STC)")
-if all(c in df_pwa.columns for c in ['STC','STATUS','CAM','MAPA']):
-    df_stc_nao_expedida = df_pwa[
-        (df_pwa['STC'] != '') &
-        (df_pwa['STATUS'] != 'EXPEDIDO') &
-        (df_pwa['STATUS'] != 'CANCELADO')
-    ]
-    if df_stc_nao_expedida.empty:
-        st.info("Nenhuma STC pendente.")
-    else:
-        agrupado_stc = (
-            df_stc_nao_expedida.groupby(['CAM','STC'])
-            .agg({'MAPA': lambda x: ', '.join(sorted(set([m for m in x if m and m != ''])))})
-            .reset_index()
-        )
-        cams3 = ["Todos"] + sorted(agrupado_stc['CAM'].unique().tolist())
-        cam_sel3 = st.selectbox("Filtrar por CAM (Bloco 4)", cams3)
-        display3 = agrupado_stc if cam_sel3 == "Todos" else agrupado_stc[agrupado_stc['CAM'] == cam_sel3]
-        st.dataframe(display3.style.set_properties(**{'text-align':'left'}), use_container_width=True)
+required_pwa_cols = ['PEDIDO_LIMPO', 'LOTE', 'CAPA', 'CAM', 'STATUS']
+if not all(c in df_pwa.columns for c in required_pwa_cols):
+    st.error("Colunas essenciais faltando no PWA: preciso de PEDIDO/LOTE/CAPA/CAM/STATUS.")
 else:
-    st.info("Colunas necessárias para Bloco 4 ausentes no PWA.")
-
-# ============================
-# 🔷 BLOCO 5 — STC não expedidas (agrupar por CAM e STC) com LOTE confirmado na Expedição
-# ============================
-
-st.markdown("## 🔷 BLOCO 5 — STC com lote confirmado na expedição (agrupar por CAM e STC)")
+    df_capa_completa, df_capa_incompleta, df_migration_errors = st.fragment(bloco1, run_every=intervalo_ao_vivo() if ao_vivo else None)(ao_vivo)
 
-# Verificar se todas as colunas necessárias existem
-if all(c in df_pwa.columns for c in ['STC','STATUS','CAM','MAPA','LOTE']) and \
-   'LOTE' in df_lotes_user.columns:
-
-    # Selecionar apenas STC válidas
-    df_stc_validas = df_pwa[
-        (df_pwa['STC'] != '') &
-        (df_pwa['STATUS'] != 'EXPEDIDO') &
-        (df_pwa['STATUS'] != 'CANCELADO')
-    ]
+def bloco1_atual():
+    # (chave, tabelas) do BLOCO 1 na tela: no modo ao vivo, o da última rodada do fragment, que
+    # roda sozinho e pode estar à frente do resto da página; senão, o desta execução
+    estado = st.session_state.get('_bloco1_ao_vivo')
+    if ao_vivo and estado is not None and estado.resultado is not None and estado.entradas == (chave_pwa, chave_singra):
+        return f"{chave_pwa}:{chave_singra}:{estado.chave_conferidos()}", estado.resultado
+    return f"{chave_pwa}:{chave_singra}:{chave_lotes}", (df_capa_completa, df_capa_incompleta, df_migration_errors)
 
-    # Garantir que o LOTE seja comparável (remover espaços e converter para string)
-    df_stc_validas['LOTE'] = df_stc_validas['LOTE'].astype(str).str.strip()
-    df_lotes_user['LOTE'] = df_lotes_user['LOTE'].astype(str).str.strip()
-
-    # Filtrar apenas LOTE realmente existente na planilha LOTE (Google Sheets)
-    lotes_validos = set(df_lotes_user['LOTE'].unique())
-    df_stc_com_lote_real = df_stc_validas[df_stc_validas['LOTE'].isin(lotes_validos)]
-
-    if df_stc_com_lote_real.empty:
-        st.info("Nenhuma STC encontrada com lote confirmado na expedição.")
-    else:
-        # Agrupar (mesmo modelo do bloco 5)
-        agrupado_stc4 = (
-            df_stc_com_lote_real.groupby(['CAM','STC'])
-            .agg({
-                'MAPA': lambda x: ', '.join(sorted(set([m for m in x if m and m != '']))),
-                'LOTE': lambda x: ', '.join(sorted(set(x)))
-            })
-            .reset_index()
-        )
+# BLOCOS 2-5 calculados juntos (uma passada sobre o PWA)
+lotes_validos = lotes_confirmados(df_lotes_user) if 'LOTE' in df_lotes_user.columns else None
+blocos = medidor.medir("BLOCOS 2-5", etapa_blocos_2a5, chave_pwa, chave_lotes, motor, df_pwa, lotes_validos)
 
-        # Filtro por CAM
-        cams4 = ["Todos"] + sorted(agrupado_stc4['CAM'].unique().tolist())
-        cam_sel4 = st.selectbox("Filtrar por CAM (Bloco 5)", cams4)
+# BLOCOS 2-5: MAPA sem STC e STC não expedidas, com e sem LOTE confirmado na expedição
+exibidas_blocos = exibir_blocos_2a5(blocos, df_pwa, df_lotes_user, medidor)
+agrupado_mapa = exibidas_blocos.get('mapa_sem_stc', pd.DataFrame())
+agrupado_stc = exibidas_blocos.get('stc_nao_expedida', pd.DataFrame())
 
-        display4 = agrupado_stc4 if cam_sel4 == "Todos" else agrupado_stc4[agrupado_stc4['CAM'] == cam_sel4]
-
-        # Exibir tabela
-        st.dataframe(
-            display4.style.set_properties(**{'text-align':'left'}),
-            use_container_width=True
-        )
+# ----------------------
+# Histórico (SQLite): entradas e classificação do BLOCO 1 desta execução, uma vez por dia e conteúdo
+# ----------------------
+if arquivo_historico():
+    entradas_historico = {
+        "PWA": (chave_pwa, df_pwa),
+        "SINGRA": (chave_singra, df_singra),
+        "CONFERENCIA": (chave_lotes, df_lotes_user),
+    }
+    if 'df_capa_completa' in locals():
+        # no modo ao vivo, as rodadas do fragment entram no histórico na próxima execução completa da página
+        chave_bloco1, tabelas_bloco1 = bloco1_atual()
+        entradas_historico["BLOCO1"] = (chave_bloco1, lambda: classificacao_bloco1(*tabelas_bloco1))
+    try:
+        medidor.medir("Histórico (gravar)", registrar_execucao, 'main', entradas_historico)
+    except (sqlite3.Error, OSError) as e:
+        st.warning(f"⚠️ Histórico não gravado: {e}")
 
 # ----------------------
-# Exportação Excel (inclui debug tables)
+# Exportação (inclui debug tables): Excel em modo constant_memory ou ZIP com os uploads
+# originais; o arquivo gerado fica em cache enquanto as entradas não mudarem
 # ----------------------
-def to_excel(dfs, names):
-    out = BytesIO()
-    with pd.ExcelWriter(out, engine='xlsxwriter') as writer:
-        for df, name in zip(dfs, names):
-            try:
-                df.to_excel(writer, sheet_name=name, index=False)
-            except Exception:
-                pd.DataFrame(df).to_excel(writer, sheet_name=name, index=False)
-    return out.getvalue()
+def bloco1_exportacao():
+    chave_bloco1, (completa, incompleta, migracao) = bloco1_atual()
+    return chave_bloco1, {"CAPA_Atendidas": completa, "CAPA_Pendentes": incompleta, "MIGRATION_ERRORS": migracao}
 
 with st.expander("📥 Exportar resultados"):
-    if st.button("Gerar Excel de saída"):
-        export_dfs = [
-            df_capa_completa if 'df_capa_completa' in locals() else pd.DataFrame(),
-            df_capa_incompleta if 'df_capa_incompleta' in locals() else pd.DataFrame(),
-            agrupado_mapa if 'agrupado_mapa' in locals() else pd.DataFrame(),
-            agrupado_stc if 'agrupado_stc' in locals() else pd.DataFrame(),
-            df_singra if 'df_singra' in locals() else pd.DataFrame(),
-            df_pwa if 'df_pwa' in locals() else pd.DataFrame(),
-            df_lotes_user if 'df_lotes_user' in locals() else pd.DataFrame(),
-            df_migration_errors if 'df_migration_errors' in locals() else pd.DataFrame()
-        ]
-        names = ["CAPA_Atendidas", "CAPA_Pendentes", "MAPA_sem_STC", "STC_nao_expedida", "SINGRA_RAW", "PWA_RAW", "LOTES_CONFERENCIA", "MIGRATION_ERRORS"]
-        excel_bytes = to_excel(export_dfs, names)
-        st.download_button(
-            label="📥 Baixar Excel completo",
-            data=excel_bytes,
-            file_name="resultado_controle_rm_completo.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    if ao_vivo:
+        st.caption("🔴 Ao vivo: o BLOCO 1 sai da última rodada; as demais tabelas, da última execução completa da página.")
+    export_dfs = [
+        df_capa_completa if 'df_capa_completa' in locals() else pd.DataFrame(),
+        df_capa_incompleta if 'df_capa_incompleta' in locals() else pd.DataFrame(),
+        agrupado_mapa,
+        agrupado_stc,
+        df_singra if 'df_singra' in locals() else pd.DataFrame(),
+        df_pwa if 'df_pwa' in locals() else pd.DataFrame(),
+        df_lotes_user if 'df_lotes_user' in locals() else pd.DataFrame(),
+        df_migration_errors if 'df_migration_errors' in locals() else pd.DataFrame()
+    ]
+    names = ["CAPA_Atendidas", "CAPA_Pendentes", "MAPA_sem_STC", "STC_nao_expedida", "SINGRA_RAW", "PWA_RAW", "LOTES_CONFERENCIA", "MIGRATION_ERRORS"]
+    exportar_resultados(
+        f"{chave_pwa}:{chave_singra}:{chave_lotes}",
+        dict(zip(names, export_dfs)),
+        {"SINGRA_RAW": singra_file, "PWA_RAW": pwa_file},
+        medidor,
+        atualizar=bloco1_exportacao if 'df_capa_completa' in locals() else None
+    )
+
+painel_desempenho(medidor)
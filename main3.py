@@ -1,102 +1,114 @@
+import functools
+import sqlite3
+import time
 import streamlit as st
 import pandas as pd
-import numpy as np
 from io import BytesIO
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import re
+from controle_rm.ao_vivo import intervalo_ao_vivo
+from controle_rm.blocos import agregar_blocos
+from controle_rm.cache_disco import arquivo_em_disco, cache_em_disco
+from controle_rm.conferencia import PlanilhaGoogle, diretorio_conferencia, ler_conferencia, sincronizar_conferencia
+from controle_rm.desempenho import Medidor, desempenho_ativo
+from controle_rm.etapas import impressao_digital, impressao_digital_df
+from controle_rm.historico import EmBlocos, arquivo_historico, classificacao_bloco1_main3, registrar_execucao
+from controle_rm.incremental import Bloco1Incremental, incremental_ativo
+from controle_rm.ingestao import ErroFonte, ler_pwa
+from controle_rm.interface import carregar_fontes, consulta_historico, painel_desempenho, tabela_paginada, tabela_por_cam
+from controle_rm.leitura import ler_singra_csv, pwa_para_parquet, singra_para_parquet
+from controle_rm.motor_sql import (ParquetBruto, agregar_blocos_sql, classificar_capas_estrito_sql, contar_rms_sql,
+                                   linhas_distintas_sql, motor_execucao, pedidos_singra_sql)
+from controle_rm.normalizacao import normalizar_lote_serie
+from controle_rm.paralelo import classificar_capas_estrito_paralelo, processos_bloco1
+from controle_rm.preparo import preparar_conferencia, preparar_pwa, preparar_singra
 
 st.set_page_config(page_title="Controle de RM atendidas", layout="wide")
 st.title("📦 Controle de RMs - Estocagem e Expedição")
 st.markdown("Sistema: PWA = fonte da verdade. Bloco 1 com validação rigorosa de CAPAS prontas, parciais e pendentes.")
 
-# ----------------------
-# Utilitários / Normalização
-# ----------------------
-def clean_colnames(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [str(c).replace('\ufeff', '').replace("'", "").replace('"', '').strip().upper() for c in df.columns]
-    return df
-
-def normalizar_codigo_rm(valor):
-    if pd.isna(valor) or str(valor).strip() == '':
-        return ''
-    s = str(valor).replace('\ufeff', '').strip().replace("'", "").replace('"', "")
-    s = s.replace(".", "").replace(",", "").replace(" ", "")
-    if s.endswith('.0'):
-        s = s[:-2]
-    return s
-
-def normalizar_lote(valor):
-    if pd.isna(valor):
-        return ''
-    v_str = str(valor).replace('\ufeff', '').strip().replace("'", "").replace('"', '')
-    if v_str.endswith('.0'):
-        v_str = v_str[:-2]
-    return v_str
-
 # ----------------------
 # Cache: carregamento de dados
 # ----------------------
 @st.cache_data
+@cache_em_disco('main3.singra')
 def carregar_singra(file):
-    try:
-        # 1ª Tentativa: Lê com utf-8-sig
-        df = pd.read_csv(file, sep=';', encoding='utf-8-sig', dtype=str, low_memory=False)
-    except Exception:
-        # REBOBINA o arquivo para a posição 0 antes de tentar de novo
-        file.seek(0)
-        # 2ª Tentativa: Lê com latin1
-        df = pd.read_csv(file, sep=';', encoding='latin1', dtype=str, low_memory=False)
-    
-    df = clean_colnames(df)
-    df = df.fillna('')
-    
-    # Busca inteligente da coluna ID caso venha com sujeira
-    if 'ID' not in df.columns:
-        for col in df.columns:
-            if 'ID' in col:
-                df.rename(columns={col: 'ID'}, inplace=True)
-                break
-                
-    if 'ID' in df.columns:
-        df['ID'] = df['ID'].apply(normalizar_codigo_rm)
-    return df
+    # Encoding detectado no início do arquivo (utf-8-sig ou latin1), somente ID/SITUACAO/OMS/LISTA_WMS_ID,
+    # lidas em blocos pelo leitor CSV do pyarrow
+    return preparar_singra(ler_singra_csv(file), 'estrito')
 
 @st.cache_data
+@cache_em_disco('main3.pwa')
 def carregar_pwa(file):
-    df = pd.read_excel(file, sheet_name=0, dtype=str)
-    df = clean_colnames(df)
-    df = df.fillna('')
-    
-    cols_to_clean = ['PEDIDO', 'CAPA', 'MAPA', 'STC', 'CAM', 'LOTE', 'STATUS']
-    for col in cols_to_clean:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-            
-    if 'PEDIDO' in df.columns:
-        df['PEDIDO_LIMPO'] = df['PEDIDO'].apply(normalizar_codigo_rm)
-    else:
-        df['PEDIDO_LIMPO'] = ''
-        
-    return df
+    # somente as colunas usadas pelos blocos, lidas em streaming (calamine quando instalado),
+    # num processo do pool quando CONTROLE_RM_PROCESSOS > 1
+    return preparar_pwa(ler_pwa(file), 'estrito')
+
+# motor DuckDB: SINGRA e PWA gravados em Parquet bloco a bloco e consultados direto do disco,
+# normalizados em SQL, sem montar os DataFrames (arquivos maiores que a memória)
+def singra_em_disco(chave: str, file):
+    return ParquetBruto.singra(arquivo_em_disco(chave, file, singra_para_parquet))
+
+def pwa_em_disco(chave: str, file):
+    return ParquetBruto.pwa(arquivo_em_disco(chave, file, pwa_para_parquet))
+
+def preparar_lotes_google(df: pd.DataFrame) -> pd.DataFrame:
+    return preparar_conferencia(df, 'estrito')
 
 @st.cache_data(ttl=3600)
 def carregar_lotes_google(credentials_dict: dict, sheet_url: str):
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(
-        credentials_dict,
-        ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    )
-    client = gspread.authorize(creds)
-    sheet = client.open_by_url(sheet_url)
-    worksheet = sheet.get_worksheet(0)
-    data = worksheet.get_all_records()
-    df = pd.DataFrame(data)
-    df = clean_colnames(df)
-    df = df.fillna('')
-    if 'LOTE' in df.columns:
-        df['LOTE'] = df['LOTE'].apply(normalizar_lote)
-    return df
+    # releitura completa da planilha
+    return preparar_lotes_google(ler_conferencia(PlanilhaGoogle.de_credenciais(credentials_dict, sheet_url)))
+
+@st.cache_resource
+def conectar_planilha_google(credentials_dict: dict, sheet_url: str):
+    return PlanilhaGoogle.de_credenciais(credentials_dict, sheet_url)
+
+@st.cache_data(ttl=15)
+def carregar_lotes_google_incremental(credentials_dict: dict, sheet_url: str):
+    # busca só as linhas novas desde a última leitura (snapshot local da planilha)
+    backend = conectar_planilha_google(credentials_dict, sheet_url)
+    return preparar_lotes_google(sincronizar_conferencia(backend, diretorio_conferencia(sheet_url)))
+
+# ----------------------
+# Etapas em cache: chaveadas pela impressão digital das entradas, de modo que
+# interagir com filtros (fragments) não refaz o BLOCO 1 nem os agrupamentos
+# ----------------------
+@st.cache_data(max_entries=8)
+def etapa_bloco1(chave_pwa: str, chave_singra: str, chave_lotes: str, motor: str, processos: int, _df_pwa: pd.DataFrame, _lotes_disponiveis: set, _pedidos_singra: set, _incremental=None):
+    if motor == 'duckdb':
+        classificar = classificar_capas_estrito_sql
+    else:
+        # processos > 1: uma partição do PWA por CAM em cada processo do pool (mesmas tabelas)
+        classificar = functools.partial(classificar_capas_estrito_paralelo, processos=processos)
+    if _incremental is None:
+        return classificar(_df_pwa, _lotes_disponiveis, _pedidos_singra)
+    # só as RMs/CAPAs alteradas desde o último BLOCO 1 calculado nesta sessão (mesmas tabelas)
+    resultado = _incremental.classificar(_df_pwa, _lotes_disponiveis, _pedidos_singra, classificar)
+    _incremental.resumo['entradas'] = (chave_pwa, chave_singra, chave_lotes)
+    return resultado
+
+@st.cache_data(max_entries=8)
+def etapa_blocos_2e3(chave_pwa: str, motor: str, _df_pwa: pd.DataFrame):
+    if motor == 'duckdb':
+        return agregar_blocos_sql(_df_pwa)
+    return agregar_blocos(_df_pwa)
+
+@st.fragment
+def visao_por_rm(df_rm_visao: pd.DataFrame):
+    st.subheader("Rastreio Individual de RMs")
+    col_f1, col_f2 = st.columns(2)
+    with col_f1:
+        cam_list = ["TODOS"] + sorted(df_rm_visao['CAM'].unique().tolist())
+        filtro_cam = st.selectbox("Filtrar por CAM", cam_list)
+    with col_f2:
+        sit_list = ["TODAS", "PRONTA", "PENDENTE", "COM MAPA", "CANCELADA"]
+        filtro_sit = st.selectbox("Filtrar por Situação", sit_list)
+
+    df_filtrado = df_rm_visao
+    if filtro_cam != "TODOS": df_filtrado = df_filtrado[df_filtrado['CAM'] == filtro_cam]
+    if filtro_sit != "TODAS": df_filtrado = df_filtrado[df_filtrado['SITUAÇÃO'] == filtro_sit]
+
+    st.write(f"Exibindo {len(df_filtrado)} RMs")
+    tabela_paginada(df_filtrado, "visao_por_rm", hide_index=True)
 
 # ----------------------
 # UI: Uploads
@@ -107,41 +119,75 @@ with st.expander("📄 Upload de arquivos", expanded=True):
         singra_file = st.file_uploader("Upload planilha do SINGRA (.csv)", type=["csv"])
     with col2:
         pwa_file = st.file_uploader("Upload planilha do PWA (.xlsx)", type=["xlsx"])
+    sync_incremental = st.checkbox("Sincronização incremental da planilha de conferência (Google)", value=True,
+                                   help="Busca só as linhas novas a cada 15 s; desmarcado, relê a planilha inteira a cada hora.")
+    ao_vivo = st.checkbox(f"Ao vivo: atualizar o BLOCO 1 com a conferência a cada {intervalo_ao_vivo()} s", value=False,
+                          help="Durante o carregamento: relê só as linhas novas da planilha e reclassifica só as RMs e CAPAs "
+                               "dos lotes recém-conferidos, sem refazer o resto da página.")
+    medir_desempenho = st.checkbox("Medir desempenho das etapas", value=desempenho_ativo(),
+                                   help="Tempo, linhas e memória de cada etapa no painel Desempenho (fim da página) e no log.")
 
 if not (singra_file and pwa_file):
     st.info("Faça upload do SINGRA (.csv) e do PWA (.xlsx) para prosseguir.")
     st.stop()
 
 # Carregamento
-df_singra = carregar_singra(singra_file)
-df_pwa = carregar_pwa(pwa_file)
-
-# Carregar Lotes (Google Sheets)
+medidor = Medidor('main3', ativo=medir_desempenho)
+motor = motor_execucao()  # 'pandas' ou 'duckdb' (CONTROLE_RM_MOTOR)
+em_disco = motor == 'duckdb'
+processos = processos_bloco1()  # BLOCO 1 por CAM em N processos (CONTROLE_RM_PROCESSOS)
+# o BLOCO 1 incremental guarda o PWA em memória: não se aplica ao PWA consultado em disco
+bloco1_incremental = st.session_state.setdefault('_bloco1_incremental', Bloco1Incremental()) if incremental_ativo() and not em_disco else None
+chave_singra = impressao_digital(singra_file, 'main3.singra')
+chave_pwa = impressao_digital(pwa_file, 'main3.pwa')
+# SINGRA, PWA e Lotes (Google Sheets) carregados ao mesmo tempo
 try:
     SHEET_URL = "https://docs.google.com/spreadsheets/d/1naVnAlUGmeAMb_YftLGYit-1e1BcYFJgiJwSnOcgJf4/edit?gid=0"
     service_account_dict = dict(st.secrets["gcp_service_account"])
-    df_lotes_user = carregar_lotes_google(service_account_dict, SHEET_URL)
+    carregar_conferencia = carregar_lotes_google_incremental if (sync_incremental or ao_vivo) else carregar_lotes_google
+    fontes = carregar_fontes({
+        "SINGRA (carregar)": (singra_em_disco, (chave_singra, singra_file)) if em_disco else (carregar_singra, (singra_file,)),
+        "PWA (carregar)": (pwa_em_disco, (chave_pwa, pwa_file)) if em_disco else (carregar_pwa, (pwa_file,)),
+        "Conferência (Google)": (carregar_conferencia, (service_account_dict, SHEET_URL)),
+    }, medidor)
+except ErroFonte as e:
+    if e.fonte != "Conferência (Google)":
+        raise
+    st.error(f"Erro ao conectar com o Google Sheets: {e.__cause__}")
+    st.stop()
 except Exception as e:
     st.error(f"Erro ao conectar com o Google Sheets: {e}")
     st.stop()
+# no motor DuckDB, df_singra e df_pwa são ParquetBruto (colunas e len() como os DataFrames preparados)
+df_singra, df_pwa, df_lotes_user = fontes["SINGRA (carregar)"], fontes["PWA (carregar)"], fontes["Conferência (Google)"]
+chave_lotes = impressao_digital_df(df_lotes_user)
 
 # ----------------------
 # Preparação dos Conjuntos (Sets) para Validação Rápida
 # ----------------------
-lotes_disponiveis = set(df_lotes_user['LOTE'].apply(normalizar_lote)) if 'LOTE' in df_lotes_user.columns else set()
-# Remove lotes vazios do set para não dar falso positivo
-lotes_disponiveis.discard('') 
+def lotes_conferidos(df_lotes_user: pd.DataFrame) -> set:
+    lotes = set(normalizar_lote_serie(df_lotes_user['LOTE'], remover_bom=True)) if 'LOTE' in df_lotes_user.columns else set()
+    # Remove lotes vazios do set para não dar falso positivo
+    lotes.discard('')
+    return lotes
+
+lotes_disponiveis = lotes_conferidos(df_lotes_user)
 
 pedidos_singra = set()
-if 'ID' in df_singra.columns:
+if em_disco:
+    pedidos_singra = pedidos_singra_sql(df_singra)
+elif 'ID' in df_singra.columns:
     pedidos_singra = set(df_singra['ID'].dropna().tolist())
 pedidos_singra.discard('')
 
 c1, c2, c3 = st.columns(3)
-c1.metric("RMs únicas (PWA)", df_pwa['PEDIDO_LIMPO'].nunique())
+c1.metric("RMs únicas (PWA)", contar_rms_sql(df_pwa) if em_disco else df_pwa['PEDIDO_LIMPO'].nunique())
 c2.metric("RMs no SINGRA", len(pedidos_singra))
 c3.metric("Lotes conferidos (Google)", len(lotes_disponiveis))
 
+with st.expander("🕓 Histórico de RM, CAPA ou LOTE (execuções anteriores)"):
+    consulta_historico()
+
 st.divider()
 
 # ----------------------
@@ -149,57 +195,25 @@ st.divider()
 # ----------------------
 st.markdown("## 🔵 BLOCO 1 — Status de Processamento e Expedição")
 
-required_pwa_cols = ['PEDIDO_LIMPO', 'LOTE', 'CAPA', 'CAM', 'STATUS', 'MAPA']
-if not all(c in df_pwa.columns for c in required_pwa_cols):
-    st.error(f"Colunas essenciais faltando no PWA. Necessário: {required_pwa_cols}")
-else:
-    # --- PROCESSAMENTO DOS DADOS ---
-    lista_rm_final = []
-    capas_prontas = []
-    capas_parciais = []     
-    capas_pendentes = []    
-    capas_quebradas_prontas = []   
-    capas_quebradas_pendentes = [] 
-    capas_finalizadas = []  
-
-    # 1. Processamento por RM (Individual)
-    for rm, grupo_rm in df_pwa.groupby('PEDIDO_LIMPO'):
-        if rm == '': continue
-        
-        cam_rm = str(grupo_rm['CAM'].iloc[0])
-        capa_rm = str(grupo_rm['CAPA'].iloc[0])
-        status_pwa = str(grupo_rm['STATUS'].iloc[0]).upper()
-        
-        tem_mapa_rm = grupo_rm['MAPA'].replace(r'^\s*$', np.nan, regex=True).notna().any()
-        mapa_val = ", ".join(set(grupo_rm['MAPA'].dropna().astype(str).str.strip())) if tem_mapa_rm else ""
-        
-        if status_pwa == 'CANCELADO':
-            categoria = "CANCELADA"
-            pendencia = "Item cancelado no sistema"
-        elif tem_mapa_rm:
-            categoria = "COM MAPA"
-            pendencia = f"MAPA gerado: {mapa_val}"
-        else:
-            lotes_rm = set(grupo_rm['LOTE'].apply(normalizar_lote)) - {''}
-            lotes_faltantes = lotes_rm - lotes_disponiveis
-            no_singra = rm in pedidos_singra
-            
-            if not lotes_faltantes and no_singra:
-                categoria = "PRONTA"
-                pendencia = "Apta para gerar MAPA (Em Expedição)"
-            else:
-                categoria = "PENDENTE"
-                erros = []
-                if lotes_faltantes: erros.append(f"Lotes não bipados na exp.: {', '.join(sorted(lotes_faltantes))}")
-                if not no_singra: erros.append("Não consta 'Em Expedição' no SINGRA")
-                pendencia = " | ".join(erros)
-        
-        lista_rm_final.append({
-            "RM": rm, "CAPA": capa_rm, "CAM": cam_rm, 
-            "STATUS PWA": status_pwa, "SITUAÇÃO": categoria, "DETALHE": pendencia
-        })
-
-    df_rm_visao = pd.DataFrame(lista_rm_final)
+def bloco1(ao_vivo: bool, chave_lotes: str, lotes_disponiveis: set):
+    # ao vivo: fragment refeito a cada intervalo_ao_vivo() s; a conferência é relida e o BLOCO 1 incremental
+    # reclassifica só as RMs/CAPAs dos lotes que entraram ou saíram dela
+    if ao_vivo:
+        df_conferencia = medidor.medir("Conferência (ao vivo)", carregar_lotes_google_incremental, service_account_dict, SHEET_URL)
+        chave_lotes = impressao_digital_df(df_conferencia)
+        lotes_disponiveis = lotes_conferidos(df_conferencia)
+
+    # --- PROCESSAMENTO DOS DADOS (em cache por PWA + SINGRA + conferência) ---
+    df_rm_visao, capas = medidor.medir(
+        "BLOCO 1", etapa_bloco1, chave_pwa, chave_singra, chave_lotes, motor, processos, df_pwa, lotes_disponiveis, pedidos_singra,
+        bloco1_incremental, linhas=len(df_pwa)
+    )
+    capas_prontas = capas['prontas']
+    capas_quebradas_prontas = capas['quebradas_prontas']
+    capas_pendentes = capas['pendentes']
+    capas_quebradas_pendentes = capas['quebradas_pendentes']
+    capas_finalizadas = capas['finalizadas']
+    capas_parciais = capas['parciais']
 
     # --- CÁLCULO DAS MÉTRICAS DE RESUMO ---
     # Contamos apenas as RMs que não estão canceladas nem já possuem mapa
@@ -212,164 +226,91 @@ else:
     m1.metric("✅ RMs Prontas p/ MAPA", total_prontas)
     m2.metric("⚠️ RMs Pendentes", total_pendentes)
     m3.metric("🏁 RMs com MAPA (Finalizadas)", total_com_mapa)
+    resumo = bloco1_incremental.resumo if bloco1_incremental else {}
+    if resumo.get('modo') == 'incremental' and resumo.get('entradas') == (chave_pwa, chave_singra, chave_lotes):
+        st.caption(f"♻️ Recalculadas só as {resumo['rms']} RMs e {resumo['capas']} CAPAs alteradas desde o cálculo anterior.")
+    if ao_vivo:
+        st.caption(f"🔴 Ao vivo — conferência lida às {time.strftime('%H:%M:%S')}: {len(lotes_disponiveis)} lotes conferidos.")
     st.divider()
 
-    # 2. Processamento por CAPA (Agrupado)
-    for capa, grupo_capa in df_pwa.groupby('CAPA'):
-        if capa == '': continue
-        cam_capa = str(grupo_capa['CAM'].iloc[0])
+    with medidor.etapa("BLOCO 1 (tela)", len(df_rm_visao)):
+        # --- INTERFACE ---
+        aba_capa, aba_rm = st.tabs(["📋 Visão por CAPA", "📄 Visão por RM (Individual)"])
+
+        with aba_capa:
+            t1, t2, t3, t4, t5, t6 = st.tabs([
+                f"✅ Prontas ({len(capas_prontas)})", 
+                f"🧩 Quebradas Prontas ({len(capas_quebradas_prontas)})", 
+                f"⚠️ Pendentes ({len(capas_pendentes)})", 
+                f"🧩 Quebradas Pendentes ({len(capas_quebradas_pendentes)})", 
+                f"🏁 Finalizadas ({len(capas_finalizadas)})", 
+                f"🔶 C/ Cancelamento ({len(capas_parciais)})"
+            ])
         
-        mascara_cancelado = grupo_capa['STATUS'].astype(str).str.upper() == 'CANCELADO'
-        tem_cancelado = mascara_cancelado.any()
-        grupo_ativo = grupo_capa[~mascara_cancelado]
-        
-        if grupo_ativo.empty: continue 
-        
-        mascara_com_mapa = grupo_ativo['MAPA'].replace(r'^\s*$', np.nan, regex=True).notna()
-        qtd_com_mapa = mascara_com_mapa.sum()
-        total_ativos = len(grupo_ativo)
-        
-        pedidos_ativos = set(grupo_ativo['PEDIDO_LIMPO'].apply(normalizar_codigo_rm)) - {''}
-        mapas_existentes = set(grupo_ativo['MAPA'].dropna().astype(str).str.strip()) - {''}
-        
-        if qtd_com_mapa == total_ativos:
-            capas_finalizadas.append({
-                "CAPA": capa, "CAM": cam_capa, 
-                "RMs": ", ".join(sorted(pedidos_ativos)), 
-                "MAPAs": ", ".join(sorted(mapas_existentes))
-            })
-        elif 0 < qtd_com_mapa < total_ativos:
-            rms_com = set(grupo_ativo[mascara_com_mapa]['PEDIDO_LIMPO'].apply(normalizar_codigo_rm)) - {''}
-            rms_sem = pedidos_ativos - rms_com
-            detalhe_geral = f"MAPAs existentes: {', '.join(sorted(mapas_existentes))}\n"
-            detalhe_geral += f"RMs já com MAPA: {', '.join(sorted(rms_com))}\n"
-            
-            grupo_restante = grupo_ativo[grupo_ativo['PEDIDO_LIMPO'].isin(rms_sem)]
-            lotes_restantes = set(grupo_restante['LOTE'].apply(normalizar_lote)) - {''}
-            faltantes_lote_rest = lotes_restantes - lotes_disponiveis
-            faltantes_singra_rest = rms_sem - pedidos_singra
-            
-            if not faltantes_lote_rest and not faltantes_singra_rest:
-                capas_quebradas_prontas.append({
-                    "CAPA": capa, "CAM": cam_capa,
-                    "Qtd RM": len(rms_sem),
-                    "RMs Pendentes (Prontas)": ", ".join(sorted(rms_sem)),
-                    "Histórico": detalhe_geral
-                })
-            else:
-                razão_quebra = [detalhe_geral]
-                if faltantes_lote_rest: razão_quebra.append(f"Lotes Restantes ausentes: {', '.join(sorted(faltantes_lote_rest))}")
-                if faltantes_singra_rest:
-                    status_dict_rest = {}
-                    for r in faltantes_singra_rest:
-                        st_wms = str(grupo_restante[grupo_restante['PEDIDO_LIMPO'] == r]['STATUS'].iloc[0]).upper()
-                        status_dict_rest.setdefault(st_wms, []).append(r)
-                    msg_s = "RMs Restantes fora Singra:\n" + "\n".join([f"- {s}: {', '.join(sorted(rs))}" for s, rs in status_dict_rest.items()])
-                    razão_quebra.append(msg_s)
-
-                capas_quebradas_pendentes.append({
-                    "CAPA": capa, "CAM": cam_capa,
-                    "Qtd RM": len(rms_sem),
-                    "RMs s/ MAPA": ", ".join(sorted(rms_sem)),
-                    "Pendência do Restante": "\n\n".join(razão_quebra)
-                })
-        else:
-            lotes_ativos = set(grupo_ativo['LOTE'].apply(normalizar_lote)) - {''}
-            faltantes_lote = lotes_ativos - lotes_disponiveis
-            faltantes_singra = pedidos_ativos - pedidos_singra
-
-            if not faltantes_lote and not faltantes_singra:
-                if tem_cancelado:
-                    capas_parciais.append({"CAPA": capa, "CAM": cam_capa, "RMs Ativas": ", ".join(sorted(pedidos_ativos))})
-                else:
-                    capas_prontas.append({"CAPA": capa, "CAM": cam_capa, "Qtd RM": len(pedidos_ativos), "RMs (100% Prontas)": ", ".join(sorted(pedidos_ativos))})
-            else:
-                razão = []
-                if faltantes_lote: razão.append(f"Lotes que não estão na Expedição: {', '.join(sorted(faltantes_lote))}")
-                if faltantes_singra: 
-                    status_dict = {}
-                    for rm_f in faltantes_singra:
-                        st_wms = str(grupo_ativo[grupo_ativo['PEDIDO_LIMPO'] == rm_f]['STATUS'].iloc[0]).upper()
-                        status_dict.setdefault(st_wms or "SEM STATUS", []).append(rm_f)
-                    texto_s = "RMs fora Singra:\n" + "\n".join([f"- {s}: {', '.join(sorted(rs))}" for s, rs in sorted(status_dict.items())])
-                    razão.append(texto_s)
-                
-                capas_pendentes.append({
-                    "CAPA": capa, "CAM": cam_capa, 
-                    "Qtd RM": len(pedidos_ativos),
-                    "RMs da CAPA": ", ".join(sorted(pedidos_ativos)), 
-                    "O que falta?": "\n\n".join(razão)
-                })
-
-    # --- INTERFACE ---
-    aba_capa, aba_rm = st.tabs(["📋 Visão por CAPA", "📄 Visão por RM (Individual)"])
-
-    with aba_capa:
-        t1, t2, t3, t4, t5, t6 = st.tabs([
-            f"✅ Prontas ({len(capas_prontas)})", 
-            f"🧩 Quebradas Prontas ({len(capas_quebradas_prontas)})", 
-            f"⚠️ Pendentes ({len(capas_pendentes)})", 
-            f"🧩 Quebradas Pendentes ({len(capas_quebradas_pendentes)})", 
-            f"🏁 Finalizadas ({len(capas_finalizadas)})", 
-            f"🔶 C/ Cancelamento ({len(capas_parciais)})"
-        ])
-        
-        with t1: 
-            st.dataframe(pd.DataFrame(capas_prontas), use_container_width=True)
-        with t2:
-            st.dataframe(pd.DataFrame(capas_quebradas_prontas).style.set_properties(**{'white-space': 'pre-wrap'}), use_container_width=True)
-        with t3: 
-            st.dataframe(pd.DataFrame(capas_pendentes).style.set_properties(**{'white-space': 'pre-wrap'}), use_container_width=True)
-        with t4:
-            st.dataframe(pd.DataFrame(capas_quebradas_pendentes).style.set_properties(**{'white-space': 'pre-wrap'}), use_container_width=True)
-        with t5: 
-            st.dataframe(pd.DataFrame(capas_finalizadas), use_container_width=True)
-        with t6: 
-            st.dataframe(pd.DataFrame(capas_parciais), use_container_width=True)
-
-    with aba_rm:
-        st.subheader("Rastreio Individual de RMs")
-        # Filtros e Tabela de RM permanecem iguais...
-        col_f1, col_f2 = st.columns(2)
-        with col_f1:
-            cam_list = ["TODOS"] + sorted(df_rm_visao['CAM'].unique().tolist())
-            filtro_cam = st.selectbox("Filtrar por CAM", cam_list)
-        with col_f2:
-            sit_list = ["TODAS", "PRONTA", "PENDENTE", "COM MAPA", "CANCELADA"]
-            filtro_sit = st.selectbox("Filtrar por Situação", sit_list)
-
-        df_filtrado = df_rm_visao.copy()
-        if filtro_cam != "TODOS": df_filtrado = df_filtrado[df_filtrado['CAM'] == filtro_cam]
-        if filtro_sit != "TODAS": df_filtrado = df_filtrado[df_filtrado['SITUAÇÃO'] == filtro_sit]
-
-        st.write(f"Exibindo {len(df_filtrado)} RMs")
-        st.dataframe(df_filtrado, use_container_width=True, hide_index=True)
+            with t1: 
+                tabela_paginada(capas_prontas, "capas_prontas")
+            with t2:
+                tabela_paginada(capas_quebradas_prontas, "capas_quebradas_prontas", quebrar_linhas=True)
+            with t3: 
+                tabela_paginada(capas_pendentes, "capas_pendentes", quebrar_linhas=True)
+            with t4:
+                tabela_paginada(capas_quebradas_pendentes, "capas_quebradas_pendentes", quebrar_linhas=True)
+            with t5: 
+                tabela_paginada(capas_finalizadas, "capas_finalizadas")
+            with t6: 
+                tabela_paginada(capas_parciais, "capas_parciais")
+
+        with aba_rm:
+            visao_por_rm(df_rm_visao)
+    return df_rm_visao, capas
+
+required_pwa_cols = ['PEDIDO_LIMPO', 'LOTE', 'CAPA', 'CAM', 'STATUS', 'MAPA']
+if not all(c in df_pwa.columns for c in required_pwa_cols):
+    st.error(f"Colunas essenciais faltando no PWA. Necessário: {required_pwa_cols}")
+else:
+    df_rm_visao, capas = st.fragment(bloco1, run_every=intervalo_ao_vivo() if ao_vivo else None)(ao_vivo, chave_lotes, lotes_disponiveis)
+
+# ----------------------
+# Histórico (SQLite): entradas e classificação do BLOCO 1 desta execução, uma vez por dia e conteúdo
+# ----------------------
+def entrada_historico(df):
+    # arquivo em disco: linhas distintas gravadas bloco a bloco
+    if isinstance(df, ParquetBruto):
+        return EmBlocos(len(df), functools.partial(linhas_distintas_sql, df))
+    return df
+
+if arquivo_historico():
+    entradas_historico = {
+        "PWA": (chave_pwa, entrada_historico(df_pwa)),
+        "SINGRA": (chave_singra, entrada_historico(df_singra)),
+        "CONFERENCIA": (chave_lotes, df_lotes_user),
+    }
+    if 'df_rm_visao' in locals():
+        entradas_historico["BLOCO1"] = (
+            f"{chave_pwa}:{chave_singra}:{chave_lotes}",
+            lambda: classificacao_bloco1_main3(df_rm_visao, capas)
+        )
+    try:
+        medidor.medir("Histórico (gravar)", registrar_execucao, 'main3', entradas_historico)
+    except (sqlite3.Error, OSError) as e:
+        st.warning(f"⚠️ Histórico não gravado: {e}")
 
 st.divider()
 
+# BLOCOS 2 e 3 calculados juntos (uma passada sobre o PWA)
+blocos = medidor.medir("BLOCOS 2-3", etapa_blocos_2e3, chave_pwa, motor, df_pwa)
+
 # ----------------------
 # BLOCO 2: MAPA sem STC (agrupar por CAM e MAPA) — excluir STATUS EXPEDIDO
 # ----------------------
 st.markdown("## 🔷 BLOCO 2 — MAPA sem STC (agrupar por CAM e MAPA)")
 
 if all(c in df_pwa.columns for c in ['MAPA','STC','STATUS','CAM','CAPA']):
-    df_mapa_sem_stc = df_pwa[
-        (df_pwa['MAPA'] != '') &
-        (df_pwa['STC'] == '') &
-        (df_pwa['STATUS'] != 'EXPEDIDO')
-    ]
-    if df_mapa_sem_stc.empty:
+    agrupado_mapa = blocos['mapa_sem_stc']
+    if agrupado_mapa.empty:
         st.info("Nenhuma MAPA sem STC (após filtrar EXPEDIDO).")
     else:
-        agrupado_mapa = (
-            df_mapa_sem_stc.groupby(['CAM','MAPA'])
-            .agg({'CAPA': lambda x: ', '.join(sorted(set(x)))})
-            .reset_index()
-        )
-        cams = ["Todos"] + sorted(agrupado_mapa['CAM'].unique().tolist())
-        cam_sel = st.selectbox("Filtrar por CAM (Bloco 2)", cams)
-        display = agrupado_mapa if cam_sel == "Todos" else agrupado_mapa[agrupado_mapa['CAM'] == cam_sel]
-        st.dataframe(display.style.set_properties(**{'text-align':'left'}), use_container_width=True)
+        medidor.medir("BLOCO 2 (tela)", tabela_por_cam, agrupado_mapa, "Filtrar por CAM (Bloco 2)")
 else:
     st.info("Colunas necessárias para Bloco 2 ausentes no PWA.")
 
@@ -382,22 +323,12 @@ st.divider()
 st.markdown("## 🔷 BLOCO 3 — STC não expedidas (agrupar por CAM e STC)")
 
 if all(c in df_pwa.columns for c in ['STC','STATUS','CAM','MAPA']):
-    df_stc_nao_expedida = df_pwa[
-        (df_pwa['STC'] != '') &
-        (df_pwa['STATUS'] != 'EXPEDIDO') &
-        (df_pwa['STATUS'] != 'CANCELADO')
-    ]
-    if df_stc_nao_expedida.empty:
+    agrupado_stc = blocos['stc_nao_expedida']
+    if agrupado_stc.empty:
         st.info("Nenhuma STC pendente.")
     else:
-        agrupado_stc = (
-            df_stc_nao_expedida.groupby(['CAM','STC'])
-            .agg({'MAPA': lambda x: ', '.join(sorted(set([m for m in x if m and m != ''])))})
-            .reset_index()
-        )
-        cams3 = ["Todos"] + sorted(agrupado_stc['CAM'].unique().tolist())
-        cam_sel3 = st.selectbox("Filtrar por CAM (BLOCO 3)", cams3)
-        display3 = agrupado_stc if cam_sel3 == "Todos" else agrupado_stc[agrupado_stc['CAM'] == cam_sel3]
-        st.dataframe(display3.style.set_properties(**{'text-align':'left'}), use_container_width=True)
+        medidor.medir("BLOCO 3 (tela)", tabela_por_cam, agrupado_stc, "Filtrar por CAM (BLOCO 3)")
 else:
     st.info("Colunas necessárias para BLOCO 3 ausentes no PWA.")
+
+painel_desempenho(medidor)
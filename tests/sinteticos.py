@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ----------------------
+# Dados sintéticos pequenos para os testes de equivalência: PWA já preparado (texto), SINGRA e
+# alterações entre execuções (linhas editadas, acrescentadas, LOTES/RMs entrando e saindo).
+# ----------------------
+
+# sementes das sequências aleatórias; CONTROLE_RM_TESTES_SEMENTES=200 para uma varredura maior
+SEMENTES = range(int(os.environ.get('CONTROLE_RM_TESTES_SEMENTES', '50')))
+
+STATUS = ['', 'SEPARADO', 'EXPEDIDO', 'CANCELADO']
+SITUACOES_SINGRA = ['Em Expedição', 'EM SEPARACAO', '']
+
+
+def _linha(rng, rm: str, capas: list, n_lotes: int) -> dict:
+    capa = capas[rng.integers(len(capas))]
+    lote = f"L{rng.integers(n_lotes):02d}"
+    return {
+        'PEDIDO_LIMPO': rm,
+        'CAPA': capa,
+        # CAM da CAPA, com algumas linhas fora dele
+        'CAM': f"CAM {rng.integers(4):02d}" if rng.random() < 0.1 else f"CAM {int(capa[2:] or 0) % 4:02d}",
+        'STATUS': STATUS[rng.choice(len(STATUS), p=[0.4, 0.3, 0.2, 0.1])],
+        'MAPA': '' if rng.random() < 0.7 else f"70{rng.integers(10)}",
+        'LOTE': lote,
+        'VOLUME': f"{lote}-{rng.integers(3)}",
+    }
+
+
+def _capa(rng, n_capas: int) -> str:
+    return '' if rng.random() < 0.03 else f"CP{rng.integers(n_capas):03d}"
+
+
+def pwa(rng, n_rms: int = 40, n_capas: int = 15, n_lotes: int = 12) -> pd.DataFrame:
+    """RMs em uma a três CAPAs, com várias linhas (LOTES/VOLUMES), MAPA e cancelamentos esparsos."""
+    linhas = []
+    for i in range(n_rms):
+        capas = [_capa(rng, n_capas) for _ in range(rng.integers(1, 4))]
+        linhas.extend(_linha(rng, str(100000 + i), capas, n_lotes) for _ in range(rng.integers(1, 5)))
+    return pd.DataFrame(linhas)
+
+
+def sujar(rng, df: pd.DataFrame, fracao: float = 0.1) -> pd.DataFrame:
+    """PWA como vem da planilha (PEDIDO em vez de PEDIDO_LIMPO): BOM, pontos e espaços no código
+    da RM, LOTE com aspas e '.0', MAPA só com espaço, STATUS em minúsculas, STC."""
+    df = df.copy()
+    n = len(df)
+
+    def sorteio():
+        return rng.random(n) < fracao
+
+    pedido = df.pop('PEDIDO_LIMPO')
+    pedido = np.where(sorteio(), pedido.str[:3] + '.' + pedido.str[3:], pedido)
+    df.insert(0, 'PEDIDO', np.where(sorteio(), '\ufeff' + pedido + ' ', pedido))
+    df['LOTE'] = np.where(sorteio(), ' ' + df['LOTE'] + '.0', df['LOTE'])
+    df['LOTE'] = np.where(sorteio(), '"' + df['LOTE'] + '"', df['LOTE'])
+    df['MAPA'] = np.where(sorteio(), ' ', df['MAPA'])
+    df['STATUS'] = np.where(sorteio(), df['STATUS'].str.lower(), df['STATUS'])
+    df['STC'] = np.where(rng.random(n) < 0.5, '', [f"STC{i}" for i in rng.integers(8, size=n)])
+    return df
+
+
+def editar(rng, df: pd.DataFrame, n: int, n_capas: int = 15, n_lotes: int = 12) -> pd.DataFrame:
+    df = df.copy()
+    for pos in rng.choice(len(df), size=min(n, len(df)), replace=False):
+        coluna = ['LOTE', 'STATUS', 'MAPA', 'CAPA', 'CAM'][rng.integers(5)]
+        if coluna == 'CAPA':
+            valor = _capa(rng, n_capas)
+        else:
+            valor = _linha(rng, df.iat[pos, 0], [df.iat[pos, 1]], n_lotes)[coluna]
+        df.iat[pos, df.columns.get_loc(coluna)] = valor
+    return df
+
+
+def acrescentar(rng, df: pd.DataFrame, n: int, n_capas: int = 15, n_lotes: int = 12) -> pd.DataFrame:
+    novas = []
+    for _ in range(n):
+        if rng.random() < 0.3:
+            rm, capas = str(200000 + rng.integers(1000)), [_capa(rng, n_capas)]
+        else:
+            rm = df['PEDIDO_LIMPO'].iat[rng.integers(len(df))]
+            # às vezes numa CAPA nova para a RM
+            capas = df.loc[df['PEDIDO_LIMPO'] == rm, 'CAPA'].unique().tolist() + [_capa(rng, n_capas)] * (rng.random() < 0.3)
+        novas.append(_linha(rng, rm, capas, n_lotes))
+    return pd.concat([df, pd.DataFrame(novas)], ignore_index=True)
+
+
+def alternar(rng, conjunto: set, universo: list, n: int) -> set:
+    """`conjunto` com `n` elementos do universo entrando ou saindo."""
+    return set(conjunto) ^ set(rng.choice(universo, size=min(n, len(universo)), replace=False).tolist())
+
+
+def sortear(rng, universo: list, fracao: float = 0.5) -> set:
+    return {v for v in universo if rng.random() < fracao}
+
+
+def singra(rng, rms: list) -> pd.DataFrame:
+    return pd.DataFrame({
+        'ID': rms,
+        'SITUACAO': [SITUACOES_SINGRA[i] for i in rng.integers(len(SITUACOES_SINGRA), size=len(rms))],
+        'OMS': 'OM',
+    })
+
+
+def assert_tabelas_iguais(obtido, esperado) -> None:
+    """Tabelas do BLOCO 1 (DataFrame, ou tuplas/dicts deles) iguais; vazias valem como iguais."""
+    if isinstance(esperado, dict):
+        assert obtido.keys() == esperado.keys()
+        for chave in esperado:
+            assert_tabelas_iguais(obtido[chave], esperado[chave])
+    elif isinstance(esperado, (tuple, list)):
+        assert len(obtido) == len(esperado)
+        for a, b in zip(obtido, esperado):
+            assert_tabelas_iguais(a, b)
+    elif len(esperado) == 0:
+        assert len(obtido) == 0
+    else:
+        pd.testing.assert_frame_equal(obtido.reset_index(drop=True), esperado.reset_index(drop=True))
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from controle_rm.ao_vivo import Bloco1AoVivo
+from controle_rm.bloco1 import verificar_capas_por_lote, verificar_capas_por_volume
+from controle_rm.indices import construir_indice_pwa, construir_presenca_volumes, construir_singra_map
+from tests import sinteticos
+
+
+def _entradas(rng):
+    df = sinteticos.pwa(rng)
+    rms = df['PEDIDO_LIMPO'].unique().tolist()
+    return df, construir_indice_pwa(df), construir_singra_map(sinteticos.singra(rng, rms[: int(len(rms) * 0.8)]))
+
+
+@pytest.mark.parametrize('seed', sinteticos.SEMENTES)
+def test_ao_vivo_por_lote_igual_ao_calculo_completo(seed):
+    rng = np.random.default_rng(seed)
+    df, indice, singra_map = _entradas(rng)
+    universo = sorted(df['LOTE'].unique())
+    lotes = sinteticos.sortear(rng, universo, 0.6)
+    estado, entradas = Bloco1AoVivo(), ('pwa', 'singra')
+    for rodada in range(8):
+        if rodada == 5:
+            # novo upload: recalcula tudo sobre o PWA novo
+            df, indice, singra_map = _entradas(rng)
+            universo, entradas = sorted(df['LOTE'].unique()), ('pwa2', 'singra2')
+        obtido = estado.verificar_por_lote(entradas, indice, singra_map, lotes)
+        sinteticos.assert_tabelas_iguais(obtido, verificar_capas_por_lote(indice, singra_map, lotes))
+        lotes = sinteticos.alternar(rng, lotes, universo, int(rng.integers(0, 3)))
+
+
+@pytest.mark.parametrize('seed', sinteticos.SEMENTES)
+def test_ao_vivo_por_volume_igual_ao_calculo_completo(seed):
+    rng = np.random.default_rng(seed)
+    df, indice, singra_map = _entradas(rng)
+    universo = sorted(df['VOLUME'].unique())
+    volumes = sinteticos.sortear(rng, universo, 0.6)
+    estado, entradas = Bloco1AoVivo(), ('pwa', 'singra')
+    for rodada in range(8):
+        if rodada == 5:
+            df, indice, singra_map = _entradas(rng)
+            universo, entradas = sorted(df['VOLUME'].unique()), ('pwa2', 'singra2')
+        obtido = estado.verificar_por_volume(entradas, indice, singra_map, df, volumes)
+        esperado = verificar_capas_por_volume(indice, singra_map, construir_presenca_volumes(df, volumes))
+        sinteticos.assert_tabelas_iguais(obtido, esperado)
+        volumes = sinteticos.alternar(rng, volumes, universo, int(rng.integers(0, 3)))
+
+
+def test_ao_vivo_reavalia_so_as_capas_afetadas():
+    rng = np.random.default_rng(0)
+    df, indice, singra_map = _entradas(rng)
+    estado = Bloco1AoVivo()
+    estado.verificar_por_lote(('pwa', 'singra'), indice, singra_map, {'L00'})
+    assert estado.resumo['modo'] == 'completo'
+
+    estado.verificar_por_lote(('pwa', 'singra'), indice, singra_map, {'L00', 'L01'})
+    capas_l01 = {c for c, rms in indice.capa_rms.items() if any('L01' in indice.rm_lotes[rm] for rm in rms)}
+    assert estado.resumo == {**estado.resumo, 'modo': 'parcial', 'capas': len(capas_l01)}
+
+
+def test_chave_acompanha_a_conferencia():
+    rng = np.random.default_rng(0)
+    df, indice, singra_map = _entradas(rng)
+    estado = Bloco1AoVivo()
+    estado.verificar_por_lote(('pwa', 'singra'), indice, singra_map, {'L00', 'L01'})
+    chave = estado.chave_conferidos()
+    estado.verificar_por_lote(('pwa', 'singra'), indice, singra_map, {'L01', 'L00'})
+    assert estado.chave_conferidos() == chave
+    estado.verificar_por_lote(('pwa', 'singra'), indice, singra_map, {'L00', 'L01', 'L02'})
+    assert estado.chave_conferidos() != chave
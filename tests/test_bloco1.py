@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from controle_rm.bloco1 import classificar_capas_estrito
+from controle_rm.normalizacao import normalizar_lote_serie
+from controle_rm.preparo import preparar_pwa
+from tests import sinteticos
+from tests.test_normalizacao import normalizar_codigo_rm_main3 as normalizar_codigo_rm
+from tests.test_normalizacao import normalizar_lote_main3 as normalizar_lote
+
+# ----------------------
+# Laço original do BLOCO 1 do main3.py (referência da versão vetorizada), copiado como estava.
+# Únicas mudanças: recebe as entradas como parâmetros, devolve as tabelas em vez de exibi-las e
+# ordena os dois textos que o original montava iterando um set (ordem variava de uma execução
+# para outra): os MAPAs da RM e os STATUS das RMs restantes fora do SINGRA.
+# ----------------------
+
+def classificar_capas_estrito_original(df_pwa, lotes_disponiveis, pedidos_singra):
+    # --- PROCESSAMENTO DOS DADOS ---
+    lista_rm_final = []
+    capas_prontas = []
+    capas_parciais = []
+    capas_pendentes = []
+    capas_quebradas_prontas = []
+    capas_quebradas_pendentes = []
+    capas_finalizadas = []
+
+    # 1. Processamento por RM (Individual)
+    for rm, grupo_rm in df_pwa.groupby('PEDIDO_LIMPO'):
+        if rm == '': continue
+
+        cam_rm = str(grupo_rm['CAM'].iloc[0])
+        capa_rm = str(grupo_rm['CAPA'].iloc[0])
+        status_pwa = str(grupo_rm['STATUS'].iloc[0]).upper()
+
+        tem_mapa_rm = grupo_rm['MAPA'].replace(r'^\s*$', np.nan, regex=True).notna().any()
+        mapa_val = ", ".join(sorted(set(grupo_rm['MAPA'].dropna().astype(str).str.strip()))) if tem_mapa_rm else ""
+
+        if status_pwa == 'CANCELADO':
+            categoria = "CANCELADA"
+            pendencia = "Item cancelado no sistema"
+        elif tem_mapa_rm:
+            categoria = "COM MAPA"
+            pendencia = f"MAPA gerado: {mapa_val}"
+        else:
+            lotes_rm = set(grupo_rm['LOTE'].apply(normalizar_lote)) - {''}
+            lotes_faltantes = lotes_rm - lotes_disponiveis
+            no_singra = rm in pedidos_singra
+
+            if not lotes_faltantes and no_singra:
+                categoria = "PRONTA"
+                pendencia = "Apta para gerar MAPA (Em Expedição)"
+            else:
+                categoria = "PENDENTE"
+                erros = []
+                if lotes_faltantes: erros.append(f"Lotes não bipados na exp.: {', '.join(sorted(lotes_faltantes))}")
+                if not no_singra: erros.append("Não consta 'Em Expedição' no SINGRA")
+                pendencia = " | ".join(erros)
+
+        lista_rm_final.append({
+            "RM": rm, "CAPA": capa_rm, "CAM": cam_rm,
+            "STATUS PWA": status_pwa, "SITUAÇÃO": categoria, "DETALHE": pendencia
+        })
+
+    df_rm_visao = pd.DataFrame(lista_rm_final)
+
+    # 2. Processamento por CAPA (Agrupado)
+    for capa, grupo_capa in df_pwa.groupby('CAPA'):
+        if capa == '': continue
+        cam_capa = str(grupo_capa['CAM'].iloc[0])
+
+        mascara_cancelado = grupo_capa['STATUS'].astype(str).str.upper() == 'CANCELADO'
+        tem_cancelado = mascara_cancelado.any()
+        grupo_ativo = grupo_capa[~mascara_cancelado]
+
+        if grupo_ativo.empty: continue
+
+        mascara_com_mapa = grupo_ativo['MAPA'].replace(r'^\s*$', np.nan, regex=True).notna()
+        qtd_com_mapa = mascara_com_mapa.sum()
+        total_ativos = len(grupo_ativo)
+
+        pedidos_ativos = set(grupo_ativo['PEDIDO_LIMPO'].apply(normalizar_codigo_rm)) - {''}
+        mapas_existentes = set(grupo_ativo['MAPA'].dropna().astype(str).str.strip()) - {''}
+
+        if qtd_com_mapa == total_ativos:
+            capas_finalizadas.append({
+                "CAPA": capa, "CAM": cam_capa,
+                "RMs": ", ".join(sorted(pedidos_ativos)),
+                "MAPAs": ", ".join(sorted(mapas_existentes))
+            })
+        elif 0 < qtd_com_mapa < total_ativos:
+            rms_com = set(grupo_ativo[mascara_com_mapa]['PEDIDO_LIMPO'].apply(normalizar_codigo_rm)) - {''}
+            rms_sem = pedidos_ativos - rms_com
+            detalhe_geral = f"MAPAs existentes: {', '.join(sorted(mapas_existentes))}\n"
+            detalhe_geral += f"RMs já com MAPA: {', '.join(sorted(rms_com))}\n"
+
+            grupo_restante = grupo_ativo[grupo_ativo['PEDIDO_LIMPO'].isin(rms_sem)]
+            lotes_restantes = set(grupo_restante['LOTE'].apply(normalizar_lote)) - {''}
+            faltantes_lote_rest = lotes_restantes - lotes_disponiveis
+            faltantes_singra_rest = rms_sem - pedidos_singra
+
+            if not faltantes_lote_rest and not faltantes_singra_rest:
+                capas_quebradas_prontas.append({
+                    "CAPA": capa, "CAM": cam_capa,
+                    "Qtd RM": len(rms_sem),
+                    "RMs Pendentes (Prontas)": ", ".join(sorted(rms_sem)),
+                    "Histórico": detalhe_geral
+                })
+            else:
+                razão_quebra = [detalhe_geral]
+                if faltantes_lote_rest: razão_quebra.append(f"Lotes Restantes ausentes: {', '.join(sorted(faltantes_lote_rest))}")
+                if faltantes_singra_rest:
+                    status_dict_rest = {}
+                    for r in faltantes_singra_rest:
+                        st_wms = str(grupo_restante[grupo_restante['PEDIDO_LIMPO'] == r]['STATUS'].iloc[0]).upper()
+                        status_dict_rest.setdefault(st_wms, []).append(r)
+                    msg_s = "RMs Restantes fora Singra:\n" + "\n".join([f"- {s}: {', '.join(sorted(rs))}" for s, rs in sorted(status_dict_rest.items())])
+                    razão_quebra.append(msg_s)
+
+                capas_quebradas_pendentes.append({
+                    "CAPA": capa, "CAM": cam_capa,
+                    "Qtd RM": len(rms_sem),
+                    "RMs s/ MAPA": ", ".join(sorted(rms_sem)),
+                    "Pendência do Restante": "\n\n".join(razão_quebra)
+                })
+        else:
+            lotes_ativos = set(grupo_ativo['LOTE'].apply(normalizar_lote)) - {''}
+            faltantes_lote = lotes_ativos - lotes_disponiveis
+            faltantes_singra = pedidos_ativos - pedidos_singra
+
+            if not faltantes_lote and not faltantes_singra:
+                if tem_cancelado:
+                    capas_parciais.append({"CAPA": capa, "CAM": cam_capa, "RMs Ativas": ", ".join(sorted(pedidos_ativos))})
+                else:
+                    capas_prontas.append({"CAPA": capa, "CAM": cam_capa, "Qtd RM": len(pedidos_ativos), "RMs (100% Prontas)": ", ".join(sorted(pedidos_ativos))})
+            else:
+                razão = []
+                if faltantes_lote: razão.append(f"Lotes que não estão na Expedição: {', '.join(sorted(faltantes_lote))}")
+                if faltantes_singra:
+                    status_dict = {}
+                    for rm_f in faltantes_singra:
+                        st_wms = str(grupo_ativo[grupo_ativo['PEDIDO_LIMPO'] == rm_f]['STATUS'].iloc[0]).upper()
+                        status_dict.setdefault(st_wms or "SEM STATUS", []).append(rm_f)
+                    texto_s = "RMs fora Singra:\n" + "\n".join([f"- {s}: {', '.join(sorted(rs))}" for s, rs in sorted(status_dict.items())])
+                    razão.append(texto_s)
+
+                capas_pendentes.append({
+                    "CAPA": capa, "CAM": cam_capa,
+                    "Qtd RM": len(pedidos_ativos),
+                    "RMs da CAPA": ", ".join(sorted(pedidos_ativos)),
+                    "O que falta?": "\n\n".join(razão)
+                })
+
+    capas = {
+        'prontas': capas_prontas,
+        'quebradas_prontas': capas_quebradas_prontas,
+        'pendentes': capas_pendentes,
+        'quebradas_pendentes': capas_quebradas_pendentes,
+        'finalizadas': capas_finalizadas,
+        'parciais': capas_parciais,
+    }
+    return df_rm_visao, {k: pd.DataFrame(v) for k, v in capas.items()}
+
+
+def _entradas(seed: int):
+    rng = np.random.default_rng(seed)
+    df = preparar_pwa(sinteticos.sujar(rng, sinteticos.pwa(rng, n_rms=60)), 'estrito')
+    lotes = set(normalizar_lote_serie(sinteticos.pwa(rng)['LOTE'].sample(6, random_state=seed), remover_bom=True))
+    pedidos = sinteticos.sortear(rng, df['PEDIDO_LIMPO'].unique().tolist(), 0.7)
+    return df, lotes, pedidos
+
+
+# o replace do laço original avisa da mudança de downcasting do pandas (sem efeito no resultado)
+@pytest.mark.filterwarnings('ignore:Downcasting behavior in `replace`:FutureWarning')
+@pytest.mark.parametrize('seed', sinteticos.SEMENTES)
+def test_igual_ao_laco_original(seed):
+    df, lotes, pedidos = _entradas(seed)
+    # o laço original recebia o PWA com colunas de objetos (sem o modo compacto)
+    original = df.astype(object)
+    for lotes_disponiveis, pedidos_singra in ((lotes, pedidos), (set(), pedidos), (lotes, set())):
+        sinteticos.assert_tabelas_iguais(
+            classificar_capas_estrito(df, lotes_disponiveis, pedidos_singra),
+            classificar_capas_estrito_original(original, lotes_disponiveis, pedidos_singra),
+        )
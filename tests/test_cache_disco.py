@@ -0,0 +1,145 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from controle_rm import cache_disco
+from controle_rm.cache_disco import arquivo_em_disco, cache_em_disco, gravar_cache, ler_cache, remover_excedente
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONTROLE_RM_CACHE_DIR', str(tmp_path))
+    monkeypatch.delenv('CONTROLE_RM_CACHE_MAX_MB', raising=False)
+    return tmp_path
+
+
+def _arquivos(diretorio) -> list:
+    return sorted(os.listdir(diretorio))
+
+
+def _carregador(namespace: str = 'teste'):
+    chamadas = []
+
+    @cache_em_disco(namespace)
+    def carregar(file):
+        chamadas.append(1)
+        return pd.DataFrame({'VALOR': [file.read().decode('utf-8')]})
+    return carregar, chamadas
+
+
+def test_upload_identico_reaproveitado(diretorio):
+    carregar, chamadas = _carregador()
+    primeiro = carregar(io.BytesIO(b'abc'))
+    pd.testing.assert_frame_equal(carregar(io.BytesIO(b'abc')), primeiro)
+    assert len(chamadas) == 1
+    carregar(io.BytesIO(b'outro'))
+    assert len(chamadas) == 2
+    # outro namespace não reaproveita
+    outro, chamadas_outro = _carregador('outro')
+    outro(io.BytesIO(b'abc'))
+    assert len(chamadas_outro) == 1
+
+
+def test_so_o_upload_como_argumento(diretorio):
+    # argumentos extras não entram na chave: não são aceitos
+    carregar, _ = _carregador()
+    with pytest.raises(TypeError):
+        carregar(io.BytesIO(b'abc'), 'estrito')
+
+
+def test_chave_muda_com_o_leitor_e_o_modo(diretorio, monkeypatch):
+    carregar, chamadas = _carregador()
+    monkeypatch.setattr(cache_disco, 'engine_pwa', lambda: 'streaming')
+    carregar(io.BytesIO(b'abc'))
+    # o calamine lê células só com espaços como vazias: outro resultado, outra entrada
+    monkeypatch.setattr(cache_disco, 'engine_pwa', lambda: 'calamine')
+    carregar(io.BytesIO(b'abc'))
+    assert len(chamadas) == 2
+    monkeypatch.setenv('CONTROLE_RM_ARMAZENAMENTO', 'arrow')
+    carregar(io.BytesIO(b'abc'))
+    assert len(chamadas) == 3
+    monkeypatch.setattr(cache_disco, 'engine_pwa', lambda: 'streaming')
+    monkeypatch.delenv('CONTROLE_RM_ARMAZENAMENTO')
+    carregar(io.BytesIO(b'abc'))
+    assert len(chamadas) == 3
+
+
+def test_gravacao_atomica(diretorio, monkeypatch):
+    df = pd.DataFrame({'VALOR': ['a', 'b']})
+    substituicoes = []
+    substituir = os.replace
+
+    def replace(origem, destino):
+        # o arquivo temporário já está completo e no mesmo diretório; o destino ainda não existe
+        pd.testing.assert_frame_equal(pd.read_parquet(origem), df)
+        assert os.path.dirname(origem) == os.path.dirname(destino) and not os.path.exists(destino)
+        substituicoes.append(destino)
+        substituir(origem, destino)
+
+    monkeypatch.setattr(cache_disco.os, 'replace', replace)
+    gravar_cache('abc', df)
+    assert substituicoes == [cache_disco._caminho('abc')]
+    pd.testing.assert_frame_equal(ler_cache('abc'), df)
+    assert _arquivos(diretorio) == ['abc.parquet']
+
+
+def test_falha_na_gravacao_nao_deixa_arquivo(diretorio, monkeypatch):
+    def to_parquet(self, caminho, **kwargs):
+        with open(caminho, 'wb') as f:
+            f.write(b'parcial')
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', to_parquet)
+    gravar_cache('abc', pd.DataFrame({'VALOR': ['a']}))
+    assert _arquivos(diretorio) == []
+    assert ler_cache('abc') is None
+
+
+def test_limite_remove_os_menos_usados(diretorio, monkeypatch):
+    df = pd.DataFrame({'VALOR': ['x' * 100]})
+    for i, chave in enumerate(['a', 'b', 'c']):
+        gravar_cache(chave, df)
+        os.utime(cache_disco._caminho(chave), (1000 + i, 1000 + i))
+    tamanho = os.path.getsize(cache_disco._caminho('a'))
+    (diretorio / 'outro.tmp').write_bytes(b'y' * 10 * tamanho)  # só .parquet conta e sai
+
+    ler_cache('a')  # uso recente: 'b' passa a ser o menos usado
+    monkeypatch.setenv('CONTROLE_RM_CACHE_MAX_MB', str(2.5 * tamanho / 1024 / 1024))
+    gravar_cache('d', df)
+    assert _arquivos(diretorio) == ['a.parquet', 'd.parquet', 'outro.tmp']
+    remover_excedente(limite=0)
+    assert _arquivos(diretorio) == ['outro.tmp']
+
+
+def test_arquivo_em_disco_gravado_uma_vez(diretorio, monkeypatch):
+    chamadas = []
+
+    def escrever(file, caminho):
+        chamadas.append(caminho)
+        with open(caminho, 'wb') as f:
+            f.write(file.read())
+
+    caminho = arquivo_em_disco('abc', io.BytesIO(b'x' * 100), escrever)
+    assert arquivo_em_disco('abc', io.BytesIO(b'outro'), escrever) == caminho
+    assert len(chamadas) == 1 and chamadas[0] != caminho  # escrito num temporário e renomeado
+    assert _arquivos(diretorio) == ['abc.bruto.parquet']
+
+    # maior que o limite: os outros arquivos saem, o recém-gravado fica
+    (diretorio / 'velho.parquet').write_bytes(b'y' * 100)
+    monkeypatch.setenv('CONTROLE_RM_CACHE_MAX_MB', str(150 / 1024 / 1024))
+    arquivo_em_disco('def', io.BytesIO(b'z' * 200), escrever)
+    assert _arquivos(diretorio) == ['def.bruto.parquet']
+
+
+def test_arquivo_em_disco_falha_sem_arquivo_parcial(diretorio):
+    def escrever(file, caminho):
+        with open(caminho, 'wb') as f:
+            f.write(b'parcial')
+        raise ValueError('planilha inválida')
+
+    with pytest.raises(ValueError):
+        arquivo_em_disco('abc', io.BytesIO(b'x'), escrever)
+    assert _arquivos(diretorio) == []
+    assert not os.path.exists(cache_disco._caminho('abc.bruto'))
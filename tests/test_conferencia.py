@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from controle_rm import conferencia
+from controle_rm.conferencia import PlanilhaMemoria, registros_conferencia, sincronizar_conferencia, sincronizar_linhas
+
+CABECALHO = ['LOTE', 'QTD', 'OBS']
+
+
+def _planilha(n: int = 3) -> PlanilhaMemoria:
+    return PlanilhaMemoria([CABECALHO] + [[f'L{i}', str(i), ''] for i in range(1, n + 1)])
+
+
+def _celulas(linhas: list) -> int:
+    return sum(len(conferencia._aparar(l)) for l in linhas)
+
+
+def test_primeira_leitura_completa(tmp_path):
+    planilha = _planilha()
+    linhas = sincronizar_linhas(planilha, str(tmp_path))
+    assert linhas == [CABECALHO, ['L1', '1'], ['L2', '2'], ['L3', '3']]
+    assert planilha.celulas_lidas == _celulas(planilha.linhas)
+    assert conferencia._ler_snapshot(str(tmp_path)) == linhas
+
+
+def test_linhas_acrescentadas_leem_so_o_delta(tmp_path):
+    planilha = _planilha()
+    sincronizar_linhas(planilha, str(tmp_path))
+    planilha.celulas_lidas = 0
+    novas = [['L4', '4', 'ok'], ['L5', '5']]
+    planilha.acrescentar(*novas)
+
+    linhas = sincronizar_linhas(planilha, str(tmp_path))
+    assert linhas == [CABECALHO, ['L1', '1'], ['L2', '2'], ['L3', '3'], ['L4', '4', 'ok'], ['L5', '5']]
+    # a última linha conhecida é relida junto com as novas
+    assert planilha.celulas_lidas == _celulas([['L3', '3']] + novas)
+    assert conferencia._ler_snapshot(str(tmp_path)) == linhas
+
+
+@pytest.mark.parametrize('alterar', [
+    lambda linhas: linhas[-1].__setitem__(0, 'L3-editado'),
+    lambda linhas: linhas.pop(),
+], ids=['editada', 'apagada'])
+def test_ultima_linha_alterada_recarrega_tudo(tmp_path, alterar):
+    planilha = _planilha()
+    sincronizar_linhas(planilha, str(tmp_path))
+    alterar(planilha.linhas)
+    planilha.celulas_lidas = 0
+
+    linhas = sincronizar_linhas(planilha, str(tmp_path))
+    assert linhas == [conferencia._aparar(l) for l in planilha.linhas]
+    assert planilha.celulas_lidas >= _celulas(planilha.linhas)
+    assert conferencia._ler_snapshot(str(tmp_path)) == linhas
+
+
+def test_recarga_total_periodica(tmp_path, monkeypatch):
+    planilha = _planilha()
+    agora = 1_000_000.0
+    monkeypatch.setattr(conferencia.time, 'time', lambda: agora)
+    sincronizar_linhas(planilha, str(tmp_path), recarga_total_a_cada=60)
+
+    # dentro do intervalo: só a última linha conhecida é relida
+    planilha.celulas_lidas = 0
+    agora += 30
+    sincronizar_linhas(planilha, str(tmp_path), recarga_total_a_cada=60)
+    assert planilha.celulas_lidas == _celulas(planilha.linhas[-1:])
+
+    # expirado: a planilha inteira, mesmo sem mudanças
+    planilha.celulas_lidas = 0
+    agora += 31
+    sincronizar_linhas(planilha, str(tmp_path), recarga_total_a_cada=60)
+    assert planilha.celulas_lidas == _celulas(planilha.linhas)
+
+
+def test_linha_truncada_no_snapshot_e_descartada(tmp_path):
+    planilha = _planilha()
+    sincronizar_linhas(planilha, str(tmp_path))
+    with open(os.path.join(tmp_path, 'linhas.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('["L4", "4"')  # escrita interrompida
+    assert len(conferencia._ler_snapshot(str(tmp_path))) == 4
+
+    planilha.acrescentar(['L4', '4'])
+    linhas = sincronizar_linhas(planilha, str(tmp_path))
+    assert linhas[-1] == ['L4', '4']
+    # o que foi acrescentado depois continua legível
+    assert conferencia._ler_snapshot(str(tmp_path)) == linhas
+
+
+def test_registros_iguais_a_get_all_records():
+    gspread = pytest.importorskip('gspread')
+    from gspread.http_client import HTTPClient
+
+    linhas = [
+        CABECALHO + ['DATA'],
+        ['L1', '2', '', '01/02/2024'],
+        ['', '', 'sem lote'],
+        ['007', '1.5'],
+        [],
+        ['L9', '', '', ''],
+    ]
+
+    class Cliente(HTTPClient):
+        # responde como a API do Sheets, sem rede
+        def __init__(self):
+            pass
+
+        def values_get(self, id, range, params=None):
+            return {'range': 'Folha!A1:D6', 'majorDimension': 'ROWS', 'values': PlanilhaMemoria(linhas).todas_linhas()}
+
+    propriedades = {'sheetId': 0, 'title': 'Folha', 'index': 0, 'gridProperties': {'rowCount': 6, 'columnCount': 4}}
+    worksheet = gspread.worksheet.Worksheet(None, propriedades, spreadsheet_id='x', client=Cliente())
+    esperado = worksheet.get_all_records()
+
+    assert registros_conferencia(PlanilhaMemoria(linhas).todas_linhas()).to_dict('records') == esperado
+
+
+def test_sincronizar_conferencia_devolve_registros(tmp_path):
+    planilha = _planilha()
+    df = sincronizar_conferencia(planilha, str(tmp_path))
+    assert list(df.columns) == CABECALHO
+    assert df['QTD'].tolist() == [1, 2, 3]
@@ -0,0 +1,47 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from controle_rm import exportacao
+from controle_rm.exportacao import ExcelGrandeDemais, gerar_excel, gerar_zip
+
+
+def _tabelas() -> dict:
+    return {
+        'CAPA_Atendidas': pd.DataFrame({'CAPA': ['CP1', 'CP2'], 'CAM': ['CAM 01', np.nan], 'RMS': [3, np.nan]}),
+        'VAZIA': pd.DataFrame(columns=['A', 'B']),
+    }
+
+
+def test_excel_igual_ao_to_excel():
+    lido = pd.read_excel(io.BytesIO(gerar_excel(_tabelas())), sheet_name=None)
+    assert list(lido) == list(_tabelas())
+    for nome, df in _tabelas().items():
+        pd.testing.assert_frame_equal(lido[nome], df, check_dtype=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('linhas, cabe', [(4, True), (5, False)])
+def test_excel_no_limite_de_linhas(monkeypatch, linhas, cabe):
+    monkeypatch.setattr(exportacao, 'LIMITE_LINHAS_EXCEL', 5)  # cabeçalho + 4 linhas
+    tabelas = {'PEQUENA': pd.DataFrame({'A': [1]}), 'PWA_RAW': pd.DataFrame({'A': range(linhas)})}
+    if cabe:
+        assert len(pd.read_excel(io.BytesIO(gerar_excel(tabelas)), sheet_name='PWA_RAW')) == linhas
+    else:
+        with pytest.raises(ExcelGrandeDemais, match='PWA_RAW'):
+            gerar_excel(tabelas)
+
+
+def test_excel_no_limite_de_colunas(monkeypatch):
+    monkeypatch.setattr(exportacao, 'LIMITE_COLUNAS_EXCEL', 2)
+    with pytest.raises(ExcelGrandeDemais, match='LARGA'):
+        gerar_excel({'LARGA': pd.DataFrame({'A': [1], 'B': [2], 'C': [3]})})
+
+
+def test_zip_sem_limite_de_linhas(monkeypatch):
+    monkeypatch.setattr(exportacao, 'LIMITE_LINHAS_EXCEL', 5)
+    dados = gerar_zip({'PWA_RAW': pd.DataFrame({'A': range(10)})}, formato='csv')
+    with zipfile.ZipFile(io.BytesIO(dados)) as zf:
+        assert len(pd.read_csv(zf.open('PWA_RAW.csv'), sep=';')) == 10
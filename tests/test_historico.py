@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from controle_rm import historico
+from controle_rm.historico import EmBlocos, classificacao_bloco1, historico_rm, registrar_execucao
+
+
+def _em(momento: datetime):
+    class Relogio(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return momento
+    return Relogio
+
+
+def _entradas(chave: str) -> dict:
+    pwa = pd.DataFrame({'PEDIDO_LIMPO': ['100001', '100002'], 'CAPA': ['CP001', 'CP001'], 'CAM': ['CAM 01'] * 2,
+                        'LOTE': ['L01', 'L02'], 'STATUS': ['', 'SEPARADO']})
+    completas = pd.DataFrame({'CAPA': ['CP001'], 'CAM': ['CAM 01']})
+    return {
+        'PWA': (chave, pwa),
+        'SINGRA': (chave, pd.DataFrame({'ID': ['100001'], 'SITUACAO': ['Em Expedição']})),
+        'CONFERENCIA': (chave, pd.DataFrame({'LOTE': ['L01']})),
+        'BLOCO1': (chave, lambda: classificacao_bloco1(completas, pd.DataFrame(), pd.DataFrame())),
+    }
+
+
+def _contagens(caminho: str) -> dict:
+    with closing(sqlite3.connect(caminho)) as con:
+        return {t: con.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+                for t in ('ingestoes', 'pwa', 'singra', 'conferencia', 'classificacoes')}
+
+
+def test_arquivo_padrao_fora_do_temporario(monkeypatch):
+    monkeypatch.delenv('CONTROLE_RM_HISTORICO', raising=False)
+    assert historico.arquivo_historico() == historico.ARQUIVO_PADRAO
+    assert not historico.ARQUIVO_PADRAO.startswith(tempfile.gettempdir())
+    monkeypatch.setenv('CONTROLE_RM_HISTORICO', 'off')
+    assert historico.arquivo_historico() is None
+
+
+def test_envios_antigos_sao_apagados(tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'historico.sqlite3')
+    monkeypatch.setenv('CONTROLE_RM_HISTORICO_DIAS', '30')
+
+    monkeypatch.setattr(historico, 'datetime', _em(datetime(2024, 1, 1, 8)))
+    assert registrar_execucao('main', _entradas('antiga'), caminho) == 4
+    monkeypatch.setattr(historico, 'datetime', _em(datetime(2024, 1, 20, 8)))
+    assert registrar_execucao('main', _entradas('recente'), caminho) == 4
+    antes = _contagens(caminho)
+    assert antes['ingestoes'] == 8
+
+    # 45 dias depois da primeira: ela sai, com as linhas de todas as tabelas; a de 20/01 fica
+    monkeypatch.setattr(historico, 'datetime', _em(datetime(2024, 2, 15, 8)))
+    assert registrar_execucao('main', _entradas('nova'), caminho) == 4
+    assert _contagens(caminho) == antes
+    with closing(sqlite3.connect(caminho)) as con:
+        assert {c for (c,) in con.execute("SELECT DISTINCT chave FROM ingestoes")} == {'recente', 'nova'}
+        for tabela in ('pwa', 'singra', 'conferencia', 'classificacoes'):
+            orfas = con.execute(f"SELECT count(*) FROM {tabela} WHERE ingestao NOT IN (SELECT id FROM ingestoes)")
+            assert orfas.fetchone()[0] == 0
+    assert len(historico_rm('100001', dias=3650, caminho=caminho)['pwa']) == 2
+
+
+@pytest.mark.parametrize('dias', ['0', 'x'])
+def test_retencao_desligada_ou_invalida(tmp_path, monkeypatch, dias):
+    caminho = str(tmp_path / 'historico.sqlite3')
+    monkeypatch.setenv('CONTROLE_RM_HISTORICO_DIAS', dias)
+    monkeypatch.setattr(historico, 'datetime', _em(datetime(2020, 1, 1, 8)))
+    registrar_execucao('main', _entradas('antiga'), caminho)
+    monkeypatch.setattr(historico, 'datetime', _em(datetime(2021, 6, 1, 8)))
+    registrar_execucao('main', _entradas('nova'), caminho)
+    # '0' guarda tudo; valor inválido usa o padrão (365 dias)
+    assert _contagens(caminho)['ingestoes'] == (8 if dias == '0' else 4)
+    assert os.path.exists(caminho)
+
+
+def test_entrada_em_blocos(tmp_path):
+    # mesmas linhas gravadas a partir do DataFrame e de blocos de linhas distintas
+    pwa = _entradas('x')['PWA'][1]
+    consultadas = []
+
+    def distintas(colunas):
+        consultadas.append(colunas)
+        dados = pwa.reindex(columns=colunas, fill_value='')
+        return [dados.iloc[:1], dados.iloc[1:]]
+
+    caminhos = [str(tmp_path / 'df.sqlite3'), str(tmp_path / 'blocos.sqlite3')]
+    registrar_execucao('main', {'PWA': ('df', pwa)}, caminhos[0])
+    registrar_execucao('main', {'PWA': ('blocos', EmBlocos(len(pwa) + 3, distintas))}, caminhos[1])
+    assert consultadas == [list(historico._FONTES['PWA'][1].values())]
+
+    linhas = []
+    for caminho in caminhos:
+        with closing(sqlite3.connect(caminho)) as con:
+            linhas.append(sorted(con.execute("SELECT rm, capa, cam, lote, volume, mapa, stc, status FROM pwa")))
+            total = con.execute("SELECT linhas FROM ingestoes").fetchone()[0]
+    assert linhas[0] == linhas[1] and len(linhas[0]) == 2
+    assert total == len(pwa) + 3
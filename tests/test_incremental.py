@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from controle_rm import incremental
+from controle_rm.bloco1 import classificar_capas_estrito
+from controle_rm.incremental import Bloco1Incremental
+from tests import sinteticos
+
+LOTES = [f"L{i:02d}" for i in range(12)]
+
+
+def _rodadas(seed: int, passos: int = 6):
+    """(df_pwa, lotes, pedidos) de execuções consecutivas com alterações aleatórias entre elas."""
+    rng = np.random.default_rng(seed)
+    df = sinteticos.pwa(rng)
+    rms = df['PEDIDO_LIMPO'].unique().tolist()
+    lotes, pedidos = sinteticos.sortear(rng, LOTES, 0.6), sinteticos.sortear(rng, rms, 0.8)
+    for _ in range(passos):
+        yield df, lotes, pedidos
+        alteracao = rng.integers(5)
+        if alteracao == 0:
+            df = sinteticos.editar(rng, df, int(rng.integers(1, 4)))
+        elif alteracao == 1:
+            df = sinteticos.acrescentar(rng, df, int(rng.integers(1, 4)))
+        elif alteracao == 2:
+            lotes = sinteticos.alternar(rng, lotes, LOTES, 1)
+        elif alteracao == 3:
+            pedidos = sinteticos.alternar(rng, pedidos, df['PEDIDO_LIMPO'].unique().tolist(), 2)
+        # 4: mesmas entradas
+
+
+@pytest.mark.parametrize('seed', sinteticos.SEMENTES)
+def test_incremental_igual_ao_calculo_completo(seed):
+    estado = Bloco1Incremental()
+    for df, lotes, pedidos in _rodadas(seed):
+        obtido = estado.classificar(df, lotes, pedidos)
+        sinteticos.assert_tabelas_iguais(obtido, classificar_capas_estrito(df, lotes, pedidos))
+
+
+@pytest.mark.parametrize('fracao', [0.0, 1.0])
+@pytest.mark.parametrize('seed', range(10))
+def test_limite_de_alteracoes(seed, fracao, monkeypatch):
+    # 0: sempre o cálculo completo; 1: sempre a correção parcial (depois da primeira execução)
+    monkeypatch.setattr(incremental, 'FRACAO_MAXIMA', fracao)
+    estado = Bloco1Incremental()
+    modos = []
+    for df, lotes, pedidos in _rodadas(seed):
+        obtido = estado.classificar(df, lotes, pedidos)
+        sinteticos.assert_tabelas_iguais(obtido, classificar_capas_estrito(df, lotes, pedidos))
+        modos.append((estado.resumo['modo'], estado.resumo['rms'] + estado.resumo['capas']))
+    assert modos[0][0] == 'completo'
+    for modo, alteradas in modos[1:]:
+        # sem nada alterado a correção parcial não refaz nada, mesmo com limite 0
+        assert modo == ('incremental' if fracao == 1.0 or alteradas == 0 else 'completo')
+
+
+def test_muitas_alteracoes_recalculam_tudo():
+    rng = np.random.default_rng(0)
+    df = sinteticos.pwa(rng)
+    pedidos = set(df['PEDIDO_LIMPO'])
+    estado = Bloco1Incremental()
+    estado.classificar(df, {'L00'}, pedidos)
+
+    estado.classificar(sinteticos.editar(rng, df, 1), {'L00'}, pedidos)
+    assert estado.resumo['modo'] == 'incremental'
+
+    # todos os LOTES mudam de situação: todas as RMs/CAPAs afetadas
+    estado.classificar(df, set(LOTES), pedidos)
+    assert estado.resumo['modo'] == 'completo'
+
+
+def test_rm_em_varias_capas():
+    rng = np.random.default_rng(1)
+    df = sinteticos.pwa(rng)
+    rm = df['PEDIDO_LIMPO'].iat[0]
+    linhas = df.index[df['PEDIDO_LIMPO'] == rm]
+    df.loc[linhas, 'CAPA'] = ['CP900', 'CP901'] * (len(linhas) // 2) + ['CP900'] * (len(linhas) % 2)
+    estado = Bloco1Incremental()
+    estado.classificar(df, {'L00'}, set(df['PEDIDO_LIMPO']))
+
+    # a RM ganha linha numa terceira CAPA e um dos seus LOTES entra na conferência
+    extra = df.loc[[linhas[0]]].assign(CAPA='CP902', LOTE='L11', MAPA='')
+    df2 = pd.concat([df, extra], ignore_index=True)
+    obtido = estado.classificar(df2, {'L00', 'L11'}, set(df['PEDIDO_LIMPO']))
+    assert estado.resumo['modo'] == 'incremental'
+    sinteticos.assert_tabelas_iguais(obtido, classificar_capas_estrito(df2, {'L00', 'L11'}, set(df['PEDIDO_LIMPO'])))
@@ -0,0 +1,35 @@
+import pytest
+
+from controle_rm import interface
+
+pytest.importorskip('streamlit.testing.v1')
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+def _pagina():
+    import pandas as pd
+
+    from controle_rm.interface import tabela_paginada
+
+    tabela_paginada(pd.DataFrame({'DETALHE': ['a\nb\nc', 'd']}), 'teste', quebrar_linhas=True)
+
+
+@pytest.mark.parametrize('suporta', [True, False])
+def test_row_height_so_quando_o_streamlit_aceita(monkeypatch, suporta):
+    chamadas = []
+    original = interface.st.dataframe
+
+    def dataframe(data, use_container_width=False, hide_index=None, column_config=None, **opcoes):
+        # sem suporte: como o st.dataframe das versões antigas, que não tem row_height
+        if opcoes and not suporta:
+            raise TypeError(f"argumentos inesperados: {list(opcoes)}")
+        chamadas.append(opcoes)
+        return original(data, use_container_width=use_container_width, hide_index=hide_index,
+                        column_config=column_config, **opcoes)
+
+    monkeypatch.setattr(interface, '_ALTURA_LINHA', suporta)
+    monkeypatch.setattr(interface.st, 'dataframe', dataframe)
+    app = AppTest.from_function(_pagina).run()
+    assert not app.exception
+    esperado = {'row_height': interface.ALTURA_LINHA_PX + 2 * interface.ALTURA_TEXTO_PX} if suporta else {}
+    assert chamadas == [esperado]
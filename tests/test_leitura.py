@@ -0,0 +1,226 @@
+import datetime
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from controle_rm import leitura
+from controle_rm.leitura import ler_singra_csv
+
+COLUNAS = ['ID', 'SITUACAO', 'OMS', 'LISTA_WMS_ID']
+
+
+@pytest.fixture(params=[256, 1024, 1 << 20])
+def blocos_pequenos(request, monkeypatch):
+    # vários blocos mesmo em arquivos de poucas linhas
+    monkeypatch.setattr(leitura, '_BLOCO_CSV_BYTES', request.param)
+    monkeypatch.setattr(leitura, '_BLOCO_CSV_LINHAS', 7)
+
+
+def _csv(linhas: list) -> str:
+    return 'ID;SITUACAO;EXTRA;OMS;LISTA_WMS_ID\n' + ''.join(l + '\n' for l in linhas)
+
+
+def _linhas(n: int, inicio: int = 0) -> list:
+    return [f"{100000 + i};Em Expedição;x{i};OM{i % 7};{'' if i % 5 == 0 else 900 + i}" for i in range(inicio, inicio + n)]
+
+
+def _comparar(texto: str, encoding: str = 'utf-8'):
+    dados = texto.encode(encoding)
+    obtido = ler_singra_csv(io.BytesIO(dados))
+    esperado = pd.read_csv(io.BytesIO(dados), sep=';', encoding='utf-8-sig' if encoding == 'utf-8' else encoding,
+                           dtype=str)[COLUNAS]
+    pd.testing.assert_frame_equal(obtido.reset_index(drop=True), esperado)
+
+
+CASOS = {
+    'simples': _csv(_linhas(50)),
+    'linha_em_branco_e_curta': _csv(_linhas(50) + ['', '999;x']),
+    'duas_linhas_em_branco': _csv(_linhas(50) + ['', '999;x'] + _linhas(48, 50) + ['', '998;y']),
+    'em_branco_no_meio': _csv(_linhas(20) + ['', ''] + _linhas(30, 20)),
+    'curta_no_inicio': _csv(['999;x'] + _linhas(60)),
+    'quebra_de_linha_entre_aspas': _csv(_linhas(10) + ['123;"Em\nExpedição";e;OM1;5'] + _linhas(30, 10)),
+    'aspas_e_curta': _csv(_linhas(10) + ['123;"Em\n\nExpedição";e;OM1;5', ''] + _linhas(30, 10) + ['7;z']),
+    'so_colunas_usadas': 'ID;SITUACAO;OMS;LISTA_WMS_ID\n' + ''.join(f'{i};a;b;c\n' for i in range(50)) + '\n999;x\n',
+    'nulos': _csv(_linhas(10) + ['NA;null;;N/A;nan'] + _linhas(10, 10)),
+}
+
+
+@pytest.mark.usefixtures('blocos_pequenos')
+@pytest.mark.parametrize('caso', list(CASOS))
+def test_igual_ao_read_csv(caso):
+    _comparar(CASOS[caso])
+
+
+@pytest.mark.usefixtures('blocos_pequenos')
+@pytest.mark.parametrize('caso', ['simples', 'linha_em_branco_e_curta', 'quebra_de_linha_entre_aspas'])
+def test_latin1(caso):
+    _comparar(CASOS[caso].replace('Em Expedição', 'Em Expedição ÇÃO'), 'latin1')
+
+
+@pytest.mark.usefixtures('blocos_pequenos')
+def test_utf8_com_bom():
+    _comparar('\ufeff' + CASOS['linha_em_branco_e_curta'])
+
+
+@pytest.mark.usefixtures('blocos_pequenos')
+@pytest.mark.parametrize('seed', range(20))
+def test_aleatorio(seed):
+    rng = np.random.default_rng(seed)
+    linhas = _linhas(int(rng.integers(1, 120)))
+    for _ in range(int(rng.integers(0, 6))):
+        extra = ['', '999;x', '5;"a\nb";c;d;e', '6;;;;'][rng.integers(4)]
+        linhas.insert(int(rng.integers(len(linhas) + 1)), extra)
+    _comparar(_csv(linhas), 'latin1' if rng.random() < 0.3 else 'utf-8')
+
+
+# ----------------------
+# PWA (.xlsx): os dois leitores contra o pd.read_excel
+# ----------------------
+COLUNAS_XLSX = ['PEDIDO', 'CAPA', 'MAPA', 'LOTE', 'STATUS', 'QTD']
+ENGINES = ['streaming', pytest.param('calamine', marks=pytest.mark.skipif(
+    not leitura.calamine_disponivel(), reason='python-calamine ausente ou pandas < 2.2'))]
+
+
+def _esperado(dados: bytes) -> pd.DataFrame:
+    df = pd.read_excel(io.BytesIO(dados), sheet_name=0, dtype=str)
+    return df[[c for c in df.columns if c in COLUNAS_XLSX]]
+
+
+def _comparar_xlsx(dados: bytes, engine: str):
+    obtido = leitura.ler_pwa_xlsx(io.BytesIO(dados), COLUNAS_XLSX, engine=engine)
+    pd.testing.assert_frame_equal(obtido, _esperado(dados), check_index_type=False)
+
+
+def _openpyxl(linhas: list, inicio: int = 1, vazias_no_fim: int = 0) -> bytes:
+    import openpyxl
+    from openpyxl.styles import Font
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for i, linha in enumerate(linhas):
+        for j, v in enumerate(linha):
+            if v is not None:
+                ws.cell(row=inicio + i, column=j + 1, value=v)
+    for i in range(vazias_no_fim):
+        # célula sem valor, só com estilo: a linha existe no XML
+        ws.cell(row=inicio + len(linhas) + i, column=2).font = Font(bold=True)
+    saida = io.BytesIO()
+    wb.save(saida)
+    return saida.getvalue()
+
+
+def _xlsxwriter(linhas: list) -> bytes:
+    import xlsxwriter
+
+    saida = io.BytesIO()
+    # constant_memory: textos como inline strings (t="inlineStr")
+    wb = xlsxwriter.Workbook(saida, {'constant_memory': True, 'in_memory': True})
+    ws = wb.add_worksheet()
+    data = wb.add_format({'num_format': 'dd/mm/yyyy'})
+    for i, linha in enumerate(linhas):
+        for j, v in enumerate(linha):
+            if isinstance(v, datetime.datetime):
+                ws.write_datetime(i, j, v, data)
+            elif v is not None:
+                ws.write(i, j, v)
+    ws.write_blank(len(linhas) + 2, 1, None, wb.add_format({'bold': True}))
+    wb.close()
+    return saida.getvalue()
+
+
+CABECALHO_XLSX = ['PEDIDO', 'CAPA', 'EXTRA', 'MAPA', 'LOTE', 'STATUS', 'QTD']
+
+
+def _valores(rng, n: int) -> list:
+    def celula(j):
+        tipo = rng.integers(9)
+        if tipo == 0:
+            return None
+        if tipo == 1:
+            return int(rng.integers(-5, 10**7))
+        if tipo == 2:
+            return float(rng.integers(100)) + [0.0, 0.5, 0.25][rng.integers(3)]
+        if tipo == 3:
+            return datetime.datetime(2024, 1, 1) + datetime.timedelta(days=int(rng.integers(400)), hours=int(rng.integers(24)))
+        if tipo == 4:
+            return bool(rng.integers(2))
+        if tipo == 5:
+            return ['#N/A', '#DIV/0!', '#REF!'][rng.integers(3)]
+        if tipo == 6:
+            return ['NA', 'null', 'nan', '-', 'L01', '0007'][rng.integers(6)]
+        return f"T{j}-{rng.integers(1000)}"
+    return [[celula(j) for j in range(len(CABECALHO_XLSX))] for _ in range(n)]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('seed', range(10))
+def test_xlsx_openpyxl(engine, seed):
+    rng = np.random.default_rng(seed)
+    _comparar_xlsx(_openpyxl([CABECALHO_XLSX] + _valores(rng, int(rng.integers(1, 60))), vazias_no_fim=3), engine)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('seed', range(10))
+def test_xlsx_inline_strings(engine, seed):
+    rng = np.random.default_rng(seed)
+    linhas = [v for v in _valores(rng, int(rng.integers(1, 60)))]
+    # xlsxwriter grava os erros como texto: ficam de fora aqui
+    linhas = [[None if isinstance(v, str) and v.startswith('#') else v for v in l] for l in linhas]
+    _comparar_xlsx(_xlsxwriter([CABECALHO_XLSX] + linhas), engine)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_xlsx_linhas_vazias_no_meio_e_no_fim(engine):
+    linhas = [CABECALHO_XLSX, ['1', 'CP1'], [], [], ['2', None, None, None, 'L1'], []]
+    _comparar_xlsx(_openpyxl(linhas, vazias_no_fim=5), engine)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_xlsx_primeira_linha_vazia(engine):
+    # dados a partir de A2: cabeçalho vazio (Unnamed), nenhuma coluna projetada
+    dados = _openpyxl([CABECALHO_XLSX, ['1', 'CP1'], ['2', 'CP2']], inicio=2)
+    obtido = leitura.ler_pwa_xlsx(io.BytesIO(dados), COLUNAS_XLSX, engine=engine)
+    assert list(obtido.columns) == list(_esperado(dados).columns) == []
+
+
+@pytest.mark.parametrize('engine', ['streaming', pytest.param('calamine', marks=[
+    pytest.mark.skipif(not leitura.calamine_disponivel(), reason='python-calamine ausente ou pandas < 2.2'),
+    pytest.mark.xfail(reason='o calamine lê células só com espaços como vazias', strict=True),
+])])
+def test_xlsx_celulas_so_com_espacos(engine):
+    _comparar_xlsx(_openpyxl([CABECALHO_XLSX, ['1', 'CP1', None, ' '], ['2', '  ', None, 'x']]), engine)
+
+
+# ----------------------
+# Parquet bruto (motor DuckDB): as mesmas leituras, gravadas bloco a bloco
+# ----------------------
+def _parquet(tmp_path, escrever, dados: bytes) -> pd.DataFrame:
+    caminho = str(tmp_path / 'bruto.parquet')
+    escrever(io.BytesIO(dados), caminho)
+    # nulos voltam como None: NaN, como nos leitores
+    return pd.read_parquet(caminho).fillna(np.nan)
+
+
+@pytest.mark.usefixtures('blocos_pequenos')
+@pytest.mark.parametrize('caso', ['simples', 'linha_em_branco_e_curta', 'nulos'])
+def test_singra_para_parquet(tmp_path, caso):
+    dados = CASOS[caso].encode('utf-8')
+    pd.testing.assert_frame_equal(_parquet(tmp_path, leitura.singra_para_parquet, dados), ler_singra_csv(io.BytesIO(dados)))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pwa_para_parquet(tmp_path, monkeypatch, seed):
+    monkeypatch.setattr(leitura, '_BLOCO_XLSX_LINHAS', 7)
+    rng = np.random.default_rng(seed)
+    linhas = [CABECALHO_XLSX] + _valores(rng, int(rng.integers(1, 60))) + [[]] * 3 + _valores(rng, 10)
+    dados = _openpyxl(linhas, vazias_no_fim=9)
+    esperado = leitura.ler_pwa_xlsx(io.BytesIO(dados), COLUNAS_XLSX, engine='streaming')
+    obtido = _parquet(tmp_path, lambda f, c: leitura.pwa_para_parquet(f, c, COLUNAS_XLSX), dados)
+    pd.testing.assert_frame_equal(obtido, esperado, check_index_type=False)
+
+
+def test_pwa_para_parquet_sem_linhas(tmp_path):
+    obtido = _parquet(tmp_path, lambda f, c: leitura.pwa_para_parquet(f, c, COLUNAS_XLSX), _openpyxl([CABECALHO_XLSX]))
+    assert list(obtido.columns) == ['PEDIDO', 'CAPA', 'MAPA', 'LOTE', 'STATUS', 'QTD'] and obtido.empty
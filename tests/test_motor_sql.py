@@ -0,0 +1,108 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from controle_rm import leitura
+from controle_rm.bloco1 import classificar_capas_estrito
+from controle_rm.blocos import agregar_blocos
+from controle_rm.indices import construir_singra_map
+from controle_rm.leitura import ler_pwa_xlsx, ler_singra_csv, pwa_para_parquet, singra_para_parquet
+from controle_rm.motor_sql import (ParquetBruto, agregar_blocos_sql, classificar_capas_estrito_sql, construir_singra_map_sql,
+                                   contar_rms_sql, linhas_distintas_sql, pedidos_singra_sql)
+from controle_rm.normalizacao import normalizar_lote_serie
+from controle_rm.preparo import preparar_pwa, preparar_singra
+from tests import sinteticos
+
+pytest.importorskip('duckdb')
+
+
+def _entradas(seed: int):
+    rng = np.random.default_rng(seed)
+    df = preparar_pwa(sinteticos.sujar(rng, sinteticos.pwa(rng, n_rms=60)), 'estrito')
+    rms = df['PEDIDO_LIMPO'].unique().tolist()
+    lotes = set(normalizar_lote_serie(sinteticos.pwa(rng)['LOTE'].sample(6, random_state=seed), remover_bom=True))
+    return rng, df, lotes, sinteticos.sortear(rng, rms, 0.7)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_singra_map(seed):
+    rng, df, _, _ = _entradas(seed)
+    singra = sinteticos.singra(rng, df['PEDIDO_LIMPO'].tolist())  # IDs repetidos: vale a primeira linha
+    assert construir_singra_map_sql(singra) == construir_singra_map(singra)
+    assert construir_singra_map_sql(singra.drop(columns='ID')) == {}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_bloco1_estrito(seed):
+    _, df, lotes, pedidos = _entradas(seed)
+    for lotes_disponiveis, pedidos_singra in ((lotes, pedidos), (set(), pedidos), (lotes, set())):
+        sinteticos.assert_tabelas_iguais(
+            classificar_capas_estrito_sql(df, lotes_disponiveis, pedidos_singra),
+            classificar_capas_estrito(df, lotes_disponiveis, pedidos_singra),
+        )
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_blocos_2a5(seed):
+    _, df, lotes, _ = _entradas(seed)
+    for lotes_validos in (None, lotes, set()):
+        sinteticos.assert_tabelas_iguais(agregar_blocos_sql(df, lotes_validos), agregar_blocos(df, lotes_validos))
+
+
+def test_blocos_2a5_sem_colunas():
+    _, df, lotes, _ = _entradas(0)
+    for coluna in ('STC', 'MAPA', 'LOTE'):
+        parcial = df.drop(columns=coluna)
+        sinteticos.assert_tabelas_iguais(agregar_blocos_sql(parcial, lotes), agregar_blocos(parcial, lotes))
+
+
+# ----------------------
+# Parquet bruto em disco (main3.py com o motor DuckDB): normalização na consulta,
+# contra os DataFrames preparados em pandas a partir dos mesmos arquivos
+# ----------------------
+def _em_disco(tmp_path, seed: int):
+    rng = np.random.default_rng(seed)
+    bruto = sinteticos.sujar(rng, sinteticos.pwa(rng, n_rms=60))
+    bruto.insert(1, 'EXTRA', 'x')
+    # cabeçalho sujo: aspas, espaços e caixa, limpos por limpar_nomes_colunas
+    bruto = bruto.rename(columns={'CAPA': ' "capa" '})
+    xlsx = io.BytesIO()
+    bruto.to_excel(xlsx, index=False)
+    df = preparar_pwa(ler_pwa_xlsx(io.BytesIO(xlsx.getvalue()), engine='streaming'), 'estrito')
+    pwa_para_parquet(io.BytesIO(xlsx.getvalue()), str(tmp_path / 'pwa.parquet'))
+
+    rms = df['PEDIDO_LIMPO'].unique().tolist()
+    # coluna ID encontrada pelo nome que contém 'ID'
+    csv = sinteticos.singra(rng, rms).rename(columns={'ID': '\ufeff"Id_Pedido"'}).to_csv(sep=';', index=False).encode('utf-8')
+    df_singra = preparar_singra(ler_singra_csv(io.BytesIO(csv)), 'estrito')
+    singra_para_parquet(io.BytesIO(csv), str(tmp_path / 'singra.parquet'))
+    lotes = set(normalizar_lote_serie(sinteticos.pwa(rng)['LOTE'].sample(6, random_state=seed), remover_bom=True))
+    return (df, ParquetBruto.pwa(str(tmp_path / 'pwa.parquet')),
+            df_singra, ParquetBruto.singra(str(tmp_path / 'singra.parquet')), lotes)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_parquet_bruto(tmp_path, monkeypatch, seed):
+    monkeypatch.setattr(leitura, '_BLOCO_XLSX_LINHAS', 50)
+    df, pwa, df_singra, singra, lotes = _em_disco(tmp_path, seed)
+    assert pwa.columns == list(df.columns) and len(pwa) == len(df)
+    assert singra.columns == list(df_singra.columns) and len(singra) == len(df_singra)
+    assert contar_rms_sql(pwa) == df['PEDIDO_LIMPO'].nunique()
+    pedidos = set(df_singra['ID'].dropna().tolist()) - {''}
+    assert pedidos_singra_sql(singra) == pedidos
+
+    sinteticos.assert_tabelas_iguais(classificar_capas_estrito_sql(pwa, lotes, pedidos),
+                                     classificar_capas_estrito(df, lotes, pedidos))
+    sinteticos.assert_tabelas_iguais(agregar_blocos_sql(pwa), agregar_blocos(df))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_linhas_distintas(tmp_path, seed):
+    df, pwa, _, _, _ = _em_disco(tmp_path, seed)
+    colunas = ['PEDIDO_LIMPO', 'CAPA', 'LOTE', 'VOLUME', 'PI']  # PI ausente: vazia
+    obtido = pd.concat(list(linhas_distintas_sql(pwa, colunas, linhas_por_bloco=16)), ignore_index=True)
+    esperado = df.reindex(columns=colunas, fill_value='').astype(str).drop_duplicates()
+    pd.testing.assert_frame_equal(obtido.sort_values(colunas, ignore_index=True),
+                                  esperado.sort_values(colunas, ignore_index=True))
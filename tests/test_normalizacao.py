@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from controle_rm.normalizacao import mapa_to_intstr_serie, normalizar_codigo_rm_serie, normalizar_lote_serie
+
+# ----------------------
+# Funções escalares originais dos apps (referência das versões vetorizadas)
+# ----------------------
+
+def normalizar_codigo_rm(valor):
+    if pd.isna(valor) or str(valor).strip() == '':
+        return ''
+    s = str(valor).strip().replace("'", "").replace('"', "")
+    s = s.replace(".", "").replace(",", "").replace(" ", "")
+    return s
+
+
+def normalizar_codigo_rm_main3(valor):
+    if pd.isna(valor) or str(valor).strip() == '':
+        return ''
+    s = str(valor).replace('﻿', '').strip().replace("'", "").replace('"', "")
+    s = s.replace(".", "").replace(",", "").replace(" ", "")
+    if s.endswith('.0'):
+        s = s[:-2]
+    return s
+
+
+def normalizar_lote(valor):
+    if pd.isna(valor):
+        return ''
+    return str(valor).strip().replace("'", "").replace('"', '')
+
+
+def normalizar_lote_main3(valor):
+    if pd.isna(valor):
+        return ''
+    v_str = str(valor).replace('﻿', '').strip().replace("'", "").replace('"', '')
+    if v_str.endswith('.0'):
+        v_str = v_str[:-2]
+    return v_str
+
+
+def mapa_to_intstr(x):
+    x = str(x).strip()
+    if x == '' or x.upper() == 'NAN':
+        return ''
+    try:
+        if '.' in x:
+            return str(int(float(x)))
+        return x
+    except:
+        return x
+
+
+VALORES = [
+    '123', ' 1.234.567 ', "'00123'", '"45,6"', '12 34', '123.0', '123.00', '0012.0', '12.5', '12.50',
+    '-0.0', '-0', '-12.0', '-0.000', '0.0', '.0', '.', '1e3', '1.5e2', 'inf', '-inf', 'nan', 'NaN', ' NAN ',
+    '', '   ', '﻿', '﻿123', '﻿L-01.0', 'L-01', 'l01 ', 'abc.def', '1.0.0', '١٢.0',
+    '12345678901234567.0', '9' * 15 + '.0', None, np.nan, 12.0, -0.0, 7, 1.25,
+]
+
+
+def _serie(valores) -> pd.Series:
+    return pd.Series(valores, dtype=object)
+
+
+@pytest.mark.parametrize('vetorizada, escalar, kwargs', [
+    (normalizar_codigo_rm_serie, normalizar_codigo_rm, {}),
+    (normalizar_codigo_rm_serie, normalizar_codigo_rm_main3, {'remover_bom': True}),
+    (normalizar_lote_serie, normalizar_lote, {}),
+    (normalizar_lote_serie, normalizar_lote_main3, {'remover_bom': True}),
+], ids=['rm', 'rm_main3', 'lote', 'lote_main3'])
+def test_vetorizada_igual_a_escalar(vetorizada, escalar, kwargs):
+    serie = _serie(VALORES)
+    assert vetorizada(serie, **kwargs).tolist() == serie.map(escalar).tolist()
+
+
+def test_mapa_igual_a_escalar():
+    # os carregadores aplicam fillna('') antes (str(None) seria 'None' na versão escalar)
+    serie = _serie(VALORES).fillna('')
+    assert mapa_to_intstr_serie(serie).tolist() == serie.map(mapa_to_intstr).tolist()
+
+
+def test_colunas_numericas():
+    # colunas lidas como float (ex.: MAPA vazio em parte das linhas)
+    serie = pd.Series([1.0, -0.0, np.nan, 12.5, 3e20])
+    assert mapa_to_intstr_serie(serie).tolist() == serie.map(mapa_to_intstr).tolist()
+    assert normalizar_lote_serie(serie, remover_bom=True).tolist() == serie.map(normalizar_lote_main3).tolist()
+    assert normalizar_codigo_rm_serie(serie).tolist() == serie.map(normalizar_codigo_rm).tolist()
+
+
+def test_indice_preservado():
+    serie = pd.Series(['1.0', None, ' x '], index=[10, 5, 7], dtype=object)
+    assert list(mapa_to_intstr_serie(serie).index) == [10, 5, 7]
+    assert list(normalizar_lote_serie(serie).index) == [10, 5, 7]
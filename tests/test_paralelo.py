@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from controle_rm import paralelo
+from controle_rm.bloco1 import classificar_capas_estrito, verificar_capas_por_lote, verificar_capas_por_volume
+from controle_rm.indices import construir_indice_pwa, construir_presenca_volumes, construir_singra_map
+from controle_rm.normalizacao import normalizar_lote_serie
+from controle_rm.paralelo import (classificar_capas_estrito_paralelo, verificar_capas_por_lote_paralelo,
+                                  verificar_capas_por_volume_paralelo)
+from controle_rm.preparo import preparar_pwa
+from tests import sinteticos
+
+PROCESSOS = 2
+
+
+@pytest.fixture(scope='module', autouse=True)
+def encerrar_pool():
+    yield
+    pool = paralelo._POOL.pop(PROCESSOS, None)
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+
+
+def _entradas(seed: int, variante: str):
+    rng = np.random.default_rng(seed)
+    df = preparar_pwa(sinteticos.sujar(rng, sinteticos.pwa(rng, n_rms=60)), variante)
+    rms = df['PEDIDO_LIMPO'].unique().tolist()
+    singra = sinteticos.singra(rng, rms[: int(len(rms) * 0.8)])
+    return rng, df, singra
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_por_lote(seed):
+    rng, df, singra = _entradas(seed, 'lote')
+    indice, singra_map = construir_indice_pwa(df), construir_singra_map(singra)
+    lotes = sinteticos.sortear(rng, sorted(df['LOTE'].unique()), 0.6)
+    assert len(paralelo._particoes_indice(indice)) >= PROCESSOS
+    sinteticos.assert_tabelas_iguais(
+        verificar_capas_por_lote_paralelo(indice, singra_map, lotes, PROCESSOS),
+        verificar_capas_por_lote(indice, singra_map, lotes),
+    )
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_por_volume(seed):
+    rng, df, singra = _entradas(seed, 'volume')
+    indice, singra_map = construir_indice_pwa(df), construir_singra_map(singra)
+    presenca = construir_presenca_volumes(df, sinteticos.sortear(rng, sorted(df['VOLUME'].unique()), 0.7))
+    sinteticos.assert_tabelas_iguais(
+        verificar_capas_por_volume_paralelo(indice, singra_map, presenca, PROCESSOS),
+        verificar_capas_por_volume(indice, singra_map, presenca),
+    )
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_estrito(seed):
+    rng, df, _ = _entradas(seed, 'estrito')
+    lotes = set(normalizar_lote_serie(df['LOTE'], remover_bom=True)) - {'L00', 'L03', 'L07', ''}
+    pedidos = sinteticos.sortear(rng, df['PEDIDO_LIMPO'].unique().tolist(), 0.8)
+    sinteticos.assert_tabelas_iguais(
+        classificar_capas_estrito_paralelo(df, lotes, pedidos, PROCESSOS),
+        classificar_capas_estrito(df, lotes, pedidos),
+    )
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from controle_rm.preparo import preparar_conferencia, preparar_pwa, preparar_singra
+
+
+def test_estrito_cabecalhos_sem_bom_e_em_maiusculas():
+    pwa = pd.DataFrame({'﻿Pedido': ['1.234'], 'Capa': ['C1'], 'Lote': ['L1'], 'cam ': ['CAM 01']})
+    assert list(preparar_pwa(pwa, 'estrito').columns) == ['PEDIDO', 'CAPA', 'LOTE', 'CAM', 'PEDIDO_LIMPO']
+
+    conferencia = preparar_conferencia(pd.DataFrame({'﻿Lote': ['﻿L1']}), 'estrito')
+    assert list(conferencia.columns) == ['LOTE']
+    assert conferencia['LOTE'].tolist() == ['L1']
+
+    singra = preparar_singra(pd.DataFrame({'﻿"id"': ['1.234'], 'situacao': ['X']}), 'estrito')
+    assert list(singra.columns) == ['ID', 'SITUACAO']
+    assert singra['ID'].tolist() == ['1234']
+
+
+def test_lote_e_volume_mantem_cabecalhos():
+    # main.py e main2.py só tiram aspas e espaços dos nomes
+    for variante in ('lote', 'volume'):
+        pwa = preparar_pwa(pd.DataFrame({' Capa ': ['C1'], 'PEDIDO': ['1']}), variante)
+        assert 'Capa' in pwa.columns
+        assert 'Lote' in preparar_conferencia(pd.DataFrame({'Lote': ['L1']}), variante).columns